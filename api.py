@@ -0,0 +1,347 @@
+"""Lightweight async HTTP API over the same GameData/AuthManager core as the Streamlit app.
+
+Run locally with:
+    uvicorn api:app --port 8000
+
+Every endpoint accepts an optional ?league= query parameter to select a private league;
+leagues are created by an admin (POST /admin/leagues) and unknown ones get a 404.
+With IPL_REPLICA_OF set the API serves reads from the followed data files and
+redirects logins, predictions and bulk updates to the primary.
+"""
+import os
+import threading
+
+from starlette.applications import Starlette
+from starlette.concurrency import run_in_threadpool
+from starlette.exceptions import HTTPException
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, RedirectResponse, StreamingResponse
+from starlette.routing import Route
+
+import metrics
+from auth import AuthManager
+from cutoff_scheduler import CutoffScheduler
+from data import (DEFAULT_LEAGUE, REPLICA_OF, create_league, get_game_data, get_loaded_partitions, league_exists,
+                  make_match)
+from exports import DATASETS, FORMATS, export_filename, export_stream
+from prediction_queue import PredictionQueue
+from replica import ReplicaFollower
+
+auth_manager = AuthManager()
+prediction_queues = {}  # One queue per league partition
+cutoff_schedulers = {}
+replica_followers = {}  # Replicas only, in place of the queues and schedulers
+partitions_lock = threading.Lock()  # Requests for a new league start one queue and scheduler between them
+
+MAX_PAGE_SIZE = 200
+MAX_BULK_ITEMS = 500  # Matches plus results per bulk request
+
+
+def open_partition(league: str):
+    """Return (game_data, prediction_queue) of a league, loading it on first use; no queue on a replica"""
+    game_data = get_game_data(league)
+    # Players and matches added through the app since this process loaded them
+    game_data.refresh()
+    with partitions_lock:
+        if REPLICA_OF:
+            if league not in replica_followers:
+                replica_followers[league] = ReplicaFollower(game_data,
+                                                            float(os.getenv("IPL_REPLICA_POLL_SECONDS", "2")))
+                replica_followers[league].start()
+            return game_data, None
+        if league not in prediction_queues:
+            # Separate log so the API and a Streamlit process never replay each other's queue
+            prediction_queues[league] = PredictionQueue(
+                game_data,
+                log_file=os.path.join(game_data.partition_dir, "api_prediction_queue.log")
+            )
+            cutoff_schedulers[league] = CutoffScheduler(game_data, prediction_queues[league])
+            cutoff_schedulers[league].start()
+        return game_data, prediction_queues[league]
+
+
+async def get_partition(request: Request):
+    """Return (game_data, prediction_queue) for the ?league= of a request, no queue on a replica"""
+    league = request.query_params.get("league", DEFAULT_LEAGUE)
+    # Only leagues an admin created get a partition, queue and scheduler
+    if not league_exists(league):
+        raise HTTPException(404, "League not found")
+    # Loading a league, replaying its queue log and reloading other processes' saves all read files
+    return await run_in_threadpool(open_partition, league)
+
+
+def close_queues():
+    """Flush every league's queue on shutdown"""
+    for scheduler in cutoff_schedulers.values():
+        scheduler.stop()
+    for follower in replica_followers.values():
+        follower.stop()
+    for prediction_queue in prediction_queues.values():
+        prediction_queue.close()
+
+
+def get_current_user(request: Request):
+    """Return the token payload from the Authorization header, or None"""
+    header = request.headers.get("authorization", "")
+    scheme, _, token = header.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    return auth_manager.verify_token(token)
+
+
+def error(message: str, status_code: int) -> JSONResponse:
+    """Build an error response"""
+    return JSONResponse({"detail": message}, status_code=status_code)
+
+
+def to_primary(request: Request) -> RedirectResponse:
+    """Send a write to the primary; 307 keeps the method and body"""
+    url = REPLICA_OF.rstrip("/") + request.url.path
+    if request.url.query:
+        url += "?" + request.url.query
+    return RedirectResponse(url, status_code=307)
+
+
+async def login(request: Request):
+    """Exchange username and password for a JWT access token"""
+    if REPLICA_OF:
+        return to_primary(request)  # Accounts are only kept up to date on the primary
+    try:
+        body = await request.json()
+    except ValueError:
+        return error("Invalid JSON body", 400)
+    if not isinstance(body, dict):
+        return error("Body must be a JSON object", 400)
+
+    username = body.get("username")
+    password = body.get("password")
+    if not username or not password:
+        return error("Username and password are required", 400)
+
+    # bcrypt is deliberately slow, keep it off the event loop
+    if not await run_in_threadpool(auth_manager.verify_password, username, password):
+        return error("Invalid username or password", 401)
+
+    return JSONResponse({
+        "access_token": auth_manager.create_access_token(username),
+        "token_type": "bearer"
+    })
+
+
+async def open_matches(request: Request):
+    """List matches that still accept predictions"""
+    game_data, _ = await get_partition(request)
+    return JSONResponse(game_data.get_open_matches())
+
+
+async def submit_prediction(request: Request):
+    """Submit a prediction for the logged in user"""
+    if REPLICA_OF:
+        return to_primary(request)
+    user = get_current_user(request)
+    if not user:
+        return error("Not authenticated", 401)
+
+    username = user["sub"]
+    game_data, prediction_queue = await get_partition(request)
+    if username not in game_data.players:
+        return error("Please join the game first", 403)
+
+    try:
+        body = await request.json()
+    except ValueError:
+        return error("Invalid JSON body", 400)
+    if not isinstance(body, dict):
+        return error("Body must be a JSON object", 400)
+
+    match_id = body.get("match_id")
+    match = game_data.get_match(match_id)
+    if not match:
+        return error("Match not found", 404)
+
+    prediction = {
+        'winner': body.get('winner'),
+        'top_scorer': body.get('top_scorer'),
+        'top_wicket_taker': body.get('top_wicket_taker')
+    }
+    if not all(prediction.values()):
+        return error("winner, top_scorer and top_wicket_taker are required", 400)
+    if prediction['winner'] not in (match['team1'], match['team2']):
+        return error("Winner must be one of the teams playing", 400)
+
+    # The queue rejects a second prediction for the match and fsyncs before acknowledging,
+    # which would otherwise stall the event loop
+    success, message = await run_in_threadpool(prediction_queue.submit, match_id, username, prediction)
+    if not success:
+        return error(message, 409)
+    return JSONResponse({"detail": message, "match_id": match_id, "prediction": prediction}, status_code=201)
+
+
+async def leaderboard(request: Request):
+    """Get a page of the leaderboard"""
+    try:
+        page = int(request.query_params.get("page", 1))
+        page_size = min(int(request.query_params.get("page_size", 50)), MAX_PAGE_SIZE)
+    except ValueError:
+        return error("page and page_size must be integers", 400)
+    if page_size < 1:
+        return error("page_size must be positive", 400)
+    game_data, _ = await get_partition(request)
+    return JSONResponse(game_data.get_leaderboard_page(page, page_size))
+
+
+async def my_rank(request: Request):
+    """Get the logged in user's rank"""
+    user = get_current_user(request)
+    if not user:
+        return error("Not authenticated", 401)
+
+    game_data, _ = await get_partition(request)
+    rank = game_data.get_user_rank(user["sub"])
+    if not rank:
+        return error("You have not joined the game", 404)
+    return JSONResponse(rank)
+
+
+def parse_bulk(body: dict) -> tuple:
+    """(matches, results) keyed by match ID from a bulk request body, raises ValueError when malformed"""
+    if not isinstance(body, dict):
+        raise ValueError("Body must be a JSON object")
+    rows = body.get("matches") or []
+    result_rows = body.get("results") or []
+    if not isinstance(rows, list) or not isinstance(result_rows, list):
+        raise ValueError("matches and results must be lists")
+    if len(rows) + len(result_rows) > MAX_BULK_ITEMS:
+        raise ValueError(f"At most {MAX_BULK_ITEMS} matches and results per request")
+    matches = {}
+    for row in rows:
+        if not isinstance(row, dict) or not row.get("match_id"):
+            raise ValueError("Every match needs a match_id")
+        try:
+            matches[row["match_id"]] = make_match(row.get("team1"), row.get("team2"), row.get("date"), row.get("time"),
+                                                  row.get("venue", ""), row.get("is_playoff", False))
+        except (TypeError, ValueError):
+            raise ValueError(f"Match {row['match_id']!r} needs a date (YYYY-MM-DD) and time (HH:MM)")
+    results = {}
+    for row in result_rows:
+        if not isinstance(row, dict) or not row.get("match_id"):
+            raise ValueError("Every result needs a match_id")
+        results[row["match_id"]] = {field: row.get(field) for field in ('winner', 'top_scorer', 'top_wicket_taker')}
+    return matches, results
+
+
+async def bulk_update(request: Request):
+    """Add or edit many matches and enter many results in one commit, or preview the point changes"""
+    if REPLICA_OF:
+        return to_primary(request)
+    user = get_current_user(request)
+    if not user:
+        return error("Not authenticated", 401)
+    if user.get("role") != "admin":
+        return error("Admin access required", 403)
+
+    try:
+        matches, results = parse_bulk(await request.json())
+    except ValueError as e:
+        return error(str(e), 400)
+
+    game_data, prediction_queue = await get_partition(request)
+    problems = game_data.check_bulk(matches, results)
+    if problems:
+        return JSONResponse({"detail": "Invalid bulk update", "problems": problems}, status_code=400)
+    if request.query_params.get("preview") in ("1", "true"):
+        changes = await run_in_threadpool(game_data.preview_bulk, matches, results)
+        return JSONResponse({"matches": len(matches), "results": len(results), "changes": changes})
+
+    # Every acknowledged prediction has to be in the shards before it is scored
+    await run_in_threadpool(prediction_queue.flush)
+    success, message = await run_in_threadpool(game_data.apply_bulk, matches, results)
+    if not success:
+        return error(message, 409)
+    if results:
+        # Results are shared by the season, score them in the other loaded leagues too
+        for partition in get_loaded_partitions(game_data.season):
+            await run_in_threadpool(partition.sync_results)
+    return JSONResponse({"detail": message})
+
+
+async def new_league(request: Request):
+    """Create a private league"""
+    if REPLICA_OF:
+        return to_primary(request)
+    user = get_current_user(request)
+    if not user:
+        return error("Not authenticated", 401)
+    if user.get("role") != "admin":
+        return error("Admin access required", 403)
+
+    try:
+        body = await request.json()
+    except ValueError:
+        return error("Invalid JSON body", 400)
+    if not isinstance(body, dict) or not isinstance(body.get("league"), str):
+        return error("league is required", 400)
+
+    success, message = create_league(body["league"])
+    if not success:
+        return error(message, 409 if league_exists(body["league"]) else 400)
+    return JSONResponse({"detail": message, "league": body["league"]}, status_code=201)
+
+
+async def export(request: Request):
+    """Stream a dataset of the league as CSV or Parquet"""
+    user = get_current_user(request)
+    if not user:
+        return error("Not authenticated", 401)
+    if user.get("role") != "admin":
+        return error("Admin access required", 403)
+
+    dataset = request.path_params["dataset"]
+    file_format = request.query_params.get("format", "csv")
+    if dataset not in DATASETS:
+        return error(f"Unknown dataset, expected one of {', '.join(DATASETS)}", 404)
+    if file_format not in FORMATS:
+        return error(f"Unknown format, expected one of {', '.join(FORMATS)}", 400)
+    game_data, _ = await get_partition(request)
+    try:
+        chunks = export_stream(game_data, dataset, file_format)
+    except RuntimeError as e:
+        return error(str(e), 501)
+    # A plain iterator: Starlette pulls each chunk in its threadpool, off the event loop
+    return StreamingResponse(chunks, media_type=FORMATS[file_format], headers={
+        "Content-Disposition": f'attachment; filename="{export_filename(game_data, dataset, file_format)}"'
+    })
+
+
+async def replica_status(request: Request):
+    """Replication lag of a league on a replica, 404 on the primary"""
+    if not REPLICA_OF:
+        return error("Not a replica", 404)
+    game_data, _ = await get_partition(request)
+    return JSONResponse({"primary": REPLICA_OF, **replica_followers[game_data.league].status()})
+
+
+async def metrics_endpoint(request: Request):
+    """Counters and histograms in the Prometheus text format"""
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+async def http_error(request: Request, exc: HTTPException) -> JSONResponse:
+    """Errors raised while handling a request, in the same shape as the others"""
+    return error(exc.detail, exc.status_code)
+
+
+routes = [
+    Route("/login", login, methods=["POST"]),
+    Route("/matches/open", open_matches, methods=["GET"]),
+    Route("/predictions", submit_prediction, methods=["POST"]),
+    Route("/leaderboard", leaderboard, methods=["GET"]),
+    Route("/me/rank", my_rank, methods=["GET"]),
+    Route("/admin/bulk", bulk_update, methods=["POST"]),
+    Route("/admin/leagues", new_league, methods=["POST"]),
+    Route("/admin/export/{dataset}", export, methods=["GET"]),
+    Route("/replica", replica_status, methods=["GET"]),
+    Route("/metrics", metrics_endpoint, methods=["GET"]),
+]
+
+app = Starlette(routes=routes, exception_handlers={HTTPException: http_error}, on_shutdown=[close_queues])
@@ -2,9 +2,20 @@ import streamlit as st
 import pandas as pd
 from datetime import datetime, timedelta
 import plotly.express as px
-from data import GameData, IPL_TEAMS, IPL_TEAMS_INFO
-from auth import init_auth, login_required, show_login_page
-import base64
+from data import DEFAULT_LEAGUE, IPL_TEAMS, IPL_TEAMS_INFO, REPLICA_OF, GameData, create_league, get_game_data, get_loaded_partitions, league_exists, list_archived_seasons, make_match
+from archive import all_time_leaderboard, head_to_head
+from auth import get_auth_manager, init_auth, login_required, show_login_page
+from prediction_queue import PredictionQueue
+from snapshots import SnapshotManager
+from cutoff_scheduler import CutoffScheduler
+from sessions import SessionRegistry
+from replica import ReplicaFollower
+import metrics
+from cache import get_cache
+from charts import get_leaderboard_figures
+from exports import DATASETS, FORMATS, export_filename, export_stream
+from fragments import PAGE_CSS, RULES_MARKDOWN, logo_base64, logo_css, match_card_html, team_card_html, team_grid_html
+import html
 import os
 from pytz import timezone
 import json
@@ -12,17 +23,9 @@ import json
 # Add IST timezone
 IST = timezone('Asia/Kolkata')
 
-def get_image_base64(image_path):
-    """Convert local image to base64 string"""
-    with open(image_path, "rb") as img_file:
-        return base64.b64encode(img_file.read()).decode()
-
-# Initialize session state
-if 'game_data' not in st.session_state:
-    st.session_state.game_data = GameData()
-
-# Initialize authentication
-init_auth()
+# Title odds simulation size; a process pool only pays off on multi-core servers
+TITLE_ODDS_SIMULATIONS = int(os.getenv("IPL_TITLE_ODDS_SIMULATIONS", "1000"))
+TITLE_ODDS_WORKERS = int(os.getenv("IPL_TITLE_ODDS_WORKERS", "1"))
 
 # Page config
 st.set_page_config(
@@ -31,113 +34,172 @@ st.set_page_config(
     layout="wide"
 )
 
+# League comes from the URL (e.g. ?league=office) so many private leagues can share one server
+league = st.query_params.get("league", DEFAULT_LEAGUE)
+# Only leagues an admin created get a partition and background threads
+if not league_exists(league):
+    st.error("League not found. Ask an admin to create it, or check the link.")
+    st.stop()
+
+@st.cache_resource(show_spinner=False)
+def get_prediction_queue(league):
+    """Prediction submission queue shared by every session of a league in this server process"""
+    return PredictionQueue(get_game_data(league))
+
+@st.cache_resource(show_spinner=False)
+def get_snapshot_manager(league):
+    """Background snapshotter for a league's game data"""
+    manager = SnapshotManager(get_game_data(league))
+    manager.start()
+    return manager
+
+@st.cache_resource(show_spinner=False)
+def get_cutoff_scheduler(league):
+    """Background lock-out of a league's matches as their prediction cutoff passes"""
+    scheduler = CutoffScheduler(get_game_data(league), get_prediction_queue(league))
+    scheduler.start()
+    return scheduler
+
+@st.cache_resource(show_spinner=False)
+def get_replica_follower(league):
+    """Background reload of a league's data as the primary writes it, only on replicas"""
+    follower = ReplicaFollower(get_game_data(league), float(os.getenv("IPL_REPLICA_POLL_SECONDS", "2")))
+    follower.start()
+    return follower
+
+@st.cache_resource(show_spinner=False)
+def get_session_registry():
+    """Live sessions of this server process and the memory they hold"""
+    return SessionRegistry()
+
+@st.cache_resource(show_spinner=False)
+def get_metrics_server():
+    """Prometheus endpoint for this server process, only when IPL_METRICS_PORT is set"""
+    port = os.getenv("IPL_METRICS_PORT")
+    return metrics.start_metrics_server(int(port)) if port else None
+
+if REPLICA_OF:
+    # The primary snapshots and locks matches; a replica only follows its files
+    get_replica_follower(league)
+else:
+    get_snapshot_manager(league)
+    get_cutoff_scheduler(league)
+get_metrics_server()
+
+# Initialize session state
+if st.session_state.get('league') != league:
+    st.session_state.game_data = get_game_data(league)
+    st.session_state.league = league
+# Players, predictions and results saved by the API or another worker since the last run
+st.session_state.game_data.refresh()
+
+# Initialize authentication; replicas have no accounts, logging in happens on the primary
+if not REPLICA_OF:
+    init_auth()
+
+# Track this session so capacity can be planned
+session_registry = get_session_registry()
+session_registry.register_shared(f"game_data:{league}", st.session_state.game_data)
+if not REPLICA_OF:
+    session_registry.register_shared("auth_manager", get_auth_manager())
+session_registry.touch(st.session_state.get('username'))
+
 # Custom CSS
-st.markdown("""
-    <style>
-    .main {
-        padding: 2rem;
-    }
-    .stButton>button {
-        width: 100%;
-    }
-    .st-emotion-cache-1y4p8pa {
-        max-width: 1200px;
-    }
-    .team-logo {
-        width: 100px;
-        height: 100px;
-        object-fit: contain;
-        margin: 10px;
-    }
-    .team-logo-small {
-        width: 30px;
-        height: 30px;
-        object-fit: contain;
-        vertical-align: middle;
-        margin-right: 5px;
-    }
-    .team-card {
-        border: 2px solid #ddd;
-        border-radius: 10px;
-        padding: 10px;
-        margin: 5px;
-        text-align: center;
-        transition: transform 0.2s;
-        background-color: black;
-        color: white;
-    }
-    .team-card:hover {
-        transform: scale(1.05);
-        cursor: pointer;
-        box-shadow: 0 0 15px rgba(255, 255, 255, 0.2);
-    }
-    .team-card h4 {
-        color: white;
-        margin: 10px 0;
-    }
-    .prediction-card {
-        background-color: #f8f9fa;
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-    }
-    .match-card {
-        border: 2px solid #ddd;
-        border-radius: 10px;
-        padding: 15px;
-        margin: 10px 0;
-        text-align: center;
-        background-color: black;
-        color: white;
-    }
-    .match-card img {
-        max-width: 80px;
-        margin: 10px;
-    }
-    .vs-text {
-        font-size: 24px;
-        margin: 0 20px;
-        font-weight: bold;
-        color: white;
-    }
-    .dialog-backdrop {
-        display: none;
-        position: fixed;
-        top: 0;
-        left: 0;
-        width: 100%;
-        height: 100%;
-        background: rgba(0,0,0,0.5);
-        z-index: 1000;
-    }
-    .dialog-content {
-        background: white;
-        padding: 20px;
-        border-radius: 10px;
-        position: fixed;
-        top: 50%;
-        left: 50%;
-        transform: translate(-50%, -50%);
-        z-index: 1001;
-    }
-    </style>
-    """, unsafe_allow_html=True)
+st.markdown(PAGE_CSS, unsafe_allow_html=True)
 
 def display_team_logo(team_name, size="small"):
     """Helper function to display team logo with name"""
-    logo_path = IPL_TEAMS_INFO[team_name]["logo"]
     css_class = "team-logo" if size == "large" else "team-logo-small"
     try:
-        logo_base64 = get_image_base64(logo_path)
-        return f'<img src="data:image/png;base64,{logo_base64}" class="{css_class}" /> {team_name}'
+        return f'<img src="data:image/png;base64,{logo_base64(team_name)}" class="{css_class}" /> {team_name}'
     except:
         return team_name  # Fallback to just the team name if image loading fails
 
+def team_logo_label(team_name):
+    """Team name with its logo drawn from the class-based logo stylesheet"""
+    abbreviation = IPL_TEAMS_INFO[team_name]['abbreviation'].lower()
+    return f'<span class="team-logo-icon logo-{abbreviation}"></span> {team_name}'
+
+def player_picker(label, placeholder, teams, key):
+    """Search box with a ranked selectbox of matching players, returns the chosen name or ''"""
+    query = st.text_input(f"Search {label.rstrip(':').replace('Predict ', '').lower()}",
+                          placeholder="Name, initials or nickname, e.g. Kohli", key=f"{key}_query")
+    players = st.session_state.game_data.search_players(query, teams)
+    labels = {player['name']: f"{player['name']} ({player['role']}) - {player['team']}" for player in players}
+    choice = st.selectbox(label, [placeholder] + list(labels), format_func=lambda name: labels.get(name, name), key=key)
+    return "" if choice == placeholder else choice
+
+def format_rank_change(change):
+    """Arrow and places moved since the previous scored match"""
+    if change is None:
+        return '<span style="color: gray;">new</span>'
+    if change > 0:
+        return f'<span style="color: green;">▲ {change}</span>'
+    if change < 0:
+        return f'<span style="color: red;">▼ {-change}</span>'
+    return '<span style="color: gray;">–</span>'
+
+def show_crowd_consensus(match_id, match):
+    """Show what everyone else has predicted for a match"""
+    consensus = st.session_state.game_data.get_match_consensus(match_id)
+    st.subheader("Crowd Consensus")
+    if not consensus:
+        st.info("No predictions for this match yet. Be the first!")
+        return
+    
+    total = consensus['total']
+    st.caption(f"Based on {total} prediction{'s' if total != 1 else ''}")
+    col1, col2 = st.columns(2)
+    for col, team in zip([col1, col2], [match['team1'], match['team2']]):
+        with col:
+            share = consensus['winner'].get(team, 0) / total
+            st.write(f"**{team}** to win: {share:.0%}")
+            st.progress(share)
+    
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("Most picked run-scorers")
+        st.dataframe(pd.DataFrame(consensus['top_scorer'], columns=['Player', 'Picks']),
+                     hide_index=True, use_container_width=True)
+    with col2:
+        st.write("Most picked wicket-takers")
+        st.dataframe(pd.DataFrame(consensus['top_wicket_taker'], columns=['Player', 'Picks']),
+                     hide_index=True, use_container_width=True)
+
+def show_crowd_accuracy():
+    """Show how often the crowd got each category right in completed matches"""
+    rows = []
+    for match_id, match in st.session_state.game_data.matches.items():
+        accuracy = st.session_state.game_data.get_match_accuracy(match_id)
+        if accuracy:
+            rows.append({
+                'Match ID': match_id,
+                'Match': f"{match['team1']} vs {match['team2']}",
+                'Predictions': accuracy['predictions'],
+                'Winner': f"{accuracy['winner']:.0%}",
+                'Top Scorer': f"{accuracy['top_scorer']:.0%}",
+                'Top Wicket Taker': f"{accuracy['top_wicket_taker']:.0%}",
+                'Perfect': f"{accuracy['perfect']:.0%}"
+            })
+    if rows:
+        with st.expander("Crowd accuracy in completed matches"):
+            st.dataframe(pd.DataFrame(rows), hide_index=True, use_container_width=True)
+
 # Title and description
 st.title("🏏 IPL 2025 Prediction League")
 
+if league != DEFAULT_LEAGUE:
+    st.sidebar.caption(f"League: {league}")
+
+# Replicas are read-only: everything that writes is done on the primary
+if REPLICA_OF:
+    primary_url = f"{REPLICA_OF.rstrip('/')}/?league={league}"
+    st.sidebar.info(f"This is a read-only copy. [Log in on the main site]({primary_url}) to join the game "
+                    f"and make predictions.")
+    st.sidebar.caption(f"Updated {get_replica_follower(league).lag_seconds():.0f}s ago")
+
 # Authentication status
-if 'token' in st.session_state:
+if 'token' in st.session_state and not REPLICA_OF:
     st.sidebar.write(f"Logged in as: {st.session_state.username}")
     if st.sidebar.button("Logout"):
         del st.session_state.token
@@ -146,30 +208,28 @@ if 'token' in st.session_state:
 
 # Navigation
 available_pages = ["Home", "Leaderboard"]
-if 'token' in st.session_state:
+if 'token' in st.session_state and not REPLICA_OF:
     available_pages.extend(["Join Game", "Make Prediction"])
     if st.session_state.auth_manager.get_user(st.session_state.username)["role"] == "admin":
-        available_pages.extend(["Manage Matches", "Enter Results"])
+        available_pages.extend(["Manage Matches", "Enter Results", "Bulk Update"])
+        with st.sidebar.expander("Server capacity"):
+            capacity = session_registry.stats()
+            st.write(f"Live sessions: {capacity['live_sessions']} ({capacity['idle_sessions']} idle, "
+                     f"{capacity['expired_sessions']} expired)")
+            st.write(f"Session memory: {capacity['session_bytes_total'] / 2 ** 20:.1f} MB "
+                     f"(largest {capacity['session_bytes_max'] / 2 ** 10:.0f} KB)")
+            for name, size in capacity['shared_bytes'].items():
+                st.write(f"Shared {name}: {size / 2 ** 20:.1f} MB")
+            cache_stats = get_cache().stats()
+            st.write(f"Cache ({cache_stats['backend']}): {cache_stats['hit_rate'] * 100:.0f}% hits "
+                     f"of {cache_stats['hits'] + cache_stats['misses']} lookups, {cache_stats['evictions']} evicted")
 
 page = st.sidebar.radio("Navigation", available_pages)
 
 if page == "Home":
     # Display team logos in a grid
     st.markdown("### IPL Teams")
-    cols = st.columns(5)
-    for idx, team in enumerate(IPL_TEAMS):
-        with cols[idx % 5]:
-            logo_base64 = get_image_base64(IPL_TEAMS_INFO[team]['logo'])
-            st.markdown(
-                f"""
-                <div class="team-card" style="border-color: {IPL_TEAMS_INFO[team]['primary_color']}">
-                    <img src="data:image/png;base64,{logo_base64}" class="team-logo" />
-                    <h4>{team}</h4>
-                    <p style="color: {IPL_TEAMS_INFO[team]['primary_color']}">{IPL_TEAMS_INFO[team]['abbreviation']}</p>
-                </div>
-                """,
-                unsafe_allow_html=True
-            )
+    st.markdown(team_grid_html(), unsafe_allow_html=True)
     
     st.markdown("---")
     st.markdown("""
@@ -178,23 +238,7 @@ if page == "Home":
     """)
     
     st.header("How to Play")
-    st.markdown("""
-    ### Game Rules:
-    1. **Team Selection**: Pick one IPL team at the start (first-come, first-served)
-    2. **Predictions**: Before each match, predict:
-        - Match winner
-        - Highest run-scorer
-        - Highest wicket-taker
-    3. **Scoring System**:
-        - Correct match winner: 10 points
-        - Correct highest run-scorer: 5 points
-        - Correct highest wicket-taker: 5 points
-        - Team loyalty bonus: 5 extra points
-        - Perfect prediction bonus: 10 points
-    4. **Special Events**:
-        - Playoff matches: All points are doubled
-        - Trade window: One team switch allowed mid-season
-    """)
+    st.markdown(RULES_MARKDOWN)
 
     # Display current stats
     st.subheader("Current Game Statistics")
@@ -202,7 +246,7 @@ if page == "Home":
     
     with col1:
         st.metric("Total Players", len(st.session_state.game_data.players))
-        total_predictions = sum(len(preds) for preds in st.session_state.game_data.predictions.values())
+        total_predictions = st.session_state.game_data.get_total_predictions()
         st.metric("Total Predictions", total_predictions)
     
     with col2:
@@ -211,7 +255,7 @@ if page == "Home":
         st.metric("Matches Completed", completed_matches)
 
     # Show login form if not logged in
-    if 'token' not in st.session_state:
+    if 'token' not in st.session_state and not REPLICA_OF:
         st.markdown("---")
         st.subheader("Login")
         show_login_page()
@@ -257,9 +301,12 @@ elif page == "Manage Matches":
                 }
                 
                 # Add match to game data
-                if match_id not in st.session_state.game_data.matches:
-                    st.session_state.game_data.matches[match_id] = match_data
-                    st.session_state.game_data.save_data()
+                with st.session_state.game_data.writing():
+                    added = match_id not in st.session_state.game_data.matches
+                    if added:
+                        st.session_state.game_data.matches[match_id] = match_data
+                        st.session_state.game_data.save_data()
+                if added:
                     st.success("Match added successfully!")
                 else:
                     st.error("Match ID already exists!")
@@ -279,7 +326,11 @@ elif page == "Manage Matches":
             st.subheader("Edit Match")
             edit_match_id = st.selectbox("Select Match to Edit", matches_df['Match ID'].tolist())
             
-            if edit_match_id:
+            if edit_match_id in st.session_state.game_data.scored_matches:
+                # Scored points depend on the teams and result, a wrong result is taken back and rescored there
+                st.info("This match is already scored. To fix its result, use Correct a Result on the "
+                        "Enter Results page.")
+            elif edit_match_id:
                 match_data = st.session_state.game_data.matches[edit_match_id]
                 with st.form("edit_match"):
                     col1, col2, col3 = st.columns(3)
@@ -298,55 +349,88 @@ elif page == "Manage Matches":
                     
                     with col3:
                         edit_is_playoff = st.checkbox("Playoff Match", value=match_data['is_playoff'])
-                        
-                        # Add result input if match is completed
-                        if match_data.get('result'):
-                            st.write("Match Result:")
-                            winner = st.selectbox("Winner", [edit_team1, edit_team2], 
-                                                index=[0 if match_data['result']['winner'] == edit_team1 else 1])
-                            top_scorer = st.text_input("Top Scorer", value=match_data['result'].get('top_scorer', ''))
-                            top_wicket_taker = st.text_input("Top Wicket Taker", 
-                                                           value=match_data['result'].get('top_wicket_taker', ''))
                     
                     update_submitted = st.form_submit_button("Update Match")
                     if update_submitted:
-                        # Create match datetime in IST
-                        naive_datetime = datetime.combine(edit_date, edit_time)
-                        match_datetime = IST.localize(naive_datetime)
-                        # Calculate prediction cutoff (5 minutes before match)
-                        prediction_cutoff = match_datetime - timedelta(minutes=5)
-                        
-                        # Update match data
-                        updated_match_data = {
-                            'team1': edit_team1,
-                            'team2': edit_team2,
-                            'date': match_datetime.strftime("%Y-%m-%d"),
-                            'time': match_datetime.strftime("%H:%M"),
-                            'prediction_cutoff': prediction_cutoff.strftime("%Y-%m-%d %H:%M"),
-                            'venue': edit_venue,
-                            'is_playoff': edit_is_playoff,
-                            'result': match_data.get('result')
-                        }
-                        
-                        # Update result if it exists
-                        if match_data.get('result'):
-                            updated_match_data['result'] = {
-                                'winner': winner,
-                                'top_scorer': top_scorer,
-                                'top_wicket_taker': top_wicket_taker
-                            }
-                        
-                        # Update match in game data
-                        st.session_state.game_data.matches[edit_match_id] = updated_match_data
-                        st.session_state.game_data.save_data()
-                        st.success("Match updated successfully!")
-                        st.rerun()
+                        updated_match_data = make_match(edit_team1, edit_team2, edit_date.strftime("%Y-%m-%d"),
+                                                        edit_time.strftime("%H:%M"), edit_venue, edit_is_playoff)
+                        # Same rules as Bulk Update: teams stay fixed once a match has predictions or is locked
+                        success, message = st.session_state.game_data.apply_bulk({edit_match_id: updated_match_data})
+                        if success:
+                            st.success("Match updated successfully!")
+                            st.rerun()
+                        else:
+                            st.error(message)
         else:
             st.info("No matches added yet.")
+        
+        st.subheader("Export Data")
+        col1, col2 = st.columns(2)
+        with col1:
+            dataset = st.selectbox("Dataset", list(DATASETS), key="export_dataset")
+        with col2:
+            file_format = st.selectbox("Format", list(FORMATS), key="export_format")
+        if st.button("Prepare download"):
+            try:
+                # Encoded chunk by chunk from the shards; the download button needs the finished bytes
+                with st.spinner("Exporting..."):
+                    content = b"".join(export_stream(st.session_state.game_data, dataset, file_format))
+            except RuntimeError as e:
+                st.error(str(e))
+            else:
+                st.download_button(f"Download {dataset}", content, mime=FORMATS[file_format],
+                                   file_name=export_filename(st.session_state.game_data, dataset, file_format))
+        st.caption("For very large leagues, stream the same exports from the API: `GET /admin/export/<dataset>?format=csv`.")
+        
+        st.subheader("Private Leagues")
+        with st.form("create_league"):
+            new_league = st.text_input("League name (letters, digits, - and _)")
+            if st.form_submit_button("Create League"):
+                success, message = create_league(new_league.strip())
+                if success:
+                    st.success(f"{message}. Share the link ending in `?league={new_league.strip()}`.")
+                else:
+                    st.error(message)
 
     show_manage_matches()
 
 elif page == "Make Prediction":
+    # Widget changes below rerun only this fragment instead of the whole page
+    @st.fragment
+    def prediction_form(match_id, match, current_user):
+        # Move these selections outside the form
+        winner = st.selectbox("Predict Winner:", ["-Select Winner-", match['team1'], match['team2']], key="winner_select")
+        
+        # Search both squads by name, initials or nickname instead of scrolling full rosters
+        teams = [match['team1'], match['team2']]
+        selected_top_scorer = player_picker("Predict Highest Run-scorer:", "-Select Top Scorer-", teams, "scorer_select")
+        selected_top_wicket_taker = player_picker("Predict Highest Wicket-taker:", "-Select Top Wicket Taker-", teams, "wicket_select")
+        
+        # Show existing prediction if any
+        existing_prediction = get_prediction_queue(league).get_prediction(match_id, current_user)
+        if existing_prediction:
+            st.info(f"Your current prediction: Winner - {existing_prediction['winner']}, "
+                   f"Top Scorer - {existing_prediction['top_scorer']}, "
+                   f"Top Wicket Taker - {existing_prediction['top_wicket_taker']}")
+        
+        # Put only the submit button in the form
+        with st.form("make_prediction"):
+            submitted = st.form_submit_button("Submit Prediction")
+            if submitted:
+                if winner == "-Select Winner-" or selected_top_scorer == "" or selected_top_wicket_taker == "":
+                    st.error("Please make all selections before submitting.")
+                else:
+                    prediction = {
+                        'winner': winner,
+                        'top_scorer': selected_top_scorer,
+                        'top_wicket_taker': selected_top_wicket_taker
+                    }
+                    success, message = get_prediction_queue(league).submit(match_id, current_user, prediction)
+                    if success:
+                        st.success(message)
+                    else:
+                        st.error(f"Failed to submit prediction. {message}")
+    
     @login_required()
     def show_make_prediction():
         st.header("Make Your Prediction")
@@ -356,6 +440,8 @@ elif page == "Make Prediction":
             st.warning("Please join the game first!")
             return
         
+        show_crowd_accuracy()
+        
         # Show available matches
         matches_df = st.session_state.game_data.get_matches_list()
         scheduled_matches = matches_df[matches_df['Status'] == 'Scheduled']
@@ -371,28 +457,12 @@ elif page == "Make Prediction":
         match_id = st.selectbox("Select Match", scheduled_matches['Match ID'].tolist())
         match = st.session_state.game_data.get_match(match_id)
         if match:
-            team1_logo = get_image_base64(IPL_TEAMS_INFO[match['team1']]['logo'])
-            team2_logo = get_image_base64(IPL_TEAMS_INFO[match['team2']]['logo'])
-            st.markdown(f"""
-            <div class="match-card">
-                <div style="display: flex; align-items: center; justify-content: center;">
-                    <div style="text-align: center;">
-                        <img src="data:image/png;base64,{team1_logo}" class="team-logo" />
-                        <h4>{match['team1']}</h4>
-                    </div>
-                    <span class="vs-text">VS</span>
-                    <div style="text-align: center;">
-                        <img src="data:image/png;base64,{team2_logo}" class="team-logo" />
-                        <h4>{match['team2']}</h4>
-                    </div>
-                </div>
-                <p style="text-align: center;">Match Date: {match['date']} {match.get('time', '')} IST</p>
-                <p style="text-align: center; color: red;">Predictions close at: {match['prediction_cutoff']} IST</p>
-            </div>
-            """, unsafe_allow_html=True)
+            season_data = st.session_state.game_data.season_data
+            st.markdown(match_card_html(season_data.season, match_id, season_data.matches_token), unsafe_allow_html=True)
+            show_crowd_consensus(match_id, match)
         
         # Show existing prediction if any
-        existing_prediction = st.session_state.game_data.get_user_prediction(match_id, current_user)
+        existing_prediction = get_prediction_queue(league).get_prediction(match_id, current_user)
         if existing_prediction:
             st.warning(f"""
             ⚠️ You have already made a prediction for this match:
@@ -404,80 +474,48 @@ elif page == "Make Prediction":
             """)
             return  # Exit the function early if prediction exists
         
-        # Move these selections outside the form
-        winner = st.selectbox("Predict Winner:", ["-Select Winner-", match['team1'], match['team2']], key="winner_select")
-        
-        # Add team selection for player lists
-        selected_team = st.selectbox("Select Team for Players:", ["-Select Team-", match['team1'], match['team2']], key="team_select")
-        
-        # Initialize variables for player options
-        top_scorer_options = ["-Select Top Scorer-"]
-        top_wicket_options = ["-Select Top Wicket Taker-"]
-        
-        if selected_team != "-Select Team-":
-            # Load team_players.json directly
-            with open('data/team_players.json', 'r') as f:
-                team_players_data = json.load(f)
-            
-            # Get players for selected team
-            team_data = team_players_data.get(selected_team, {})
-            
-            # Add all players with their roles to both dropdowns
-            # Add batsmen
-            batsmen = team_data.get('batsmen', [])
-            for player in batsmen:
-                player_with_role = f"{player} (Batsman) - {selected_team}"
-                top_scorer_options.append(player_with_role)
-                top_wicket_options.append(player_with_role)
-            
-            # Add bowlers
-            bowlers = team_data.get('bowlers', [])
-            for player in bowlers:
-                player_with_role = f"{player} (Bowler) - {selected_team}"
-                top_scorer_options.append(player_with_role)
-                top_wicket_options.append(player_with_role)
-            
-            # Add all-rounders
-            all_rounders = team_data.get('all_rounders', [])
-            for player in all_rounders:
-                player_with_role = f"{player} (All-rounder) - {selected_team}"
-                top_scorer_options.append(player_with_role)
-                top_wicket_options.append(player_with_role)
-        
-        top_scorer = st.selectbox("Predict Highest Run-scorer:", top_scorer_options, key="scorer_select")
-        top_wicket_taker = st.selectbox("Predict Highest Wicket-taker:", top_wicket_options, key="wicket_select")
-        
-        # Extract just the player name without role and team
-        selected_top_scorer = top_scorer.split(" (")[0] if top_scorer != "-Select Top Scorer-" else ""
-        selected_top_wicket_taker = top_wicket_taker.split(" (")[0] if top_wicket_taker != "-Select Top Wicket Taker-" else ""
-        
-        # Show existing prediction if any
-        existing_prediction = st.session_state.game_data.get_user_prediction(match_id, current_user)
-        if existing_prediction:
-            st.info(f"Your current prediction: Winner - {existing_prediction['winner']}, "
-                   f"Top Scorer - {existing_prediction['top_scorer']}, "
-                   f"Top Wicket Taker - {existing_prediction['top_wicket_taker']}")
-        
-        # Put only the submit button in the form
-        with st.form("make_prediction"):
-            submitted = st.form_submit_button("Submit Prediction")
-            if submitted:
-                if winner == "-Select Winner-" or selected_top_scorer == "" or selected_top_wicket_taker == "":
-                    st.error("Please make all selections before submitting.")
-                else:
-                    prediction = {
-                        'winner': winner,
-                        'top_scorer': selected_top_scorer,
-                        'top_wicket_taker': selected_top_wicket_taker
-                    }
-                    if st.session_state.game_data.add_prediction(match_id, current_user, prediction):
-                        st.success("Prediction submitted successfully!")
-                    else:
-                        st.error("Failed to submit prediction. Match might be in progress or completed.")
+        prediction_form(match_id, match, current_user)
     
     show_make_prediction()
 
 elif page == "Enter Results":
+    def show_correct_result():
+        """Replace a wrongly entered result, taking back the points it gave"""
+        game_data = st.session_state.game_data
+        scored = [match_id for match_id in game_data.season_data.get_schedule_order()
+                  if game_data.matches[match_id].get('result')]
+        if not scored:
+            return
+        st.subheader("Correct a Result")
+        match_id = st.selectbox("Select Scored Match", scored, key="correct_match_select")
+        match = game_data.get_match(match_id)
+        current = match['result']
+        st.write(f"**{match['team1']} vs {match['team2']}**: entered winner {current['winner']}, "
+                 f"top scorer {current['top_scorer']}, top wicket taker {current['top_wicket_taker']}")
+        teams = [match['team1'], match['team2']]
+        winner = st.selectbox("Correct Winner:", teams, index=teams.index(current['winner']), key="correct_winner")
+        top_scorer = player_picker("Correct Run-scorer:", "-Select Top Scorer-", teams, "correct_scorer_select")
+        top_wicket_taker = player_picker("Correct Wicket-taker:", "-Select Top Wicket Taker-", teams,
+                                         "correct_wicket_select")
+        with st.form("correct_result"):
+            submitted = st.form_submit_button("Correct Result")
+            if submitted and not all([winner, top_scorer, top_wicket_taker]):
+                st.error("Please make all selections before submitting.")
+            elif submitted:
+                get_snapshot_manager(league).take_snapshot()
+                success, message = game_data.correct_result(match_id, {
+                    'winner': winner,
+                    'top_scorer': top_scorer,
+                    'top_wicket_taker': top_wicket_taker
+                })
+                if success:
+                    # The other loaded leagues rescore the match too
+                    for partition in get_loaded_partitions(game_data.season):
+                        partition.sync_results()
+                    st.success(message)
+                else:
+                    st.error(message)
+    
     @login_required(role="admin")
     def show_enter_results():
         st.header("Enter Match Results")
@@ -488,65 +526,165 @@ elif page == "Enter Results":
         
         if scheduled_matches.empty:
             st.info("No scheduled matches available to enter results.")
+            show_correct_result()
             return
         
         st.subheader("Available Matches")
         st.dataframe(scheduled_matches, use_container_width=True)
         
-        with st.form("enter_results"):
-            match_id = st.selectbox("Select Match", scheduled_matches['Match ID'].tolist())
+        match_id = st.selectbox("Select Match", scheduled_matches['Match ID'].tolist())
+        
+        # Show match details
+        match = st.session_state.game_data.get_match(match_id)
+        if match:
+            st.write(f"**{match['team1']} vs {match['team2']}** on {match['date']}")
+            if st.session_state.game_data.is_match_locked(match_id):
+                st.caption("Predictions are locked and ready to score.")
+            winner = st.selectbox("Match Winner:", [match['team1'], match['team2']])
             
-            # Show match details
-            match = st.session_state.game_data.get_match(match_id)
-            if match:
-                st.write(f"**{match['team1']} vs {match['team2']}** on {match['date']}")
-                winner = st.selectbox("Match Winner:", [match['team1'], match['team2']])
-                
-                # Get players for both teams
-                team1_players = st.session_state.game_data.get_team_players(match['team1'])
-                team2_players = st.session_state.game_data.get_team_players(match['team2'])
-                
-                # Combine all players for top scorer selection
-                all_batsmen = (
-                    [(p, match['team1']) for p in team1_players['batsmen']] +
-                    [(p, match['team1']) for p in team1_players['all_rounders']] +
-                    [(p, match['team2']) for p in team2_players['batsmen']] +
-                    [(p, match['team2']) for p in team2_players['all_rounders']]
-                )
-                
-                # Combine all players for top wicket taker selection
-                all_bowlers = (
-                    [(p, match['team1']) for p in team1_players['bowlers']] +
-                    [(p, match['team1']) for p in team1_players['all_rounders']] +
-                    [(p, match['team2']) for p in team2_players['bowlers']] +
-                    [(p, match['team2']) for p in team2_players['all_rounders']]
-                )
-                
-                # Create formatted options for selectbox
-                top_scorer_options = [f"{player} ({team})" for player, team in all_batsmen]
-                top_wicket_options = [f"{player} ({team})" for player, team in all_bowlers]
-                
-                top_scorer = st.selectbox("Highest Run-scorer:", top_scorer_options)
-                top_wicket_taker = st.selectbox("Highest Wicket-taker:", top_wicket_options)
-                
-                # Extract just the player name without team
-                top_scorer = top_scorer.split(" (")[0] if top_scorer else ""
-                top_wicket_taker = top_wicket_taker.split(" (")[0] if top_wicket_taker else ""
-                
+            # Search both squads instead of listing every batsman and bowler
+            teams = [match['team1'], match['team2']]
+            top_scorer = player_picker("Highest Run-scorer:", "-Select Top Scorer-", teams, "result_scorer_select")
+            top_wicket_taker = player_picker("Highest Wicket-taker:", "-Select Top Wicket Taker-", teams, "result_wicket_select")
+            
+            with st.form("enter_results"):
                 submitted = st.form_submit_button("Submit Results")
-                if submitted and all([winner, top_scorer, top_wicket_taker]):
+                if submitted and not all([winner, top_scorer, top_wicket_taker]):
+                    st.error("Please make all selections before submitting.")
+                elif submitted:
                     result = {
                         'winner': winner,
                         'top_scorer': top_scorer,
                         'top_wicket_taker': top_wicket_taker
                     }
+                    # Commit queued predictions so every acknowledged one is scored
+                    get_prediction_queue(league).flush()
+                    # Snapshot first; a wrongly entered result is fixed below with Correct a Result
+                    get_snapshot_manager(league).take_snapshot()
                     if st.session_state.game_data.calculate_points(match_id, result):
+                        # Results are shared by the season, score them in the other loaded leagues too
+                        for partition in get_loaded_partitions(st.session_state.game_data.season):
+                            partition.sync_results()
                         st.success("Results submitted and points calculated!")
                     else:
                         st.error("Failed to submit results. Match might already be completed.")
+        
+        show_correct_result()
     
     show_enter_results()
 
+elif page == "Bulk Update":
+    def bulk_inputs(schedule_df, results_df, existing: dict):
+        """(matches, results, problems) from the edited tables, keyed by match ID; unchanged rows are left out"""
+        matches, results, problems = {}, {}, []
+        defaults = {'venue': '', 'is_playoff': False}
+        for row in schedule_df.to_dict('records'):
+            match_id = str(row['Match ID'] or '').strip()
+            if not match_id:
+                continue
+            try:
+                record = make_match(row['Team 1'], row['Team 2'], row['Date'].strftime("%Y-%m-%d"),
+                                    row['Time'].strftime("%H:%M"), row['Venue'] or '', bool(row['Playoff']))
+            except (AttributeError, TypeError, ValueError):
+                problems.append(f"match {match_id!r} needs teams, a date and a time")
+                continue
+            # Sending only edited rows keeps this table from overwriting another admin's changes
+            if match_id in existing and all(existing[match_id].get(field, defaults.get(field)) == value
+                                            for field, value in record.items()):
+                continue
+            matches[match_id] = record
+        for row in results_df.to_dict('records'):
+            if row['Winner']:
+                results[row['Match ID']] = {
+                    'winner': row['Winner'],
+                    'top_scorer': (row['Top Scorer'] or '').strip(),
+                    'top_wicket_taker': (row['Top Wicket Taker'] or '').strip()
+                }
+        return matches, results, problems
+    
+    @login_required(role="admin")
+    def show_bulk_update():
+        st.header("Bulk Update")
+        st.write("Edit or add several matches and enter several results, then apply them together: "
+                 "every result is scored in one batch and everything is saved once.")
+        game_data = st.session_state.game_data
+        unscored = [match_id for match_id in game_data.season_data.get_schedule_order()
+                    if match_id not in game_data.scored_matches]
+        
+        st.subheader("Schedule")
+        schedule_df = pd.DataFrame([{
+            'Match ID': match_id,
+            'Team 1': game_data.matches[match_id]['team1'],
+            'Team 2': game_data.matches[match_id]['team2'],
+            'Date': datetime.strptime(game_data.matches[match_id]['date'], "%Y-%m-%d").date(),
+            'Time': datetime.strptime(game_data.matches[match_id].get('time') or "00:00", "%H:%M").time(),
+            'Venue': game_data.matches[match_id].get('venue', ''),
+            'Playoff': bool(game_data.matches[match_id].get('is_playoff', False))
+        } for match_id in unscored], columns=['Match ID', 'Team 1', 'Team 2', 'Date', 'Time', 'Venue', 'Playoff'])
+        edited_schedule = st.data_editor(schedule_df, num_rows="dynamic", hide_index=True, use_container_width=True,
+                                         key="bulk_schedule", column_config={
+                                             'Team 1': st.column_config.SelectboxColumn(options=IPL_TEAMS),
+                                             'Team 2': st.column_config.SelectboxColumn(options=IPL_TEAMS),
+                                             'Date': st.column_config.DateColumn(format="YYYY-MM-DD"),
+                                             'Time': st.column_config.TimeColumn("Time (IST)", format="HH:mm")
+                                         })
+        
+        st.subheader("Results")
+        # Only matches whose predictions are closed can be scored
+        results_df = pd.DataFrame([{
+            'Match ID': match_id,
+            'Match': f"{game_data.matches[match_id]['team1']} vs {game_data.matches[match_id]['team2']}",
+            'Winner': None,
+            'Top Scorer': '',
+            'Top Wicket Taker': ''
+        } for match_id in unscored if not game_data.is_prediction_open(match_id)],
+            columns=['Match ID', 'Match', 'Winner', 'Top Scorer', 'Top Wicket Taker'])
+        edited_results = st.data_editor(results_df, hide_index=True, use_container_width=True, key="bulk_results",
+                                        disabled=['Match ID', 'Match'], column_config={
+                                            'Winner': st.column_config.SelectboxColumn(options=IPL_TEAMS)
+                                        })
+        
+        matches, results, problems = bulk_inputs(edited_schedule, edited_results, game_data.matches)
+        col1, col2 = st.columns(2)
+        with col1:
+            preview = st.button("Preview point changes")
+        with col2:
+            apply = st.button("Apply all", type="primary")
+        if not (preview or apply):
+            return
+        problems += game_data.check_bulk(matches, results)
+        if problems:
+            for problem in problems:
+                st.error(problem)
+            return
+        
+        if preview:
+            changes = game_data.preview_bulk(matches, results)
+            st.write(f"{len(results)} results would change the points of {len(changes)} players.")
+            if changes:
+                st.dataframe(pd.DataFrame(changes[:500]).rename(columns={
+                    'username': 'Username', 'team': 'Team', 'points': 'Points', 'gained': 'Gained',
+                    'new_points': 'New Points', 'rank': 'Rank', 'new_rank': 'New Rank'
+                }), hide_index=True, use_container_width=True)
+            return
+        
+        # Commit queued predictions so every acknowledged one is scored
+        get_prediction_queue(league).flush()
+        # Snapshot first so a wrong batch of predictions or players can be rolled back; results
+        # belong to the season and are fixed on Enter Results with Correct a Result
+        get_snapshot_manager(league).take_snapshot()
+        success, message = game_data.apply_bulk(matches, results)
+        if not success:
+            st.error(message)
+            return
+        if results:
+            # Results are shared by the season, score them in the other loaded leagues too
+            for partition in get_loaded_partitions(game_data.season):
+                partition.sync_results()
+        st.success(message)
+    
+    show_bulk_update()
+
 elif page == "Join Game":
     @login_required()
     def show_join_game():
@@ -558,14 +696,7 @@ elif page == "Join Game":
             current_team = player_data['team']
             
             # Show current team info with logo
-            current_team_logo = get_image_base64(IPL_TEAMS_INFO[current_team]['logo'])
-            st.markdown(f"""
-            <div class="team-card" style="border-color: {IPL_TEAMS_INFO[current_team]['primary_color']}">
-                <h3>Your Current Team</h3>
-                <img src="data:image/png;base64,{current_team_logo}" class="team-logo" />
-                <h4>{current_team}</h4>
-            </div>
-            """, unsafe_allow_html=True)
+            st.markdown(team_card_html(current_team, "Your Current Team"), unsafe_allow_html=True)
             
             if player_data.get('has_switched_team', False):
                 original_team = player_data.get('original_team', '')
@@ -656,51 +787,130 @@ elif page == "Join Game":
 
 elif page == "Leaderboard":
     st.header("Leaderboard")
+    # Logos are embedded once here and referenced by class from every row below
+    st.markdown(logo_css(), unsafe_allow_html=True)
     
     # First show Team Statistics
     st.subheader("Team Statistics")
     team_stats = st.session_state.game_data.get_team_stats()
     # Add team logos to team statistics
     team_stats['Team'] = team_stats['Team'].apply(
-        lambda x: f'<div style="display: flex; align-items: center;">{display_team_logo(x)}</div>'
+        lambda x: f'<div style="display: flex; align-items: center;">{team_logo_label(x)}</div>'
     )
     st.markdown(team_stats.to_html(escape=False, index=False), unsafe_allow_html=True)
     
     # Add a separator
     st.markdown("---")
     
-    # Then show Player Leaderboard
+    # Then show Player Leaderboard, one page at a time
     st.subheader("Player Leaderboard")
-    leaderboard = st.session_state.game_data.get_leaderboard()
+    col1, col2, col3 = st.columns([2, 2, 1])
+    with col1:
+        search = st.text_input("Search players", placeholder="Username")
+    with col2:
+        team_filter = st.selectbox("Filter by team", ["All Teams"] + IPL_TEAMS)
+    with col3:
+        page_size = st.selectbox("Rows per page", [25, 50, 100], index=1)
+    team_filter = None if team_filter == "All Teams" else team_filter
     
-    # Add team logos to leaderboard
-    if not leaderboard.empty:
-        leaderboard['Team'] = leaderboard['Team'].apply(
-            lambda x: f'<div style="display: flex; align-items: center;">{display_team_logo(x)}</div>'
-        )
-        st.markdown(leaderboard.to_html(escape=False, index=False), unsafe_allow_html=True)
+    total_matching = len(st.session_state.game_data.search_leaderboard(search, team_filter))
+    page_count = max((total_matching + page_size - 1) // page_size, 1)
+    # Keep the page within range when the filter shrinks the result set
+    if st.session_state.get('leaderboard_page', 1) > page_count:
+        st.session_state.leaderboard_page = page_count
+    page_number = st.number_input("Page", min_value=1, max_value=page_count, step=1, key="leaderboard_page")
     
-    # Create visualization with team colors
-    if not leaderboard.empty:
-        # Create a copy of the dataframe for plotting
-        plot_df = leaderboard.copy()
-        # Extract team names from HTML content
-        plot_df['Team'] = plot_df['Team'].apply(lambda x: x.split('</div>')[0].split('>')[-1])
-        
-        fig = px.bar(
-            plot_df,
-            x='Username',
-            y='Points',
-            color='Team',
-            title='Player Points Distribution',
-            labels={'Points': 'Total Points', 'Username': 'Player'},
-            hover_data=['Perfect Predictions', 'Loyalty Bonuses'],
-            color_discrete_map={
-                team: IPL_TEAMS_INFO[team]['primary_color']
-                for team in IPL_TEAMS
-            }
-        )
-        st.plotly_chart(fig, use_container_width=True)
+    leaderboard_page = st.session_state.game_data.get_leaderboard_page(page_number, page_size, search, team_filter)
+    rank_changes = st.session_state.game_data.get_rank_changes()
+    if leaderboard_page['entries']:
+        rows = [{
+            'Rank': entry['rank'],
+            'Change': format_rank_change(rank_changes.get(entry['username'])),
+            'Username': html.escape(entry['username']),
+            'Team': f'<div style="display: flex; align-items: center;">{team_logo_label(entry["team"])}</div>',
+            'Points': entry['points'],
+            'Perfect Predictions': entry['perfect_predictions'],
+            'Loyalty Bonuses': entry['loyalty_bonus_count']
+        } for entry in leaderboard_page['entries']]
+        st.markdown(pd.DataFrame(rows).to_html(escape=False, index=False), unsafe_allow_html=True)
+        first_row = (page_number - 1) * page_size + 1
+        st.caption(f"Showing {first_row}-{first_row + len(rows) - 1} of {total_matching} players")
+    elif search or team_filter:
+        st.info("No players match your search.")
+    
+    # Charts come from the raw leaderboard index, as specs cached until the points change
+    leaderboard_entries = st.session_state.game_data.get_leaderboard_index()
+    if leaderboard_entries:
+        for figure in get_leaderboard_figures(st.session_state.game_data):
+            st.plotly_chart(figure, use_container_width=True)
+
+    # Chances of finishing on top, simulated over the matches still to play
+    if leaderboard_entries:
+        st.subheader("Title Odds")
+        odds_top_n = st.selectbox("Chance of finishing in the top", [3, 5, 10], key="title_odds_top_n")
+        with st.spinner("Simulating the rest of the season..."):
+            title_odds = st.session_state.game_data.get_title_odds(
+                TITLE_ODDS_SIMULATIONS, odds_top_n, TITLE_ODDS_WORKERS, max_age_seconds=300)
+        if title_odds['remaining_matches']:
+            odds_rows = [{
+                'Player': entry['username'],
+                'Points': entry['points'],
+                'Title': f"{entry['win']:.1%}",
+                f'Top {odds_top_n}': f"{entry['top_n']:.1%}",
+                'Projected Points': round(entry['expected_points'])
+            } for entry in title_odds['odds'][:10]]
+            st.dataframe(pd.DataFrame(odds_rows), hide_index=True, use_container_width=True)
+            
+            position = title_odds['ranks'].get(st.session_state.get('username'))
+            if position is not None:
+                my_odds = title_odds['odds'][position]
+                if my_odds['top_n'] > 0:
+                    st.write(f"Your chances: **{my_odds['win']:.1%}** to win the league, "
+                             f"**{my_odds['top_n']:.1%}** to finish in the top {odds_top_n}.")
+                else:
+                    st.write(f"None of the simulated seasons put you in the top {odds_top_n}, but every match still counts!")
+            st.caption(f"{title_odds['simulations']} simulations of the {title_odds['remaining_matches']} "
+                       "remaining matches, based on each player's prediction record so far.")
+        else:
+            st.info("No matches left to play this season.")
+    
+    # Rank over time, read straight from the stored rank series
+    if leaderboard_entries:
+        st.subheader("Rank History")
+        default_player = st.session_state.get('username', '')
+        history_player = st.text_input("Show rank history for", value=default_player, placeholder="Username")
+        history = st.session_state.game_data.get_rank_history(history_player) if history_player else []
+        if history:
+            history_df = pd.DataFrame(history, columns=['Match', 'Rank'])
+            history_fig = px.line(history_df, x='Match', y='Rank', markers=True,
+                                  title=f"{history_player}'s rank after each match")
+            history_fig.update_yaxes(autorange='reversed')  # Rank 1 at the top
+            st.plotly_chart(history_fig, use_container_width=True)
+        elif history_player:
+            st.info("No rank history yet for this player.")
+    
+    # Past seasons are read from their memory-mapped archives, not the season JSON
+    archived_seasons = list_archived_seasons(league)
+    if archived_seasons:
+        with st.expander(f"All-time leaderboard ({', '.join(archived_seasons)})"):
+            archives = [GameData.open_archive(league, season) for season in archived_seasons]
+            st.dataframe(all_time_leaderboard(archives).head(100), hide_index=True, use_container_width=True)
+            
+            st.write("Head-to-head")
+            col1, col2 = st.columns(2)
+            with col1:
+                player_a = st.text_input("Player A")
+            with col2:
+                player_b = st.text_input("Player B")
+            if player_a and player_b:
+                summary = head_to_head(archives, player_a, player_b)
+                if summary['matches']:
+                    st.write(f"Over {summary['matches']} matches both predicted: "
+                             f"**{player_a}** won {summary['wins_a']} ({summary['points_a']} pts), "
+                             f"**{player_b}** won {summary['wins_b']} ({summary['points_b']} pts), "
+                             f"{summary['ties']} tied.")
+                else:
+                    st.info("These players have no archived matches in common.")
 
 # Footer
 st.markdown("---")
@@ -0,0 +1,216 @@
+"""Fixed-size columnar archives of scored seasons, memory-mapped for read-only queries.
+
+An archive is a directory of NumPy ``.npy`` arrays:
+    users.npy     usernames, one row per player
+    teams.npy     each player's team at export time
+    matches.npy   scored match IDs in schedule order
+    playoff.npy   whether each match was a playoff
+    points.npy    int16 points per player per match
+    hits.npy      uint8 hit flags per player per match (see data.HIT_FLAGS, plus PREDICTED)
+
+With IPL_STORAGE_COMPRESSION set the arrays are written compressed (see
+compression.py); such archives are read into memory instead of memory-mapped.
+
+Usage:
+    python archive.py export --league default --season 2025
+    python archive.py leaderboard --league default --seasons 2024 2025
+    python archive.py head-to-head alice bob --league default --seasons 2024 2025
+"""
+import argparse
+import io
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from compression import is_compressed, open_binary_writer, read_bytes
+
+ARCHIVE_FORMAT_VERSION = 1
+PREDICTED = 32  # Hit flag marking that a player predicted the match at all
+PERFECT = 16
+LOYALTY = 8
+
+
+def write_season_archive(archive_dir: str, usernames: list, teams: list, match_ids: list,
+                         is_playoff: list, points, hits, meta: dict):
+    """Write the arrays of a season archive, replacing any previous export"""
+    os.makedirs(archive_dir, exist_ok=True)
+    arrays = {
+        'users': np.array(usernames, dtype=str),
+        'teams': np.array(teams, dtype=str),
+        'matches': np.array(match_ids, dtype=str),
+        'playoff': np.array(is_playoff, dtype=bool),
+        'points': np.asarray(points, dtype=np.int16),
+        'hits': np.asarray(hits, dtype=np.uint8)
+    }
+    for name, array in arrays.items():
+        # Fixed-width dtypes only, so every file can be memory-mapped without pickling;
+        # trained dictionaries are for JSON, so arrays are compressed without one
+        with open_binary_writer(os.path.join(archive_dir, f"{name}.npy"), use_dictionary=False) as f:
+            np.save(f, array, allow_pickle=False)
+
+    meta = {**meta, 'format_version': ARCHIVE_FORMAT_VERSION, 'exported_at': datetime.now().isoformat()}
+    with open(os.path.join(archive_dir, "meta.json"), 'w') as f:
+        json.dump(meta, f, indent=4)
+
+
+class SeasonArchive:
+    """Read-only view of an archived season, memory-mapped instead of parsing JSON.
+
+    Offers the same leaderboard reads as GameData (get_leaderboard_index,
+    get_leaderboard_page, search_leaderboard, get_user_rank) so pages and the
+    API can serve an archived season unchanged.
+    """
+
+    read_only = True
+
+    def __init__(self, archive_dir: str):
+        self.archive_dir = archive_dir
+        with open(os.path.join(archive_dir, "meta.json"), 'r') as f:
+            self.meta = json.load(f)
+        if self.meta.get('format_version') != ARCHIVE_FORMAT_VERSION:
+            raise ValueError(f"Unsupported archive format in {archive_dir}")
+
+        self.league = self.meta.get('league')
+        self.season = self.meta.get('season')
+        self.users = self._load('users')
+        self.teams = self._load('teams')
+        self.match_ids = self._load('matches')
+        self.is_playoff = self._load('playoff')
+        self.points = self._load('points')
+        self.hits = self._load('hits')
+        self._index = None
+        self._positions = None
+
+    def _load(self, name: str):
+        path = os.path.join(self.archive_dir, f"{name}.npy")
+        if is_compressed(path):
+            return np.load(io.BytesIO(read_bytes(path)), allow_pickle=False)
+        return np.load(path, mmap_mode='r', allow_pickle=False)
+
+    def totals(self):
+        """Season points per player"""
+        return self.points.sum(axis=1, dtype=np.int64)
+
+    def perfect_counts(self):
+        return ((self.hits & PERFECT) > 0).sum(axis=1)
+
+    def loyalty_counts(self):
+        return ((self.hits & LOYALTY) > 0).sum(axis=1)
+
+    def ranks(self):
+        """Competition ranks (ties share a rank) in player order"""
+        totals = self.totals()
+        descending = np.sort(totals)[::-1]
+        return np.searchsorted(-descending, -totals, side='left') + 1
+
+    def get_leaderboard_index(self) -> list:
+        """Get leaderboard entries ordered by points"""
+        if self._index is None:
+            totals, ranks = self.totals(), self.ranks()
+            perfect, loyalty = self.perfect_counts(), self.loyalty_counts()
+            order = np.lexsort((self.users, -totals))
+            self._index = [{
+                'rank': int(ranks[i]),
+                'username': str(self.users[i]),
+                'team': str(self.teams[i]),
+                'points': int(totals[i]),
+                'perfect_predictions': int(perfect[i]),
+                'loyalty_bonus_count': int(loyalty[i])
+            } for i in order]
+            self._positions = {entry['username']: position for position, entry in enumerate(self._index)}
+        return self._index
+
+    def search_leaderboard(self, search: str = "", team: str = None) -> list:
+        """Filter leaderboard entries by username substring and/or team, keeping rank order"""
+        search = search.strip().lower()
+        return [
+            entry for entry in self.get_leaderboard_index()
+            if (not team or entry['team'] == team) and (not search or search in entry['username'].lower())
+        ]
+
+    def get_leaderboard_page(self, page: int = 1, page_size: int = 50, search: str = "", team: str = None) -> dict:
+        """Get one page of the leaderboard"""
+        entries = self.search_leaderboard(search, team)
+        page = max(page, 1)
+        start = (page - 1) * page_size
+        return {'page': page, 'page_size': page_size, 'total': len(entries), 'entries': entries[start:start + page_size]}
+
+    def get_user_rank(self, username: str) -> dict:
+        """Get a player's leaderboard entry including rank"""
+        entries = self.get_leaderboard_index()
+        position = self._positions.get(username)
+        if position is None:
+            return {}
+        return {**entries[position], 'total_players': len(entries)}
+
+    def user_row(self, username: str):
+        """Row of a player in the arrays, or None"""
+        rows = np.flatnonzero(self.users == username)
+        return int(rows[0]) if len(rows) else None
+
+
+def all_time_leaderboard(archives: list) -> pd.DataFrame:
+    """Combine season totals across archives into one ranked table"""
+    if not archives:
+        return pd.DataFrame(columns=['Username', 'Seasons', 'Points', 'Perfect Predictions'])
+
+    frame = pd.DataFrame({
+        'Username': np.concatenate([archive.users for archive in archives]),
+        'Points': np.concatenate([archive.totals() for archive in archives]),
+        'Perfect Predictions': np.concatenate([archive.perfect_counts() for archive in archives]),
+        'Seasons': 1
+    })
+    totals = frame.groupby('Username', as_index=False)[['Seasons', 'Points', 'Perfect Predictions']].sum()
+    return totals.sort_values(['Points', 'Username'], ascending=[False, True]).reset_index(drop=True)
+
+
+def head_to_head(archives: list, user_a: str, user_b: str) -> dict:
+    """Compare two players over every match both predicted in the given seasons"""
+    summary = {'matches': 0, 'wins_a': 0, 'wins_b': 0, 'ties': 0, 'points_a': 0, 'points_b': 0}
+    for archive in archives:
+        row_a, row_b = archive.user_row(user_a), archive.user_row(user_b)
+        if row_a is None or row_b is None:
+            continue
+        both = ((archive.hits[row_a] & PREDICTED) > 0) & ((archive.hits[row_b] & PREDICTED) > 0)
+        points_a = np.asarray(archive.points[row_a])[both].astype(np.int64)
+        points_b = np.asarray(archive.points[row_b])[both].astype(np.int64)
+        summary['matches'] += int(both.sum())
+        summary['wins_a'] += int((points_a > points_b).sum())
+        summary['wins_b'] += int((points_b > points_a).sum())
+        summary['ties'] += int((points_a == points_b).sum())
+        summary['points_a'] += int(points_a.sum())
+        summary['points_b'] += int(points_b.sum())
+    return summary
+
+
+if __name__ == "__main__":
+    from data import DEFAULT_LEAGUE, DEFAULT_SEASON, GameData, list_archived_seasons
+
+    parser = argparse.ArgumentParser(description="Export and query season archives")
+    parser.add_argument("command", choices=["export", "leaderboard", "head-to-head"])
+    parser.add_argument("players", nargs="*", help="two usernames for head-to-head")
+    parser.add_argument("--league", default=DEFAULT_LEAGUE)
+    parser.add_argument("--season", default=DEFAULT_SEASON, help="season to export")
+    parser.add_argument("--seasons", nargs="*", help="seasons to query, defaults to every archived season")
+    parser.add_argument("--top", type=int, default=20)
+    args = parser.parse_args()
+
+    if args.command == "export":
+        path = GameData(args.league, args.season).export_archive()
+        print(f"Archive written to {path}")
+    else:
+        seasons = args.seasons or list_archived_seasons(args.league)
+        archives = [GameData.open_archive(args.league, season) for season in seasons]
+        if args.command == "leaderboard":
+            print(all_time_leaderboard(archives).head(args.top).to_string(index=False))
+        else:
+            if len(args.players) != 2:
+                parser.error("head-to-head needs two usernames")
+            user_a, user_b = args.players
+            summary = head_to_head(archives, user_a, user_b)
+            print(f"{summary['matches']} matches: {user_a} won {summary['wins_a']} "
+                  f"({summary['points_a']} pts), {user_b} won {summary['wins_b']} "
+                  f"({summary['points_b']} pts), {summary['ties']} tied")
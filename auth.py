@@ -1,19 +1,32 @@
 import streamlit as st
 import json
 import os
+import threading
 import bcrypt
+import hashlib
+import time
 from datetime import datetime, timedelta
 from jose import jwt
 from typing import Optional
+import metrics
+from cache import get_cache
 
 # Constants
 SECRET_KEY = "your-secret-key-here"  # In production, use environment variable
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 30
+TOKEN_CACHE_SECONDS = 60  # Decoded tokens are reused for at most this long, never past their expiry
+
+def record_login(username: str, success: bool, reason: str = None):
+    """Count and log a login attempt"""
+    result = 'success' if success else 'failure'
+    metrics.increment('ipl_logins_total', 1, {'result': result}, "Login attempts by outcome")
+    metrics.log_event('login_' + result, username=username, reason=reason)
 
 class AuthManager:
     def __init__(self):
         self.users = {}  # {username: {password_hash: str, role: str}}
+        self.lock = threading.Lock()  # One instance is shared by every session
         self.load_users()
         
         # Create admin user if not exists
@@ -37,24 +50,34 @@ class AuthManager:
         if username in self.users:
             return False
         
-        password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
-        self.users[username] = {
-            "password_hash": password_hash.decode('utf-8'),
-            "role": role
-        }
-        self.save_users()
+        with metrics.Timer() as timer:
+            password_hash = bcrypt.hashpw(password.encode('utf-8'), bcrypt.gensalt())
+        metrics.observe('ipl_bcrypt_seconds', timer.seconds, {'operation': 'hash'}, "Time spent in bcrypt")
+        with self.lock:
+            if username in self.users:
+                return False
+            self.users[username] = {
+                "password_hash": password_hash.decode('utf-8'),
+                "role": role
+            }
+            self.save_users()
         return True
 
     def verify_password(self, username: str, password: str) -> bool:
         """Verify user password"""
         user = self.get_user(username)
         if not user:
+            record_login(username, False, "unknown user")
             return False
         
-        return bcrypt.checkpw(
-            password.encode('utf-8'),
-            user["password_hash"].encode('utf-8')
-        )
+        with metrics.Timer() as timer:
+            valid = bcrypt.checkpw(
+                password.encode('utf-8'),
+                user["password_hash"].encode('utf-8')
+            )
+        metrics.observe('ipl_bcrypt_seconds', timer.seconds, {'operation': 'verify'}, "Time spent in bcrypt")
+        record_login(username, valid, None if valid else "wrong password")
+        return valid
 
     def get_user(self, username: str) -> Optional[dict]:
         """Get user data"""
@@ -71,17 +94,31 @@ class AuthManager:
         return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
 
     def verify_token(self, token: str) -> Optional[dict]:
-        """Verify JWT token"""
+        """Verify JWT token, reusing recently decoded ones"""
+        cache = get_cache()
+        # Keyed by a digest so the cache never holds usable tokens
+        key = cache.key("tokens", hashlib.sha256(token.encode('utf-8')).hexdigest())
+        payload = cache.get(key)
+        if payload is not None and payload.get('exp', 0) > time.time():
+            return payload
         try:
             payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
-            return payload
         except:
             return None
+        ttl = min(TOKEN_CACHE_SECONDS, payload.get('exp', 0) - time.time())
+        if ttl > 0:
+            cache.set(key, payload, ttl)
+        return payload
+
+@st.cache_resource(show_spinner=False)
+def get_auth_manager() -> AuthManager:
+    """Authentication manager shared by every session in this server process"""
+    return AuthManager()
 
 def init_auth():
     """Initialize authentication manager in session state"""
     if 'auth_manager' not in st.session_state:
-        st.session_state.auth_manager = AuthManager()
+        st.session_state.auth_manager = get_auth_manager()
 
 def login_required(role: Optional[str] = None):
     """Decorator for pages that require authentication"""
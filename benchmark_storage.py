@@ -0,0 +1,131 @@
+"""Benchmark of on-disk size and load/save time of the data files under each storage compression.
+
+A league's players, schedule and prediction shards are read once, then written
+to a scratch directory the way GameData.save_data writes them and read back the
+way load_data reads them: as plain JSON, and with each available codec (see
+compression.py) without and with a dictionary trained on the same data. Times
+are the median of --repeat runs.
+
+Example:
+    python load_test_app.py --users 1 --players 20000 --scored-matches 40 --workdir /tmp/ipl-bench
+    IPL_DATA_DIR=/tmp/ipl-bench/data python benchmark_storage.py --output storage.json
+"""
+import argparse
+import json
+import os
+import shutil
+import statistics
+import tempfile
+import time
+from urllib.parse import quote
+
+import compression
+from compression import open_text, training_samples, train_dictionary, write_text
+from stream_loader import iter_jsonl, load_game_file, write_jsonl
+
+
+def read_league(league: str, season: str) -> dict:
+    """Everything save_data writes for a league, as plain structures"""
+    from data import GameData
+
+    game_data = GameData(league, season)
+    return {
+        'game': {
+            'players': game_data.players,
+            'scored_matches': sorted(game_data.scored_matches),
+            'accuracy': game_data.accuracy
+        },
+        'matches': game_data.matches,
+        'shards': {
+            match_id: [{'username': username, 'prediction': prediction}
+                       for username, prediction in game_data.predictions.iter_predictions(match_id)]
+            for match_id in game_data.predictions.match_ids()
+        }
+    }
+
+
+def save_files(directory: str, league_data: dict) -> list:
+    """Write the data files like GameData.save_data, returns their paths"""
+    paths = [os.path.join(directory, "game_data.json"), os.path.join(directory, "matches.json")]
+    write_text(paths[0], json.dumps(league_data['game'], indent=4))
+    write_text(paths[1], json.dumps(league_data['matches'], indent=4))
+    for match_id, records in league_data['shards'].items():
+        paths.append(os.path.join(directory, quote(match_id, safe='') + ".jsonl"))
+        write_jsonl(paths[-1], records)
+    return paths
+
+
+def load_files(paths: list) -> int:
+    """Read the data files like GameData.load_data with every shard loaded, returns the predictions read"""
+    load_game_file(paths[0])
+    with open_text(paths[1]) as f:
+        json.load(f)
+    return sum(len({record['username']: record['prediction'] for _, record in iter_jsonl(path)})
+               for path in paths[2:])
+
+
+def run_format(workdir: str, league_data: dict, codec: str, dictionary: bytes, repeat: int) -> dict:
+    """Size and median save and load times of one storage format"""
+    directory = os.path.join(workdir, codec or "json", "dictionary" if dictionary else "plain")
+    os.makedirs(directory)
+    # The module settings are what save_data and load_data consult on every call
+    compression.COMPRESSION = codec
+    compression.DICTIONARY_DIR = os.path.join(directory, "dictionaries")
+    if dictionary:
+        compression.save_dictionary(codec, dictionary)
+
+    save_seconds, load_seconds = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        paths = save_files(directory, league_data)
+        save_seconds.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        load_files(paths)
+        load_seconds.append(time.perf_counter() - start)
+    return {
+        'bytes': sum(os.path.getsize(path) for path in paths),
+        'save_ms': statistics.median(save_seconds) * 1000,
+        'load_ms': statistics.median(load_seconds) * 1000
+    }
+
+
+def main(args):
+    league_data = read_league(args.league, args.season)
+    predictions = sum(len(records) for records in league_data['shards'].values())
+    print(f"{len(league_data['game']['players'])} players, {len(league_data['matches'])} matches, "
+          f"{predictions} predictions in {len(league_data['shards'])} shards")
+
+    codecs = [codec for codec in compression.CODEC_IDS if codec != 'zstd' or compression.zstandard is not None]
+    if 'zstd' not in codecs:
+        print("zstandard is not installed, skipping zstd (pip install zstandard)")
+
+    workdir = tempfile.mkdtemp(prefix="ipl-storage-")
+    results = {}
+    try:
+        results['json'] = run_format(workdir, league_data, "", None, args.repeat)
+        samples = training_samples(save_files(os.path.join(workdir, "json", "plain"), league_data))
+        for codec in codecs:
+            results[codec] = run_format(workdir, league_data, codec, None, args.repeat)
+            dictionary = train_dictionary(codec, samples)
+            results[f"{codec}+dictionary"] = run_format(workdir, league_data, codec, dictionary, args.repeat)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    plain = results['json']
+    print(f"\n{'format':<18}{'size KB':>10}{'ratio':>8}{'save ms':>10}{'load ms':>10}")
+    for name, result in results.items():
+        print(f"{name:<18}{result['bytes'] / 1024:>10.1f}{plain['bytes'] / result['bytes']:>8.1f}"
+              f"{result['save_ms']:>10.1f}{result['load_ms']:>10.1f}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'players': len(league_data['game']['players']), 'predictions': predictions,
+                       'formats': results}, f, indent=4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare storage size and load/save time of each compression")
+    parser.add_argument("--league", default="default")
+    parser.add_argument("--season", default="2025")
+    parser.add_argument("--repeat", type=int, default=5, help="runs per format, the median is reported")
+    parser.add_argument("--output", help="write results as JSON for comparing runs")
+    main(parser.parse_args())
@@ -0,0 +1,288 @@
+"""Cache for hot, derived results: leaderboard pages, match lists, rendered fragments and decoded tokens.
+
+Two backends share one interface. ``MemoryCache`` keeps entries in this
+process, evicting the least recently used once ``max_entries`` is reached.
+``RedisCache`` stores them on a Redis server (or anything speaking its
+protocol, such as fakeredis in tests) so several nodes share hot results.
+
+Keys are versioned per namespace: ``key(namespace, ...)`` embeds the
+namespace's generation number, which ``bump(namespace)`` increments after every
+write to the underlying data. Entries of older generations are never read
+again and simply age out through their TTL or LRU eviction. With Redis the
+generation lives on the server, so a write on one node invalidates every node.
+
+Values are pickled for Redis. The server must be private to the app: anyone
+able to write to it can make the app unpickle arbitrary data.
+
+Usage:
+    IPL_CACHE_URL=redis://localhost:6379/0 streamlit run app.py
+"""
+import functools
+import os
+import pickle
+import threading
+import time
+from collections import OrderedDict
+
+try:
+    import redis
+except ImportError:  # Only needed for IPL_CACHE_URL
+    redis = None
+
+# A cache server that is down or slow makes lookups miss instead of failing the request
+_BACKEND_ERRORS = (OSError, redis.RedisError) if redis is not None else (OSError,)
+
+import metrics
+
+DEFAULT_TTL = 300  # Seconds; versioned keys make most entries obsolete well before this
+DEFAULT_MAX_ENTRIES = 10000
+KEY_PREFIX = "ipl"
+_MISSING = object()
+
+
+class Cache:
+    """Common interface and bookkeeping of the cache backends"""
+
+    backend = "base"
+
+    def __init__(self, default_ttl: float = DEFAULT_TTL):
+        self.default_ttl = default_ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._stats_lock = threading.Lock()
+
+    def _get(self, key: str):
+        raise NotImplementedError
+
+    def _set(self, key: str, value, ttl: float):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    def generation(self, namespace: str) -> int:
+        """Current generation of a namespace's keys"""
+        raise NotImplementedError
+
+    def bump(self, namespace: str) -> int:
+        """Start a new generation, retiring every key of the namespace"""
+        raise NotImplementedError
+
+    def _record(self, hit: bool):
+        with self._stats_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+        metrics.increment('ipl_cache_requests_total', 1, {'backend': self.backend, 'result': 'hit' if hit else 'miss'},
+                          "Cache lookups by backend and outcome")
+
+    def get(self, key: str, default=None):
+        """Cached value, or default when missing or expired"""
+        value = _MISSING if key is None else self._get(key)
+        self._record(value is not _MISSING)
+        return default if value is _MISSING else value
+
+    def set(self, key: str, value, ttl: float = None):
+        """Store a value for ttl seconds (the default TTL when None)"""
+        if key is not None:
+            self._set(key, value, self.default_ttl if ttl is None else ttl)
+
+    def get_or_set(self, key: str, factory, ttl: float = None):
+        """Cached value, computed by factory() and stored on a miss"""
+        value = _MISSING if key is None else self._get(key)
+        self._record(value is not _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl)
+        return value
+
+    def key(self, namespace: str, *parts) -> str:
+        """Key of the namespace's current generation, None when the generation can't be read"""
+        generation = self.generation(namespace)
+        if generation is None:
+            return None
+        # Strings are quoted so a search containing ':' can't collide with another key's parts
+        parts = [repr(part) if isinstance(part, str) else str(part) for part in parts]
+        return ":".join([KEY_PREFIX, namespace, str(generation)] + parts)
+
+    def stats(self) -> dict:
+        """Hit, miss and eviction counts of this process"""
+        with self._stats_lock:
+            lookups = self.hits + self.misses
+            return {
+                'backend': self.backend,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0
+            }
+
+
+class MemoryCache(Cache):
+    """Size-bounded LRU cache with per-entry TTL, local to this process"""
+
+    backend = "memory"
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES, default_ttl: float = DEFAULT_TTL):
+        super().__init__(default_ttl)
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires at, value), least recently used first
+        self._generations = {}
+
+    def _get(self, key: str):
+        with self.lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return _MISSING
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return _MISSING
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def _set(self, key: str, value, ttl: float):
+        evicted = 0
+        with self.lock:
+            self._entries[key] = (time.monotonic() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                evicted += 1
+        if evicted:
+            with self._stats_lock:
+                self.evictions += evicted
+            metrics.increment('ipl_cache_evictions_total', evicted, {'backend': self.backend},
+                              "Entries evicted to stay within the cache size")
+
+    def delete(self, key: str):
+        with self.lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self._entries.clear()
+
+    def generation(self, namespace: str) -> int:
+        return self._generations.get(namespace, 0)
+
+    def bump(self, namespace: str) -> int:
+        with self.lock:
+            self._generations[namespace] = self._generations.get(namespace, 0) + 1
+            return self._generations[namespace]
+
+    def stats(self) -> dict:
+        stats = super().stats()
+        stats['entries'] = len(self._entries)
+        stats['max_entries'] = self.max_entries
+        return stats
+
+
+class RedisCache(Cache):
+    """Cache on a Redis server shared by every node.
+
+    ``client`` is a redis-py compatible client (``redis.Redis`` or
+    ``fakeredis.FakeRedis``). Size bounds are the server's job: run it with a
+    ``maxmemory`` limit and ``maxmemory-policy allkeys-lru``.
+    """
+
+    backend = "redis"
+
+    def __init__(self, client, default_ttl: float = DEFAULT_TTL):
+        super().__init__(default_ttl)
+        self.client = client
+
+    @classmethod
+    def from_url(cls, url: str, default_ttl: float = DEFAULT_TTL) -> 'RedisCache':
+        if redis is None:
+            raise RuntimeError("IPL_CACHE_URL needs the redis package (pip install redis)")
+        return cls(redis.Redis.from_url(url), default_ttl)
+
+    def _get(self, key: str):
+        try:
+            payload = self.client.get(key)
+        except _BACKEND_ERRORS:
+            return _MISSING
+        if payload is None:
+            return _MISSING
+        try:
+            return pickle.loads(payload)
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return _MISSING  # Written by an older version of the app
+
+    def _set(self, key: str, value, ttl: float):
+        try:
+            self.client.set(key, pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL), px=max(int(ttl * 1000), 1))
+        except _BACKEND_ERRORS:
+            pass
+
+    def delete(self, key: str):
+        self.client.delete(key)
+
+    def clear(self):
+        """Remove every key of this app, leaving other data on the server alone"""
+        for key in self.client.scan_iter(match=KEY_PREFIX + ":*", count=1000):
+            self.client.delete(key)
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{KEY_PREFIX}:generation:{namespace}"
+
+    def generation(self, namespace: str) -> int:
+        try:
+            return int(self.client.get(self._generation_key(namespace)) or 0)
+        except _BACKEND_ERRORS:
+            return None  # Without the generation no key is safe to read
+
+    def bump(self, namespace: str) -> int:
+        try:
+            return int(self.client.incr(self._generation_key(namespace)))
+        except _BACKEND_ERRORS as e:
+            # Other nodes serve their entries until the TTL runs out
+            metrics.report_failure('cache', e, namespace=namespace)
+            return None
+
+
+def create_cache() -> Cache:
+    """Backend chosen by the environment: Redis when IPL_CACHE_URL is set, otherwise in-process"""
+    ttl = float(os.getenv("IPL_CACHE_TTL", str(DEFAULT_TTL)))
+    url = os.getenv("IPL_CACHE_URL")
+    if url:
+        return RedisCache.from_url(url, ttl)
+    return MemoryCache(int(os.getenv("IPL_CACHE_MAX_ENTRIES", str(DEFAULT_MAX_ENTRIES))), ttl)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> Cache:
+    """Cache shared by everything in this process"""
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = create_cache()
+    return _cache
+
+
+def set_cache(cache: Cache):
+    """Replace the process cache, e.g. with a RedisCache around a fakeredis client"""
+    global _cache
+    with _cache_lock:
+        _cache = cache
+
+
+def cached(namespace: str, ttl: float = None):
+    """Decorator caching a function's result per arguments under a namespace of the process cache"""
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args):
+            cache = get_cache()
+            return cache.get_or_set(cache.key(namespace, function.__name__, *args), lambda: function(*args), ttl)
+        return wrapper
+    return decorator
@@ -0,0 +1,93 @@
+"""Leaderboard chart specs, built from the raw leaderboard index and cached per data version.
+
+Figures are cached as Plotly JSON, so a rerun of the Leaderboard page only
+decodes a spec instead of building a DataFrame and a figure. Up to
+``LARGE_LEADERBOARD_THRESHOLD`` players every player gets a bar. Beyond that
+the charts are aggregated: the top players, a points histogram binned here and
+a box plot per team drawn from precomputed quartiles, so the size of what is
+sent to the browser doesn't grow with the number of players.
+"""
+import json
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
+
+from data import IPL_TEAMS, IPL_TEAMS_INFO
+
+# Above this many players the charts switch to top-N plus aggregates
+LARGE_LEADERBOARD_THRESHOLD = 200
+LEADERBOARD_TOP_N = 50
+HISTOGRAM_BINS = 50
+
+TEAM_COLORS = {team: IPL_TEAMS_INFO[team]['primary_color'] for team in IPL_TEAMS}
+
+
+def _player_bars(entries: list, title: str) -> go.Figure:
+    """One bar per player, coloured by team"""
+    return px.bar(
+        {
+            'Player': [entry['username'] for entry in entries],
+            'Total Points': [entry['points'] for entry in entries],
+            'Team': [entry['team'] for entry in entries],
+            'Perfect Predictions': [entry['perfect_predictions'] for entry in entries],
+            'Loyalty Bonuses': [entry['loyalty_bonus_count'] for entry in entries]
+        },
+        x='Player',
+        y='Total Points',
+        color='Team',
+        title=title,
+        hover_data=['Perfect Predictions', 'Loyalty Bonuses'],
+        color_discrete_map=TEAM_COLORS
+    )
+
+
+def points_histogram(points: np.ndarray, bins: int = HISTOGRAM_BINS) -> go.Figure:
+    """Histogram of everyone's points, binned before it is drawn"""
+    counts, edges = np.histogram(points, bins=bins)
+    figure = go.Figure(go.Bar(x=((edges[:-1] + edges[1:]) / 2).tolist(), y=counts.tolist(),
+                              width=float(edges[1] - edges[0]) if len(edges) > 1 else None,
+                              hovertemplate="%{x:.0f} points: %{y} players<extra></extra>"))
+    figure.update_layout(title=f"Points Distribution ({len(points)} players)", bargap=0.05,
+                         xaxis_title="Total Points", yaxis_title="Players")
+    return figure
+
+
+def team_box_plot(points: np.ndarray, teams: np.ndarray) -> go.Figure:
+    """Spread of points per team from precomputed quartiles, whiskers at 1.5 IQR"""
+    figure = go.Figure()
+    for team in IPL_TEAMS:
+        team_points = points[teams == team]
+        if not len(team_points):
+            continue
+        q1, median, q3 = np.percentile(team_points, [25, 50, 75])
+        iqr = q3 - q1
+        inside = team_points[(team_points >= q1 - 1.5 * iqr) & (team_points <= q3 + 1.5 * iqr)]
+        figure.add_trace(go.Box(
+            name=IPL_TEAMS_INFO[team]['abbreviation'], x=[IPL_TEAMS_INFO[team]['abbreviation']],
+            q1=[float(q1)], median=[float(median)], q3=[float(q3)],
+            lowerfence=[float(inside.min())], upperfence=[float(inside.max())],
+            mean=[float(team_points.mean())], marker_color=TEAM_COLORS[team], showlegend=False
+        ))
+    figure.update_layout(title="Points by Team", yaxis_title="Total Points")
+    return figure
+
+
+def leaderboard_figures(entries: list) -> list:
+    """Plotly JSON of the leaderboard charts for entries in rank order"""
+    if len(entries) <= LARGE_LEADERBOARD_THRESHOLD:
+        return [_player_bars(entries, 'Player Points Distribution').to_json()]
+    points = np.fromiter((entry['points'] for entry in entries), dtype=np.int64, count=len(entries))
+    teams = np.array([entry['team'] for entry in entries], dtype=object)
+    return [
+        _player_bars(entries[:LEADERBOARD_TOP_N], f'Top {LEADERBOARD_TOP_N} Players').to_json(),
+        points_histogram(points).to_json(),
+        team_box_plot(points, teams).to_json()
+    ]
+
+
+def get_leaderboard_figures(game_data) -> list:
+    """Leaderboard chart specs as dicts, built once per leaderboard version"""
+    key = game_data.leaderboard_cache_key('charts')
+    specs = game_data.cache.get_or_set(key, lambda: leaderboard_figures(game_data.get_leaderboard_index()))
+    return [json.loads(spec) for spec in specs]
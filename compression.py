@@ -0,0 +1,332 @@
+"""Optional compressed storage of the data files, read back transparently.
+
+With ``IPL_STORAGE_COMPRESSION`` set to ``zlib`` (deflate, always available) or
+``zstd`` (needs the zstandard package), game data, the schedule, prediction
+shards, snapshot objects and season archives are written compressed under their
+usual names. Readers recognise a compressed file by its first bytes, so a
+data directory can mix plain, gzip and compressed files: turning compression on
+or off takes effect file by file as each is saved again.
+
+Most of the bytes in these files are repeated keys ("top_wicket_taker") and
+player names, which a dictionary trained on the data compresses well even in
+small files such as a single match's shard. ``train`` stores one under
+``<data dir>/dictionaries``; every compressed file records the dictionary it
+was written with, so training a new one never makes older files unreadable.
+
+A compressed file is a header (``MAGIC``, a codec byte and the 8-byte ID of its
+dictionary, zeros for none) followed by the zlib or zstd stream.
+
+Usage:
+    python compression.py train --codec zstd --league default --season 2025
+    IPL_STORAGE_COMPRESSION=zstd streamlit run app.py
+"""
+import argparse
+import collections
+import gzip
+import hashlib
+import io
+import json
+import os
+import re
+import threading
+import zlib
+
+try:
+    import zstandard
+except ImportError:  # Only needed for IPL_STORAGE_COMPRESSION=zstd
+    zstandard = None
+
+COMPRESSION = os.getenv("IPL_STORAGE_COMPRESSION", "")
+DICTIONARY_DIR = os.path.join(os.getenv("IPL_DATA_DIR", "data"), "dictionaries")
+
+MAGIC = b"IPLZ"
+CODEC_IDS = {'zlib': b"d", 'zstd': b"z"}
+GZIP_MAGIC = b"\x1f\x8b"
+NO_DICTIONARY = b"\0" * 8
+HEADER_SIZE = len(MAGIC) + 1 + len(NO_DICTIONARY)
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 3
+ZLIB_DICTIONARY_SIZE = 32 * 1024  # Deflate only looks back 32 KB
+ZSTD_DICTIONARY_SIZE = 64 * 1024
+SAMPLE_SIZE = 4096  # Training samples are cut from the files at this size
+CHUNK_SIZE = 1 << 16
+
+_dictionaries = {}  # Dictionary ID -> bytes, loaded on first use
+_dictionaries_lock = threading.Lock()
+_current = None  # (signature of current.json, {codec: dictionary ID}), read again only when the file changes
+
+
+def check_codec(codec: str):
+    """Raise if a codec is unknown or its package is missing"""
+    if codec not in CODEC_IDS:
+        raise ValueError(f"Unknown compression {codec!r}, expected one of {', '.join(CODEC_IDS)}")
+    if codec == 'zstd' and zstandard is None:
+        raise RuntimeError("zstd compression needs the zstandard package (pip install zstandard)")
+
+
+def _dictionary_path(dictionary_id: bytes) -> str:
+    return os.path.join(DICTIONARY_DIR, dictionary_id.hex() + ".dict")
+
+
+def load_dictionary(dictionary_id: bytes) -> bytes:
+    """Dictionary a file was compressed with, None for files compressed without one"""
+    if dictionary_id == NO_DICTIONARY:
+        return None
+    with _dictionaries_lock:
+        if dictionary_id not in _dictionaries:
+            with open(_dictionary_path(dictionary_id), 'rb') as f:
+                _dictionaries[dictionary_id] = f.read()
+        return _dictionaries[dictionary_id]
+
+
+def _current_ids() -> dict:
+    """Dictionary ID (hex) new files of each codec use, the file is re-read only after it changes"""
+    global _current
+    path = os.path.join(DICTIONARY_DIR, "current.json")
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return {}
+    # A stat per save instead of a read: train runs in its own process, so the file is still checked
+    signature = (stat.st_mtime_ns, stat.st_size)
+    with _dictionaries_lock:
+        if _current is None or _current[0] != signature:
+            with open(path, 'r') as f:
+                _current = (signature, json.load(f))
+        return _current[1]
+
+
+def current_dictionary(codec: str) -> tuple:
+    """(ID, bytes) of the dictionary new files of a codec are written with, (NO_DICTIONARY, None) if none was trained"""
+    current = _current_ids()
+    if codec not in current:
+        return NO_DICTIONARY, None
+    dictionary_id = bytes.fromhex(current[codec])
+    return dictionary_id, load_dictionary(dictionary_id)
+
+
+def save_dictionary(codec: str, dictionary: bytes) -> str:
+    """Store a trained dictionary and use it for new files of the codec, returns its ID"""
+    global _current
+    dictionary_id = hashlib.sha256(dictionary).digest()[:8]
+    os.makedirs(DICTIONARY_DIR, exist_ok=True)
+    with open(_dictionary_path(dictionary_id) + ".tmp", 'wb') as f:
+        f.write(dictionary)
+    os.replace(_dictionary_path(dictionary_id) + ".tmp", _dictionary_path(dictionary_id))
+    current_file = os.path.join(DICTIONARY_DIR, "current.json")
+    try:
+        with open(current_file, 'r') as f:
+            current = json.load(f)
+    except FileNotFoundError:
+        current = {}
+    current[codec] = dictionary_id.hex()
+    with open(current_file + ".tmp", 'w') as f:
+        json.dump(current, f, indent=4)
+    os.replace(current_file + ".tmp", current_file)
+    with _dictionaries_lock:
+        _current = None
+    return dictionary_id.hex()
+
+
+def training_samples(paths: list, sample_size: int = SAMPLE_SIZE) -> list:
+    """Pieces of the files' (decompressed) contents to train a dictionary on"""
+    samples = []
+    for path in paths:
+        with open_text(path) as f:
+            for piece in iter(lambda: f.read(sample_size), ""):
+                samples.append(piece.encode('utf-8'))
+    return samples
+
+
+def train_dictionary(codec: str, samples: list, size: int = None) -> bytes:
+    """Dictionary of the strings that recur across samples.
+
+    zstd trains its own. Deflate has no trainer, so its preset dictionary is the
+    quoted strings (keys and values) that save the most bytes over the samples,
+    with the most valuable last, where matches against it are cheapest.
+    """
+    check_codec(codec)
+    if codec == 'zstd':
+        return zstandard.train_dictionary(size or ZSTD_DICTIONARY_SIZE, samples).as_bytes()
+    size = size or ZLIB_DICTIONARY_SIZE
+    counts = collections.Counter()
+    for sample in samples:
+        counts.update(re.findall(rb'"[^"\\\n]{1,64}"[:,]?', sample))
+    # A string repeated in the data only gains from the dictionary when it occurs at least twice
+    ranked = sorted((token for token, count in counts.items() if count > 1),
+                    key=lambda token: counts[token] * len(token), reverse=True)
+    chosen, used = [], 0
+    for token in ranked:
+        if used + len(token) > size:
+            break
+        chosen.append(token)
+        used += len(token)
+    return b"".join(reversed(chosen))
+
+
+class _DeflateWriter(io.RawIOBase):
+    """Write-only file compressing into another file with zlib, optionally with a preset dictionary"""
+
+    def __init__(self, f, dictionary: bytes = None):
+        super().__init__()
+        self.f = f
+        if dictionary:
+            self.compressor = zlib.compressobj(ZLIB_LEVEL, zlib.DEFLATED, zlib.MAX_WBITS, zdict=dictionary)
+        else:
+            self.compressor = zlib.compressobj(ZLIB_LEVEL)
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self.f.write(self.compressor.compress(bytes(data)))
+        return len(data)
+
+    def close(self):
+        if not self.closed:
+            self.f.write(self.compressor.flush())
+            self.f.close()
+        super().close()
+
+
+class _DeflateReader(io.RawIOBase):
+    """Read-only file decompressing another file's zlib stream a chunk at a time"""
+
+    def __init__(self, f, dictionary: bytes = None):
+        super().__init__()
+        self.f = f
+        self.decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        self.pending = b""
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while not self.pending:
+            if self.decompressor.eof:
+                return 0
+            chunk = self.decompressor.unconsumed_tail or self.f.read(CHUNK_SIZE)
+            if not chunk:
+                raise ValueError("Compressed file is truncated")
+            self.pending = self.decompressor.decompress(chunk, CHUNK_SIZE)
+        count = min(len(buffer), len(self.pending))
+        buffer[:count] = self.pending[:count]
+        self.pending = self.pending[count:]
+        return count
+
+    def close(self):
+        if not self.closed:
+            self.f.close()
+        super().close()
+
+
+def open_binary_writer(path: str, codec: str = None, use_dictionary: bool = True):
+    """Binary file that compresses what is written to it with codec (COMPRESSION when None, '' for none)"""
+    codec = COMPRESSION if codec is None else codec
+    f = open(path, 'wb')
+    if not codec:
+        return f
+    check_codec(codec)
+    dictionary_id, dictionary = current_dictionary(codec) if use_dictionary else (NO_DICTIONARY, None)
+    f.write(MAGIC + CODEC_IDS[codec] + dictionary_id)
+    if codec == 'zstd':
+        dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+        return zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=dict_data).stream_writer(f, closefd=True)
+    return io.BufferedWriter(_DeflateWriter(f, dictionary), CHUNK_SIZE)
+
+
+def is_compressed(path: str) -> bool:
+    """Whether a file was written compressed (or gzipped) rather than plain"""
+    with open(path, 'rb') as f:
+        start = f.read(len(MAGIC))
+    return start == MAGIC or start[:len(GZIP_MAGIC)] == GZIP_MAGIC
+
+
+def open_binary(path: str):
+    """Binary file of a path's decompressed contents, whatever it was written with"""
+    f = open(path, 'rb')
+    start = f.read(HEADER_SIZE)
+    if start[:len(MAGIC)] == MAGIC and len(start) == HEADER_SIZE:
+        codec = {codec_id: codec for codec, codec_id in CODEC_IDS.items()}.get(start[4:5])
+        if codec is None:
+            f.close()
+            raise ValueError(f"{path} is compressed with an unknown codec")
+        check_codec(codec)
+        dictionary = load_dictionary(start[5:])
+        if codec == 'zstd':
+            dict_data = zstandard.ZstdCompressionDict(dictionary) if dictionary else None
+            return io.BufferedReader(zstandard.ZstdDecompressor(dict_data=dict_data).stream_reader(f, closefd=True))
+        return io.BufferedReader(_DeflateReader(f, dictionary), CHUNK_SIZE)
+    if start[:len(GZIP_MAGIC)] == GZIP_MAGIC:
+        f.close()
+        return gzip.open(path, 'rb')  # Snapshot objects written before IPL_STORAGE_COMPRESSION
+    f.seek(0)
+    return f
+
+
+def open_text(path: str):
+    """Text file of a path's decompressed contents; plain files are read as they are"""
+    return io.TextIOWrapper(open_binary(path), encoding='utf-8')
+
+
+def open_text_writer(path: str, codec: str = None):
+    """Text file writing to path, compressed with codec (COMPRESSION when None)"""
+    return io.TextIOWrapper(open_binary_writer(path, codec), encoding='utf-8')
+
+
+def read_bytes(path: str) -> bytes:
+    """Decompressed contents of a file"""
+    with open_binary(path) as f:
+        return f.read()
+
+
+def _fsync(path: str):
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def replace_durably(tmp_path: str, path: str):
+    """Rename a written file over path so that a crash leaves either the old or the whole new file"""
+    # The contents must reach the disk before the rename, and the rename before callers move on
+    _fsync(tmp_path)
+    os.replace(tmp_path, path)
+    if os.name == 'posix':  # Directories can't be opened for fsync elsewhere
+        _fsync(os.path.dirname(path) or '.')
+
+
+def write_text(path: str, text: str, codec: str = None) -> int:
+    """Write text to path, compressed with codec (COMPRESSION when None); returns the bytes on disk"""
+    # Renamed into place, so other processes never read a half-written file
+    with open_text_writer(path + ".tmp", codec) as f:
+        f.write(text)
+    replace_durably(path + ".tmp", path)
+    return os.path.getsize(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Train a compression dictionary on a league's data files")
+    parser.add_argument("command", choices=["train"])
+    parser.add_argument("--codec", choices=sorted(CODEC_IDS), default="zstd")
+    parser.add_argument("--league", default="default")
+    parser.add_argument("--season", default="2025")
+    parser.add_argument("--size", type=int, help="dictionary size in bytes")
+    args = parser.parse_args()
+
+    from data import GameData
+
+    check_codec(args.codec)
+    game_data = GameData(args.league, args.season)
+    paths = [game_data.data_file, game_data.season_data.matches_file]
+    paths += [game_data.predictions._shard_path(match_id) for match_id in game_data.predictions.match_ids()]
+    samples = training_samples([path for path in paths if os.path.exists(path)])
+    dictionary = train_dictionary(args.codec, samples, args.size)
+    dictionary_id = save_dictionary(args.codec, dictionary)
+    print(f"Trained a {len(dictionary)} byte {args.codec} dictionary on {len(samples)} samples: {dictionary_id}")
+    print(f"Files saved with IPL_STORAGE_COMPRESSION={args.codec} from now on use it")
+
+
+if __name__ == "__main__":
+    main()
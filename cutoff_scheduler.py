@@ -0,0 +1,76 @@
+import threading
+from datetime import datetime
+
+import metrics
+from data import IST
+
+
+class CutoffScheduler:
+    """Locks each match the moment its prediction cutoff passes.
+
+    A background thread sleeps until the next cutoff, commits any queued
+    predictions, then freezes the match: its predictions are encoded into
+    scoring arrays, its consensus counters are built and the leaderboard cache
+    is warmed. Entering the result afterwards only has to compare arrays.
+    """
+
+    def __init__(self, game_data, prediction_queue=None, max_sleep_seconds: float = 60):
+        self.game_data = game_data
+        self.prediction_queue = prediction_queue
+        self.max_sleep = max_sleep_seconds  # Re-check this often so schedule edits are picked up
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def due_matches(self) -> list:
+        """Unscored matches past their cutoff that haven't been frozen yet"""
+        now = datetime.now(IST)
+        return [
+            match_id for match_id, match in list(self.game_data.matches.items())
+            if not match.get('result') and match_id not in self.game_data.scored_matches
+            and not self.game_data.is_match_locked(match_id) and match.get('prediction_cutoff')
+            and self.game_data.get_prediction_cutoff(match_id) <= now
+        ]
+
+    def seconds_until_next_cutoff(self) -> float:
+        """Time to sleep before the next match locks, capped at max_sleep_seconds"""
+        now = datetime.now(IST)
+        upcoming = [
+            (self.game_data.get_prediction_cutoff(match_id) - now).total_seconds()
+            for match_id, match in list(self.game_data.matches.items())
+            if not match.get('result') and match.get('prediction_cutoff')
+        ]
+        upcoming = [seconds for seconds in upcoming if seconds > 0]
+        return min(upcoming + [self.max_sleep])
+
+    def run_once(self) -> list:
+        """Freeze every match whose cutoff has passed, returns their IDs"""
+        # Matches added or moved by another process since the last check
+        self.game_data.refresh()
+        due = self.due_matches()
+        if not due:
+            return []
+        if self.prediction_queue is not None:
+            # Predictions acknowledged before the cutoff belong in the frozen arrays
+            self.prediction_queue.flush()
+        return [match_id for match_id in due if self.game_data.freeze_match(match_id)]
+
+    def start(self):
+        """Watch cutoffs in a background thread"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name="cutoff-scheduler", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+                delay = self.seconds_until_next_cutoff()
+            except Exception as e:
+                metrics.report_failure('cutoff_scheduler', e, league=self.game_data.league)
+                delay = self.max_sleep
+            if self.stop_event.wait(delay):
+                return
@@ -1,8 +1,31 @@
+import numpy as np
 import pandas as pd
+from collections import Counter
+from contextlib import ExitStack, contextmanager
 from datetime import datetime, timedelta
+import hashlib
 import json
 import os
+import re
+import threading
+import time
 from pytz import timezone
+from prediction_store import PredictionStore
+from stream_loader import check_match, load_game_file
+from compression import open_text, write_text
+from index_snapshot import read_index_snapshot, write_index_snapshot
+from shared_leaderboard import SharedLeaderboard, segment_name
+from archive import PREDICTED, SeasonArchive, write_season_archive
+from rank_history import RankHistory
+from player_search import PlayerSearchIndex
+from title_odds import DEFAULT_SIMULATIONS, hit_rates, simulate_title_odds
+from cache import get_cache
+import metrics
+
+try:
+    import fcntl
+except ImportError:  # Windows, where a single writer process is assumed
+    fcntl = None
 
 # IPL Teams with their logos and colors
 IPL_TEAMS_INFO = {
@@ -74,32 +97,188 @@ IPL_TEAMS = list(IPL_TEAMS_INFO.keys())
 # Add IST timezone
 IST = timezone('Asia/Kolkata')
 
-class GameData:
-    def __init__(self):
-        """Initialize game data"""
-        self.data_file = "data/game_data.json"  # Contains user data, predictions, points
-        self.matches_file = "data/matches.json"  # Contains match schedules and results
-        self.team_players_file = "data/team_players.json"  # Contains team rosters
+# Prediction fields tracked for crowd consensus and accuracy
+PREDICTION_CATEGORIES = ['winner', 'top_scorer', 'top_wicket_taker']
+
+# Root of all data files, overridable so tests and tools can use a scratch directory
+DATA_DIR = os.getenv("IPL_DATA_DIR", "data")
+DEFAULT_LEAGUE = "default"
+DEFAULT_SEASON = "2025"
+# League names appear in URLs, directory names and metric labels
+LEAGUE_NAME = re.compile(r"[A-Za-z0-9_-]{1,40}")
+
+# Set on read-only replicas to the URL of the primary, which takes every write
+REPLICA_OF = os.getenv("IPL_REPLICA_OF", "")
+
+# Open matches are listed on every API call, cached until the next cutoff but at most this long
+OPEN_MATCHES_CACHE_SECONDS = 30
+
+# Bit flags recording which parts of a prediction scored
+HIT_FLAGS = {
+    'winner': 1,
+    'top_scorer': 2,
+    'top_wicket_taker': 4,
+    'loyalty': 8,
+    'perfect': 16
+}
+
+# Predictions close this long before the start of a match
+PREDICTION_CUTOFF_MINUTES = 5
+
+def make_match(team1: str, team2: str, date: str, time: str, venue: str = "", is_playoff: bool = False) -> dict:
+    """Match record for a start date ("YYYY-MM-DD") and time ("HH:MM") in IST"""
+    start = datetime.strptime(f"{date} {time}", "%Y-%m-%d %H:%M")
+    return {
+        'team1': team1,
+        'team2': team2,
+        'date': start.strftime("%Y-%m-%d"),
+        'time': start.strftime("%H:%M"),
+        'prediction_cutoff': (start - timedelta(minutes=PREDICTION_CUTOFF_MINUTES)).strftime("%Y-%m-%d %H:%M"),
+        'venue': venue,
+        'is_playoff': bool(is_playoff)
+    }
+
+def score_prediction(prediction: dict, result: dict, team: str, is_playoff: bool) -> tuple:
+    """Score one prediction against a result, returns (points, hit flags)"""
+    multiplier = 2 if is_playoff else 1
+    points = 0
+    hit_flags = 0
+    perfect_prediction = True
+    
+    # Match winner points
+    if prediction['winner'] == result['winner']:
+        points += 10 * multiplier
+        hit_flags |= HIT_FLAGS['winner']
+        # Check for loyalty bonus
+        if team == result['winner']:
+            points += 5 * multiplier
+            hit_flags |= HIT_FLAGS['loyalty']
+    else:
+        perfect_prediction = False
+    
+    # Top scorer points
+    if prediction['top_scorer'] == result['top_scorer']:
+        points += 5 * multiplier
+        hit_flags |= HIT_FLAGS['top_scorer']
+    else:
+        perfect_prediction = False
+    
+    # Top wicket taker points
+    if prediction['top_wicket_taker'] == result['top_wicket_taker']:
+        points += 5 * multiplier
+        hit_flags |= HIT_FLAGS['top_wicket_taker']
+    else:
+        perfect_prediction = False
+    
+    # Perfect prediction bonus
+    if perfect_prediction:
+        points += 10 * multiplier
+        hit_flags |= HIT_FLAGS['perfect']
+    
+    return points, hit_flags
+
+def build_scoring_arrays(predictions: dict) -> dict:
+    """Encode a match's predictions as integer columns, one row per predicting player"""
+    arrays = {'usernames': list(predictions), 'choices': {}}
+    for category in PREDICTION_CATEGORIES:
+        picks = np.array([prediction.get(category) or '' for prediction in predictions.values()], dtype=str)
+        choices, codes = np.unique(picks, return_inverse=True)
+        arrays['choices'][category] = {choice: code for code, choice in enumerate(choices.tolist())}
+        arrays[category] = codes.astype(np.int32)
+    return arrays
+
+def score_arrays(arrays: dict, result: dict, supports_winner, is_playoff: bool) -> tuple:
+    """Vectorized score_prediction over build_scoring_arrays output, returns (points, hit flags) arrays"""
+    multiplier = 2 if is_playoff else 1
+    # A result nobody picked gets code -1, which matches no row
+    correct = {
+        category: arrays[category] == arrays['choices'][category].get(result[category], -1)
+        for category in PREDICTION_CATEGORIES
+    }
+    loyalty = correct['winner'] & np.asarray(supports_winner, dtype=bool)
+    perfect = correct['winner'] & correct['top_scorer'] & correct['top_wicket_taker']
+    points = multiplier * (10 * correct['winner'] + 5 * loyalty + 5 * correct['top_scorer']
+                           + 5 * correct['top_wicket_taker'] + 10 * perfect)
+    hit_flags = (correct['winner'] * HIT_FLAGS['winner'] | correct['top_scorer'] * HIT_FLAGS['top_scorer']
+                 | correct['top_wicket_taker'] * HIT_FLAGS['top_wicket_taker']
+                 | loyalty * HIT_FLAGS['loyalty'] | perfect * HIT_FLAGS['perfect'])
+    return points.astype(np.int64), hit_flags.astype(np.int64)
+
+def record_prediction(league: str, match_id: str, username: str, accepted: bool, reason: str = None):
+    """Count and log a prediction submission; leagues are admin-created, so the label stays bounded"""
+    labels = {'league': league, 'result': 'accepted' if accepted else 'rejected'}
+    if reason:
+        labels['reason'] = reason
+    metrics.increment('ipl_predictions_total', 1, labels, "Prediction submissions by outcome")
+    # No username: the log is for operations, who predicted what stays in the shards
+    metrics.log_event('prediction_' + labels['result'], league=league, match_id=match_id, reason=reason)
+
+def file_signature(path: str) -> tuple:
+    """(modification time in ns, size) of a file, None if it doesn't exist"""
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def signature_token(signature: tuple) -> str:
+    """Short token of a file signature, the same in every process that sees the same file"""
+    return hashlib.sha1(repr(signature).encode('utf-8')).hexdigest()[:16]
+
+@contextmanager
+def file_lock(path: str):
+    """Hold an exclusive lock on a file, shared by every process writing the same data"""
+    with open(path, 'a') as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)
+        yield
+
+def read_json(path: str, default=None):
+    """Parsed contents of a JSON file, default if it doesn't exist"""
+    try:
+        with open_text(path) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return default
+
+class SeasonData:
+    """Schedule and rosters of one season, shared read-only by every league partition"""
+
+    def __init__(self, season: str = DEFAULT_SEASON, read_only: bool = None):
+        self.season = season
+        self.read_only = bool(REPLICA_OF) if read_only is None else read_only  # Files are written by another process
+        season_dir = get_season_dir(season)
+        self.matches_file = os.path.join(season_dir, "matches.json")  # Contains match schedules and results
+        self.team_players_file = os.path.join(season_dir, "team_players.json")  # Contains team rosters
+        self.player_aliases_file = os.path.join(season_dir, "player_aliases.json")  # Nicknames for player search
+        self.lock_file = os.path.join(season_dir, "season.lock")  # Held by whichever process writes the schedule
+        self.lock = threading.RLock()  # Admin changes to the schedule and results
+        self._writers = 0  # Nesting depth of writing() in the thread holding the lock
+        self._saved_matches = None  # Last serialised matches, to skip rewriting unchanged files
+        self.version = 0  # Bumped whenever the schedule is written
+        self._schedule_cache = None  # ((version, match count), match IDs in start order)
+        self.cache_namespace = f"season:{season}"  # Cached views of the schedule, retired on every write
         self.load_data()
 
+    def _watched_files(self) -> dict:
+        return {'matches': self.matches_file, 'team_players': self.team_players_file,
+                'player_aliases': self.player_aliases_file}
+
+    @property
+    def matches_token(self) -> str:
+        """Token of the schedule file the loaded matches came from, keys views shared with other nodes"""
+        return signature_token(self.file_signatures['matches'])
+
     def load_data(self):
-        """Load game data from files"""
-        # Create data directory if it doesn't exist
-        os.makedirs(os.path.dirname(self.data_file), exist_ok=True)
-        
-        # Load game data (user info, predictions, points)
-        if os.path.exists(self.data_file):
-            with open(self.data_file, 'r') as f:
-                data = json.load(f)
-                self.players = data.get('players', {})
-                self.predictions = data.get('predictions', {})
-        else:
-            self.players = {}
-            self.predictions = {}
+        """Load schedule and rosters from files"""
+        os.makedirs(os.path.dirname(self.matches_file), exist_ok=True)
+        # Taken before reading, so a write racing the load is picked up by the next reload
+        self.file_signatures = {name: file_signature(path) for name, path in self._watched_files().items()}
         
         # Load matches data
         if os.path.exists(self.matches_file):
-            with open(self.matches_file, 'r') as f:
+            with open_text(self.matches_file) as f:
                 self.matches = json.load(f)
         else:
             self.matches = {}
@@ -110,35 +289,519 @@ class GameData:
                 self.team_players = json.load(f)
         else:
             self.team_players = {}
+        self._player_index = None  # Rebuilt from the rosters on the next search
 
-    def save_data(self):
-        """Save data to JSON files"""
-        # Save game data (user info, predictions, points)
-        game_data = {
-            'players': self.players,
-            'predictions': self.predictions
+    def get_schedule_order(self) -> list:
+        """Match IDs ordered by start time, rebuilt only when the schedule changes"""
+        key = (self.version, len(self.matches))
+        cached = self._schedule_cache
+        if cached is None or cached[0] != key:
+            with self.lock:
+                order = sorted(self.matches, key=lambda match_id: (self.matches[match_id]['date'],
+                                                                   self.matches[match_id].get('time', '')))
+            cached = self._schedule_cache = (key, order)
+        return cached[1]
+
+    def restore_indexes(self, schedule: list, player_index: PlayerSearchIndex):
+        """Adopt indexes loaded from a warm-start snapshot of the current files"""
+        with self.lock:
+            self._schedule_cache = ((self.version, len(self.matches)), schedule)
+            if self._player_index is None:
+                self._player_index = player_index
+
+    def get_player_index(self) -> PlayerSearchIndex:
+        """Search index over the rosters and player aliases"""
+        if self._player_index is None:
+            aliases = {}
+            if os.path.exists(self.player_aliases_file):
+                with open(self.player_aliases_file, 'r') as f:
+                    aliases = json.load(f)
+            self._player_index = PlayerSearchIndex(self.team_players, aliases)
+        return self._player_index
+
+    def changed_files(self) -> dict:
+        """Signatures of the watched files that differ from the loaded ones"""
+        current = {name: file_signature(path) for name, path in self._watched_files().items()}
+        return {name: signature for name, signature in current.items() if signature != self.file_signatures.get(name)}
+
+    def reload_changed(self) -> list:
+        """Re-read the files another process changed since they were loaded, returns the parts reloaded"""
+        changed = self.changed_files()
+        reloaded = []
+        if 'matches' in changed:
+            try:
+                matches = read_json(self.matches_file, {})
+            except ValueError:
+                matches = None  # Caught mid-write, the next poll reads the finished file
+            if matches is not None:
+                # Swap in the new dict, readers holding the old one finish with a consistent schedule
+                with self.lock:
+                    self.matches = matches
+                    self._saved_matches = None
+                    self.version += 1
+                    self.file_signatures['matches'] = changed['matches']
+                get_cache().bump(self.cache_namespace)
+                reloaded.append('matches')
+        if 'team_players' in changed or 'player_aliases' in changed:
+            try:
+                team_players = read_json(self.team_players_file, {})
+            except ValueError:
+                team_players = None
+            if team_players is not None:
+                with self.lock:
+                    self.team_players = team_players
+                    self._player_index = None  # Aliases are read again with the rosters
+                    for name in ('team_players', 'player_aliases'):
+                        if name in changed:
+                            self.file_signatures[name] = changed[name]
+                reloaded.append('rosters')
+        return reloaded
+
+    @contextmanager
+    def writing(self, reload: bool = True):
+        """Hold the season's write lock across processes, first reloading the files others changed"""
+        if self.read_only:
+            raise RuntimeError("Read-only replica, changes are made on the primary")
+        with self.lock, ExitStack() as stack:
+            if not self._writers:
+                stack.enter_context(file_lock(self.lock_file))
+                if reload:
+                    self.reload_changed()
+            self._writers += 1
+            try:
+                yield
+            finally:
+                self._writers -= 1
+
+    def save_data(self) -> int:
+        """Save matches if they changed since the last save, returns the number of bytes written"""
+        with self.writing(reload=False):
+            serialised = json.dumps(self.matches, indent=4)
+            if serialised == self._saved_matches:
+                return 0
+            written = write_text(self.matches_file, serialised)
+            self._saved_matches = serialised
+            # Our own write, the next writer in this process needn't reload it
+            self.file_signatures['matches'] = file_signature(self.matches_file)
+            self.version += 1
+            get_cache().bump(self.cache_namespace)
+            return written
+
+_seasons = {}
+_partitions = {}
+_registry_lock = threading.Lock()
+
+def get_season_data(season: str = DEFAULT_SEASON) -> SeasonData:
+    """Get the process-wide shared data of a season"""
+    with _registry_lock:
+        if season not in _seasons:
+            _seasons[season] = SeasonData(season)
+        return _seasons[season]
+
+def get_game_data(league: str = DEFAULT_LEAGUE, season: str = DEFAULT_SEASON) -> 'GameData':
+    """Get the process-wide partition of a league and season"""
+    key = (league, season)
+    with _registry_lock:
+        partition = _partitions.get(key)
+    if partition is None:
+        partition = GameData(league, season)
+        with _registry_lock:
+            partition = _partitions.setdefault(key, partition)
+        # Apply results entered through other leagues while this one wasn't loaded
+        partition.sync_results()
+    return partition
+
+def get_loaded_partitions(season: str = DEFAULT_SEASON) -> list:
+    """Get the partitions of a season loaded in this process"""
+    with _registry_lock:
+        return [partition for (_, partition_season), partition in _partitions.items() if partition_season == season]
+
+def get_season_dir(season: str = DEFAULT_SEASON) -> str:
+    """Directory holding a season's schedule and rosters"""
+    # The default season keeps the original file locations
+    return DATA_DIR if season == DEFAULT_SEASON else os.path.join(DATA_DIR, "seasons", season)
+
+def get_partition_dir(league: str = DEFAULT_LEAGUE, season: str = DEFAULT_SEASON) -> str:
+    """Directory holding a league's data for a season"""
+    # The default league and season keep the original file location
+    if league == DEFAULT_LEAGUE and season == DEFAULT_SEASON:
+        return DATA_DIR
+    return os.path.join(DATA_DIR, "leagues", league, season)
+
+def list_seasons() -> list:
+    """Get every season with a schedule"""
+    seasons = [DEFAULT_SEASON]
+    seasons_dir = os.path.join(DATA_DIR, "seasons")
+    if os.path.isdir(seasons_dir):
+        seasons += sorted(season for season in os.listdir(seasons_dir) if season != DEFAULT_SEASON)
+    return seasons
+
+def list_archived_seasons(league: str = DEFAULT_LEAGUE) -> list:
+    """Get the seasons of a league that have been exported to an archive"""
+    return [
+        season for season in list_seasons()
+        if os.path.exists(os.path.join(get_partition_dir(league, season), "archive", "meta.json"))
+    ]
+
+def list_leagues(season: str = DEFAULT_SEASON) -> list:
+    """Get the leagues that have data for a season"""
+    leagues = [DEFAULT_LEAGUE]
+    leagues_dir = os.path.join(DATA_DIR, "leagues")
+    if os.path.isdir(leagues_dir):
+        for league in sorted(os.listdir(leagues_dir)):
+            if league != DEFAULT_LEAGUE and os.path.isdir(os.path.join(leagues_dir, league, season)):
+                leagues.append(league)
+    return leagues
+
+def league_exists(league: str, season: str = DEFAULT_SEASON) -> bool:
+    """Whether a league has been created for a season"""
+    if league == DEFAULT_LEAGUE:
+        return True
+    return bool(LEAGUE_NAME.fullmatch(league)) and os.path.isdir(get_partition_dir(league, season))
+
+def create_league(league: str, season: str = DEFAULT_SEASON) -> tuple:
+    """Create an empty league for a season (admins only), returns (success, message)"""
+    if not LEAGUE_NAME.fullmatch(league):
+        return False, "League names are 1-40 letters, digits, '-' or '_'"
+    if league_exists(league, season):
+        return False, f"League {league} already exists"
+    os.makedirs(get_partition_dir(league, season), exist_ok=True)
+    metrics.log_event('league_created', league=league, season=season)
+    return True, f"League {league} created"
+
+class GameData:
+    def __init__(self, league: str = DEFAULT_LEAGUE, season: str = DEFAULT_SEASON, read_only: bool = None):
+        """Initialize game data for one league and season, read_only for a replica following the primary's files"""
+        self.league = league
+        self.season = season
+        self.read_only = bool(REPLICA_OF) if read_only is None else read_only
+        self.season_data = get_season_data(season)
+        self.partition_dir = get_partition_dir(league, season)
+        self.data_file = os.path.join(self.partition_dir, "game_data.json")  # Contains user data and points
+        self.predictions_dir = os.path.join(self.partition_dir, "predictions")  # One prediction shard per match
+        self.archive_dir = os.path.join(self.partition_dir, "archive")  # Columnar export of the scored season
+        self.rank_history_file = os.path.join(self.partition_dir, "rank_history.npz")  # Ranks after each scored match
+        self.matches_file = self.season_data.matches_file
+        self.team_players_file = self.season_data.team_players_file
+        self.lock = threading.RLock()  # Guards this league's state shared between sessions and writers
+        self.lock_file = os.path.join(self.partition_dir, "partition.lock")  # Serialises writers across processes
+        self._writers = 0  # Nesting depth of writing() in the thread holding the lock
+        self.version = 0  # Bumped on every save so derived views know when to rebuild
+        self._leaderboard_cache = None  # (version, ordered entries, {username: position})
+        self._shared_cache = None  # (sequence, ordered entries, {username: position}, arrays) from shared memory
+        self._search_cache = None  # (version, search, team, matching entries)
+        self._title_odds_cache = None  # ((versions, simulations, top_n, seed), computed at, odds)
+        self._team_index = None  # (version, {team: supporters}, {team: total points})
+        self.cache = get_cache()  # Pages and lists shared with other sessions, and other nodes with Redis
+        self.cache_namespace = f"league:{league}:{season}"
+        self.frozen = {}  # match_id -> scoring arrays of matches locked at their cutoff
+        self.index_snapshot_file = os.path.join(self.partition_dir, "indexes.bin")  # Derived indexes for warm starts
+        # With several worker processes on one host, the leaderboard is computed once and shared
+        self.shared_leaderboard = None
+        if os.getenv("IPL_SHARED_LEADERBOARD"):
+            self.shared_leaderboard = SharedLeaderboard(segment_name(os.path.abspath(self.partition_dir)),
+                                                        os.path.join(self.partition_dir, "leaderboard.lock"))
+        self.load_data()
+        self.warm_start()
+
+    @property
+    def matches(self) -> dict:
+        """Season schedule and results, shared with other leagues"""
+        return self.season_data.matches
+
+    @matches.setter
+    def matches(self, matches: dict):
+        # Replace contents in place so every league keeps seeing the same dict
+        with self.season_data.lock:
+            self.season_data.matches.clear()
+            self.season_data.matches.update(matches)
+
+    @property
+    def team_players(self) -> dict:
+        """Season rosters, shared with other leagues"""
+        return self.season_data.team_players
+
+    def load_data(self):
+        """Load this league's players from file and open its prediction shards"""
+        # Create data directory if it doesn't exist
+        os.makedirs(self.partition_dir, exist_ok=True)
+        # Taken before reading, so a write racing the load is picked up by the next reload
+        self.file_signatures = {name: file_signature(path) for name, path in self._watched_files().items()}
+        
+        self.predictions = PredictionStore(self.predictions_dir)
+        
+        # Load game data (user info, points) member by member; predictions that older
+        # files kept inline go straight into their shards as they are parsed
+        if os.path.exists(self.data_file):
+            data = load_game_file(self.data_file, self.predictions.set_prediction)
+        else:
+            data = {}
+        self.players = data.get('players', {})
+        # Results already applied to this league; older files relied on the shared match status
+        self.scored_matches = set(data.get('scored_matches', [
+            match_id for match_id, match in self.matches.items() if match.get('result')
+        ]))
+        # The result each match was scored with, to rescore those corrected since
+        self.scored_results = data.get('scored_results', self._season_results(self.scored_matches))
+        self.accuracy = data.get('accuracy', {})
+        # Matches locked at their cutoff, kept in the file so every process and restart agrees
+        self.predictions.locked = set(data.get('locked_matches', []))
+        self.rank_history = RankHistory(self.rank_history_file)
+        # Ranks of matches a restore unscored, e.g. when the restore was interrupted
+        if not self.read_only:
+            self.rank_history.truncate(self.scored_matches)
+        
+        for match_id in self.scored_matches:
+            self.predictions.mark_scored(match_id)
+        # Rewrite the moved predictions as shards and drop them from game_data.json
+        if data.get('predictions') and not self.read_only:
+            with self.writing(reload=False):
+                self.save_data()
+        
+        self._rebuild_consensus()
+
+    @property
+    def players_token(self) -> str:
+        """Token of the game_data.json the loaded players came from, keys views shared with other nodes"""
+        return signature_token(self.file_signatures['players'])
+
+    def _watched_files(self) -> dict:
+        """Files a replica reloads when the primary changes them"""
+        return {
+            'players': self.data_file,
+            # Shards are replaced by rename, which changes the directory
+            'predictions': self.predictions_dir,
+            'prediction_index': os.path.join(self.predictions_dir, "index.json"),
+            'rank_history': self.rank_history_file
         }
-        with open(self.data_file, 'w') as f:
-            json.dump(game_data, f, indent=4)
+
+    def _changed_partition_files(self) -> dict:
+        current = {name: file_signature(path) for name, path in self._watched_files().items()}
+        return {name: signature for name, signature in current.items() if signature != self.file_signatures.get(name)}
+
+    def changed_files(self) -> dict:
+        """Signatures of this league's and its season's watched files that differ from the loaded ones"""
+        return {**self.season_data.changed_files(), **self._changed_partition_files()}
+
+    def reload_changed(self) -> list:
+        """Reload the parts whose files the primary changed, swapping each in whole; returns the parts reloaded"""
+        return self.season_data.reload_changed() + self._reload_partition()
+
+    def refresh(self) -> list:
+        """Pick up what another process (the API next to the app, another worker) saved since this one
+        last read the files, before serving a read; costs a stat per watched file when nothing changed.
         
-        # Save matches data
-        with open(self.matches_file, 'w') as f:
-            json.dump(self.matches, f, indent=4)
+        Returns the parts reloaded. Replicas leave this to their ReplicaFollower.
+        """
+        if self.read_only or not self.changed_files():
+            return []
+        # Waits for a change in progress in this process, so its unsaved state is never swapped out
+        with self.lock, self.season_data.lock:
+            return self.reload_changed()
 
-    def add_match(self, match_id: str, team1: str, team2: str, date: str, is_playoff: bool = False) -> bool:
-        """Add a new match"""
-        if match_id in self.matches:
-            return False
+    def _reload_partition(self) -> list:
+        """Reload this league's files changed by another process"""
+        reloaded = []
+        changed = self._changed_partition_files()
+        
+        if 'players' in changed:
+            try:
+                data = load_game_file(self.data_file) if changed['players'] else {}
+            except ValueError:
+                data = None  # Caught mid-write, the next poll reads the finished file
+            if data is not None:
+                with self.lock:
+                    self.players = data.get('players', {})
+                    self.scored_matches = set(data.get('scored_matches', []))
+                    self.scored_results = data.get('scored_results', self._season_results(self.scored_matches))
+                    self.accuracy = data.get('accuracy', {})
+                    self.predictions.locked = set(data.get('locked_matches', []))
+                    self.version += 1
+                    self.file_signatures['players'] = changed['players']
+                reloaded.append('players')
+        
+        if 'predictions' in changed or 'prediction_index' in changed:
+            # Shards are read lazily, so a fresh store only costs the index
+            predictions = PredictionStore(self.predictions_dir, self.scored_matches, self.predictions.locked)
+            with self.lock:
+                self.predictions = predictions
+                self._rebuild_consensus()
+                self.version += 1
+                for name in ('predictions', 'prediction_index'):
+                    if name in changed:
+                        self.file_signatures[name] = changed[name]
+            reloaded.append('predictions')
         
-        self.matches[match_id] = {
-            'team1': team1,
-            'team2': team2,
-            'date': date,
-            'is_playoff': is_playoff,
-            'status': 'scheduled',  # scheduled, in_progress, completed
-            'result': {}
+        if 'rank_history' in changed:
+            try:
+                rank_history = RankHistory(self.rank_history_file)
+            except (OSError, ValueError):
+                rank_history = None  # Replaced by rename, so only a file still being copied in fails
+            if rank_history is not None:
+                self.rank_history = rank_history
+                self.file_signatures['rank_history'] = changed['rank_history']
+                reloaded.append('rank_history')
+        
+        if reloaded:
+            self.cache.bump(self.cache_namespace)
+        return reloaded
+
+    @contextmanager
+    def writing(self, reload: bool = True):
+        """Hold this league's and its season's write locks across processes for a change and its save.
+        
+        The outermost call first reloads whatever another process (the API next to
+        the app, another worker) saved since this one last read the files, so the
+        change is made on top of theirs instead of overwriting it. Nested calls,
+        e.g. scoring inside a bulk update, just join the outer one.
+        """
+        if self.read_only:
+            raise RuntimeError("Read-only replica, changes are made on the primary")
+        with self.lock, self.season_data.writing(reload), ExitStack() as stack:
+            outermost = not self._writers
+            if outermost:
+                stack.enter_context(file_lock(self.lock_file))
+                if reload:
+                    self._reload_partition()
+            self._writers += 1
+            try:
+                yield
+            finally:
+                self._writers -= 1
+                if outermost and reload:
+                    # Still holding the lock, so the files are exactly what this process wrote
+                    self.file_signatures.update(
+                        (name, file_signature(path)) for name, path in self._watched_files().items())
+
+    def _rebuild_consensus(self):
+        """Drop consensus counters, each match's are rebuilt from its shard on next use"""
+        self.consensus = {}
+        # Scoring arrays of locked matches were built from the old shards too
+        self.frozen = {}
+
+    def _ensure_consensus(self, match_id: str) -> dict:
+        """Build a match's prediction counters from its shard if they aren't loaded yet"""
+        if match_id not in self.consensus:
+            self.consensus[match_id] = {
+                'total': 0,
+                **{category: Counter() for category in PREDICTION_CATEGORIES}
+            }
+            for prediction in self.predictions.get(match_id, {}).values():
+                self._count_prediction(match_id, prediction, 1)
+        return self.consensus[match_id]
+
+    def _count_prediction(self, match_id: str, prediction: dict, delta: int):
+        """Add (delta=1) or remove (delta=-1) a prediction from the match's running counters"""
+        counters = self.consensus[match_id]
+        counters['total'] += delta
+        for category in PREDICTION_CATEGORIES:
+            choice = prediction.get(category)
+            if choice:
+                counters[category][choice] += delta
+                if counters[category][choice] <= 0:
+                    del counters[category][choice]
+
+    def _index_sources(self) -> dict:
+        """Signatures of the files the derived indexes are built from, as they were loaded"""
+        # Recorded when each file was read, so no file is read again to validate the snapshot
+        return {
+            'game_data': self.file_signatures['players'],
+            'matches': self.season_data.file_signatures['matches'],
+            'team_players': self.season_data.file_signatures['team_players'],
+            'player_aliases': self.season_data.file_signatures['player_aliases']
         }
-        self.save_data()
+
+    def warm_start(self) -> bool:
+        """Load the derived indexes from their snapshot, or build and snapshot them if the files changed.
+        
+        Returns whether the snapshot could be used.
+        """
+        with self.lock:
+            sources = self._index_sources()
+        indexes = read_index_snapshot(self.index_snapshot_file, sources)
+        if indexes is None:
+            self.save_index_snapshot()
+        else:
+            with self.lock:
+                self._leaderboard_cache = (self.version, indexes['leaderboard'], indexes['positions'])
+                self._team_index = (self.version, indexes['supporters'], indexes['team_points'])
+            self.season_data.restore_indexes(indexes['schedule'], indexes['player_index'])
+        # Publish when no worker has yet, or what was published came from other files,
+        # e.g. a segment left from before a restart or a restore run from the command line
+        if self.shared_leaderboard is not None and not self.read_only \
+                and self.shared_leaderboard.source() != self.players_token:
+            self.publish_leaderboard()
+        return indexes is not None
+
+
+    def save_index_snapshot(self) -> int:
+        """Write the derived indexes next to the JSON files, returns the number of bytes written"""
+        if self.read_only:
+            return 0
+        # Files and indexes are matched up under the lock; the cached indexes are never
+        # modified once built, so they can be serialised after releasing it
+        with self.lock:
+            sources = self._index_sources()
+            entries, positions = self._local_leaderboard()
+            _, supporters, team_points = self._get_team_index()
+            indexes = {
+                'leaderboard': entries,
+                'positions': positions,
+                'supporters': supporters,
+                'team_points': team_points,
+                'schedule': self.season_data.get_schedule_order(),
+                'player_index': self.season_data.get_player_index()
+            }
+        try:
+            return write_index_snapshot(self.index_snapshot_file, sources, indexes)
+        except OSError as e:
+            # Only a start-up shortcut, the app works without it
+            metrics.report_failure('index_snapshot', e, league=self.league)
+            return 0
+
+    def save_data(self):
+        """Save data to JSON files, under writing() when part of a change"""
+        with self.writing(reload=False), metrics.Timer() as timer:
+            # Save game data (user info, predictions, points)
+            game_data = json.dumps({
+                'players': self.players,
+                'scored_matches': sorted(self.scored_matches),
+                'scored_results': self.scored_results,
+                'locked_matches': sorted(self.predictions.locked),
+                'accuracy': self.accuracy
+            }, indent=4)
+            written = write_text(self.data_file, game_data)
+            # Our own write, the players in memory are what the file now holds
+            self.file_signatures['players'] = file_signature(self.data_file)
+            
+            # Save changed prediction shards
+            written += self.predictions.save()
+            
+            # Save matches data
+            written += self.season_data.save_data()
+            self.version += 1
+            self.cache.bump(self.cache_namespace)
+        
+        labels = {'league': self.league}
+        metrics.observe('ipl_save_seconds', timer.seconds, labels, "Duration of GameData.save_data")
+        metrics.increment('ipl_save_bytes_total', written, labels, "Bytes written by GameData.save_data")
+        metrics.observe('ipl_save_bytes', written, labels, "Bytes written per save", buckets=metrics.COUNT_BUCKETS)
+
+    def add_match(self, match_id: str, team1: str, team2: str, date: str, is_playoff: bool = False) -> bool:
+        """Add a new match"""
+        with self.writing():
+            if match_id in self.matches:
+                return False
+            
+            self.matches[match_id] = {
+                'team1': team1,
+                'team2': team2,
+                'date': date,
+                'is_playoff': is_playoff,
+                'status': 'scheduled',  # scheduled, in_progress, completed
+                'result': {}
+            }
+            self.save_data()
         return True
 
     def get_match(self, match_id: str) -> dict:
@@ -146,12 +809,17 @@ class GameData:
         return self.matches.get(match_id, {})
 
     def get_matches_list(self) -> pd.DataFrame:
-        """Get list of all matches as a DataFrame"""
+        """Get list of all matches as a DataFrame, cached until the schedule changes"""
+        key = self.cache.key(self.season_data.cache_namespace, 'matches_list', len(self.matches))
+        return self.cache.get_or_set(key, self._build_matches_list)
+
+    def _build_matches_list(self) -> pd.DataFrame:
         if not self.matches:
             return pd.DataFrame(columns=['Match ID', 'Team 1', 'Team 2', 'Date', 'Time', 'Venue', 'Is Playoff', 'Status'])
         
         data = []
-        for match_id, match_data in self.matches.items():
+        for match_id in self.season_data.get_schedule_order():
+            match_data = self.matches[match_id]
             data.append({
                 'Match ID': match_id,
                 'Team 1': match_data['team1'],
@@ -163,48 +831,88 @@ class GameData:
                 'Status': 'Completed' if match_data.get('result') else 'Scheduled'
             })
         
-        df = pd.DataFrame(data)
-        return df.sort_values(['Date', 'Time']).reset_index(drop=True)
+        return pd.DataFrame(data)
+
+    def get_open_matches(self) -> list:
+        """Get matches still accepting predictions, ordered by start time"""
+        key = self.cache.key(self.cache_namespace, 'open_matches',
+                             self.cache.generation(self.season_data.cache_namespace), len(self.matches))
+        open_matches = self.cache.get(key)
+        if open_matches is None:
+            open_matches = [
+                {'match_id': match_id, **self.matches[match_id]}
+                for match_id in self.season_data.get_schedule_order() if self.is_prediction_open(match_id)
+            ]
+            # Kept no longer than the next cutoff, when the first of them closes
+            ttl = OPEN_MATCHES_CACHE_SECONDS
+            now = datetime.now(IST)
+            for match in open_matches:
+                ttl = min(ttl, max((self.get_prediction_cutoff(match['match_id']) - now).total_seconds(), 0.001))
+            self.cache.set(key, open_matches, ttl)
+        return open_matches
 
     def add_player(self, username: str, team: str) -> bool:
         """Add a new player with their chosen team"""
-        if username in self.players:
-            return False
-        
-        self.players[username] = {
-            'team': team,
-            'points': 0,
-            'perfect_predictions': 0,
-            'loyalty_bonus_count': 0,
-            'has_switched_team': False,  # Track if player has used their team switch
-            'original_team': team  # Track original team for history
-        }
-        self.save_data()
+        with self.writing():
+            if username in self.players:
+                return False
+            
+            self.players[username] = {
+                'team': team,
+                'points': 0,
+                'perfect_predictions': 0,
+                'loyalty_bonus_count': 0,
+                'has_switched_team': False,  # Track if player has used their team switch
+                'original_team': team  # Track original team for history
+            }
+            self.save_data()
+            self.publish_leaderboard()
         return True
 
+    def _get_team_index(self) -> tuple:
+        """Supporters and total points per team, rebuilt only when the data version changes"""
+        with self.lock:
+            if self._team_index is None or self._team_index[0] != self.version:
+                supporters = {team: [] for team in IPL_TEAMS}
+                team_points = dict.fromkeys(IPL_TEAMS, 0)
+                for username, player_data in self.players.items():
+                    supporters.setdefault(player_data['team'], []).append(username)
+                    team_points[player_data['team']] = team_points.get(player_data['team'], 0) + player_data['points']
+                self._team_index = (self.version, supporters, team_points)
+            return self._team_index
+
     def get_team_supporters(self, team: str) -> list:
         """Get list of users supporting a particular team"""
-        return [username for username, data in self.players.items() if data['team'] == team]
+        return list(self._get_team_index()[1].get(team, []))
 
     def get_team_stats(self) -> pd.DataFrame:
         """Get statistics about team selection"""
-        if not self.players:
+        shared = self._read_shared_leaderboard()
+        if shared is not None:
+            arrays = shared[3]
+            counts = dict(zip(arrays['team_names'], arrays['team_supporters'].tolist()))
+            totals = dict(zip(arrays['team_names'], arrays['team_points'].tolist()))
+        else:
+            if not self.players:
+                return pd.DataFrame(columns=['Team', 'Supporters Count', 'Total Points'])
+            _, supporters, totals = self._get_team_index()
+            counts = {team: len(usernames) for team, usernames in supporters.items()}
+        if not any(counts.values()):
             return pd.DataFrame(columns=['Team', 'Supporters Count', 'Total Points'])
         
         team_stats = {}
         for team in IPL_TEAMS:
-            supporters = self.get_team_supporters(team)
             team_stats[team] = {
-                'Supporters Count': len(supporters),
-                'Total Points': sum(self.players[user]['points'] for user in supporters)
+                'Supporters Count': counts.get(team, 0),
+                'Total Points': totals.get(team, 0)
             }
         
         df = pd.DataFrame.from_dict(team_stats, orient='index').reset_index()
         df.columns = ['Team', 'Supporters Count', 'Total Points']
         return df.sort_values('Supporters Count', ascending=False).reset_index(drop=True)
 
-    def add_prediction(self, match_id, username, prediction):
-        """Add a prediction for a match"""
+    def is_prediction_open(self, match_id: str) -> bool:
+        """Check whether a match still accepts predictions"""
         if match_id not in self.matches:
             return False
         
@@ -214,75 +922,451 @@ class GameData:
         if match.get('result'):
             return False
         
-        # Check if prediction is within cutoff time
-        current_time = datetime.now(IST)
-        cutoff_time = IST.localize(datetime.strptime(match['prediction_cutoff'], "%Y-%m-%d %H:%M"))
-        if current_time >= cutoff_time:
+        # Locked by the cutoff scheduler, even if this clock hasn't quite reached the cutoff
+        if self.is_match_locked(match_id):
             return False
         
-        # Initialize predictions for match if not exists
-        if match_id not in self.predictions:
-            self.predictions[match_id] = {}
-        
-        # Add prediction
-        self.predictions[match_id][username] = prediction
-        self.save_data()
+        # Check if prediction is within cutoff time
+        return datetime.now(IST) < self.get_prediction_cutoff(match_id)
+
+    def get_prediction_cutoff(self, match_id: str) -> datetime:
+        """Time at which a match stops accepting predictions"""
+        return IST.localize(datetime.strptime(self.matches[match_id]['prediction_cutoff'], "%Y-%m-%d %H:%M"))
+
+    def is_match_locked(self, match_id: str) -> bool:
+        """Whether a match's predictions were locked at its cutoff"""
+        return match_id in self.predictions.locked
+
+    def freeze_match(self, match_id: str) -> bool:
+        """Lock a match whose cutoff has passed and prepare everything scoring and pages need"""
+        with self.writing():
+            match = self.get_match(match_id)
+            if not match or match_id in self.scored_matches or self.is_match_locked(match_id):
+                return False
+            
+            self.predictions.lock_match(match_id)
+            self.save_data()
+            self.frozen[match_id] = build_scoring_arrays(self.predictions.get(match_id, {}))
+            self._ensure_consensus(match_id)
+        # Warm the views every session asks for right after a match locks
+        self.get_leaderboard_index()
         return True
 
+    def add_prediction(self, match_id, username, prediction):
+        """Add a prediction for a match"""
+        with self.writing():
+            # Checked under the lock, so the cutoff scheduler can't lock the match in between
+            if not self.is_prediction_open(match_id):
+                record_prediction(self.league, match_id, username, False, "closed")
+                return False
+            self._store_prediction(match_id, username, prediction)
+            self.save_data()
+        record_prediction(self.league, match_id, username, True)
+        return True
+
+    def _store_prediction(self, match_id: str, username: str, prediction: dict, late: bool = False):
+        """Store a prediction and keep the match's consensus counters in step"""
+        self._ensure_consensus(match_id)
+        previous = self.predictions.get(match_id, {}).get(username)
+        if previous:
+            self._count_prediction(match_id, previous, -1)
+        
+        # Add prediction to the match's shard, refused for a locked match unless late
+        self.predictions.set_prediction(match_id, username, prediction, late)
+        self._count_prediction(match_id, prediction, 1)
+
+    def _store_late_prediction(self, match_id: str, username: str, prediction: dict):
+        """Store a prediction acknowledged before its match locked but committed after it.
+        
+        The only way into a locked shard: each one is counted and logged, and the
+        match's scoring arrays are rebuilt to include it. Once the match is scored
+        the prediction can't earn points any more and is dropped instead.
+        """
+        stored = match_id not in self.scored_matches
+        if stored:
+            self._store_prediction(match_id, username, prediction, late=True)
+            self.frozen.pop(match_id, None)
+        metrics.increment('ipl_late_predictions_total', 1, {'outcome': 'stored' if stored else 'dropped'},
+                          "Acknowledged predictions committed after their match locked")
+        metrics.log_event('prediction_late', league=self.league, match_id=match_id, stored=stored)
+
+    def add_predictions_batch(self, entries: list) -> int:
+        """Apply already-validated (match_id, username, prediction) entries with a single save.
+        
+        Entries are acknowledged submissions; those whose match has locked since
+        are replayed through _store_late_prediction.
+        """
+        if not entries:
+            return 0
+        
+        with self.writing():
+            for match_id, username, prediction in entries:
+                if self.is_match_locked(match_id) or match_id in self.scored_matches:
+                    self._store_late_prediction(match_id, username, prediction)
+                else:
+                    self._store_prediction(match_id, username, prediction)
+            self.save_data()
+        return len(entries)
+
     def get_user_prediction(self, match_id: str, username: str) -> dict:
         """Get user's prediction for a match"""
         return self.predictions.get(match_id, {}).get(username, {})
 
+    def get_total_predictions(self) -> int:
+        """Number of predictions across all matches, without loading any shard"""
+        return self.predictions.total_count()
+
+    def get_match_consensus(self, match_id: str, top_n: int = 5) -> dict:
+        """Get the crowd's winner split and most-picked players for a match"""
+        with self.lock:
+            counters = self._ensure_consensus(match_id)
+            if counters['total'] <= 0:
+                return {}
+            return {
+                'total': counters['total'],
+                'winner': dict(counters['winner']),
+                'top_scorer': counters['top_scorer'].most_common(top_n),
+                'top_wicket_taker': counters['top_wicket_taker'].most_common(top_n)
+            }
+
+    def get_match_accuracy(self, match_id: str) -> dict:
+        """Get the share of predictions that were right per category, once a match is scored"""
+        return self.accuracy.get(match_id) or self.matches.get(match_id, {}).get('accuracy', {})
+
+    def _season_results(self, match_ids) -> dict:
+        """Results the season holds for some matches, for files written before leagues kept their own"""
+        return {match_id: self.matches[match_id]['result'] for match_id in match_ids
+                if self.matches.get(match_id, {}).get('result')}
+
+    def sync_results(self) -> int:
+        """Score results entered through another league that this league hasn't applied yet,
+        and rescore the matches whose result was corrected since this league scored them"""
+        if self.read_only:
+            return 0  # The primary scores them, replicas load its points
+        with self.writing():
+            corrected = [match_id for match_id in sorted(self.scored_matches)
+                         if self.matches.get(match_id, {}).get('result')
+                         and self.scored_results.get(match_id, self.matches[match_id]['result'])
+                         != self.matches[match_id]['result'] and self._points_kept(match_id)]
+            for match_id in corrected:
+                self._rescore(match_id, self.matches[match_id]['result'])
+            if corrected:
+                self._save_scoring(corrected[-1])
+            return len(corrected) + len(self.score_results({
+                match_id: match['result'] for match_id, match in list(self.matches.items())
+                if match.get('result') and match_id not in self.scored_matches
+            }))
+
+    def _points_kept(self, match_id: str) -> bool:
+        """Whether every prediction of a match records what it earned, so its scoring can be taken back"""
+        return all('points' in prediction for prediction in self.predictions.get(match_id, {}).values())
+
+    def _unscore(self, match_id: str):
+        """Take back the points, bonuses and accuracy a scored match gave, without saving"""
+        for username, prediction in self.predictions.get(match_id, {}).items():
+            player = self.players.get(username)
+            if player is None:
+                continue
+            hits = prediction.get('hits', 0)
+            player['points'] -= prediction.get('points', 0)
+            if hits & HIT_FLAGS['loyalty']:
+                player['loyalty_bonus_count'] -= 1
+            if hits & HIT_FLAGS['perfect']:
+                player['perfect_predictions'] -= 1
+            self.predictions.set_score(match_id, username, 0, 0)
+        self.scored_matches.discard(match_id)
+        self.scored_results.pop(match_id, None)
+        self.accuracy.pop(match_id, None)
+
+    def _rescore(self, match_id: str, result: dict):
+        """Score a match again with another result, without saving"""
+        if match_id in self.scored_matches:
+            self._unscore(match_id)
+        self._apply_result(match_id, result)
+
+    def _save_scoring(self, last_match_id: str):
+        """Save after rescoring, replacing the ranks recorded for the match if they are the latest"""
+        self.save_data()
+        # Ranks recorded after later matches can't be rebuilt and are left as they were
+        if self.rank_history.match_ids and self.rank_history.match_ids[-1] == last_match_id:
+            self.rank_history.record(last_match_id, self._local_leaderboard()[0])
+        self.publish_leaderboard()
+
+    def correct_result(self, match_id: str, result: dict) -> tuple:
+        """Replace a wrongly entered result: take back the points it gave and score the new one.
+        
+        Other leagues rescore the match on their next sync_results. Returns (success, message).
+        """
+        with self.writing():
+            match = self.matches.get(match_id)
+            if not match or not match.get('result'):
+                return False, "Match has no result to correct"
+            if not all(isinstance(result.get(field), str) and result[field] for field in PREDICTION_CATEGORIES):
+                return False, "A result needs a winner, top scorer and top wicket taker"
+            if result['winner'] not in (match['team1'], match['team2']):
+                return False, f"Winner must be {match['team1']} or {match['team2']}"
+            if match_id in self.scored_matches and not self._points_kept(match_id):
+                return False, "Match was scored before points were kept per prediction and can't be corrected"
+            previous = match['result']
+            self._rescore(match_id, result)
+            self._save_scoring(match_id)
+        metrics.log_event('result_corrected', league=self.league, match_id=match_id, previous=previous, result=result)
+        return True, "Result corrected and points recalculated"
+
     def calculate_points(self, match_id: str, result: dict):
         """Calculate points for all predictions of a match"""
+        return bool(self.score_results({match_id: result}))
+
+    def _prediction_points(self, match_id: str, result: dict, is_playoff: bool) -> tuple:
+        """(usernames, points, hit flags) of a match's predictions against a result, without applying them"""
+        # Locked matches were encoded at cutoff, leaving only the comparison for now
+        arrays = self.frozen.get(match_id)
+        if arrays is None:
+            arrays = build_scoring_arrays(self.predictions.get(match_id, {}))
+        usernames = arrays['usernames']
+        supports_winner = np.fromiter(
+            (self.players[username]['team'] == result['winner'] for username in usernames),
+            dtype=bool, count=len(usernames)
+        )
+        points, hit_flags = score_arrays(arrays, result, supports_winner, is_playoff)
+        return usernames, points, hit_flags
+
+    def _apply_result(self, match_id: str, result: dict) -> dict:
+        """Add one match's points to the players and mark it scored, without saving"""
         match = self.get_match(match_id)
-        if not match or match['status'] == 'completed':
-            return False
+        with metrics.Timer() as timer:
+            was_frozen = match_id in self.frozen
+            usernames, points, hit_flags = self._prediction_points(match_id, result, match['is_playoff'])
+            self.frozen.pop(match_id, None)
+            hits = {
+                category: int(np.count_nonzero(hit_flags & HIT_FLAGS[category]))
+                for category in PREDICTION_CATEGORIES + ['perfect']
+            }
+            
+            for username, prediction_points, prediction_hits in zip(usernames, points.tolist(), hit_flags.tolist()):
+                player = self.players[username]
+                if prediction_hits & HIT_FLAGS['loyalty']:
+                    player['loyalty_bonus_count'] += 1
+                if prediction_hits & HIT_FLAGS['perfect']:
+                    player['perfect_predictions'] += 1
+                player['points'] += prediction_points
+                
+                # Keep what each prediction earned for archives and history
+                self.predictions.set_score(match_id, username, prediction_points, prediction_hits)
         
-        is_playoff = match['is_playoff']
-        multiplier = 2 if is_playoff else 1
+            # Update match status and result
+            with self.season_data.lock:
+                self.matches[match_id]['status'] = 'completed'
+                self.matches[match_id]['result'] = result
+            self.scored_matches.add(match_id)
+            self.scored_results[match_id] = result
+            self.predictions.mark_scored(match_id)
+            # Accuracy per category, gathered in the scoring pass above
+            total = len(self.predictions.get(match_id, {}))
+            self.accuracy[match_id] = {
+                'predictions': total,
+                **{category: (count / total if total else 0.0) for category, count in hits.items()}
+            }
+        return {'match_id': match_id, 'users': len(usernames), 'seconds': timer.seconds, 'frozen': was_frozen}
 
-        for username, prediction in self.predictions.get(match_id, {}).items():
-            points = 0
-            perfect_prediction = True
-            
-            # Match winner points
-            if prediction['winner'] == result['winner']:
-                points += 10 * multiplier
-                # Check for loyalty bonus
-                if self.players[username]['team'] == result['winner']:
-                    points += 5 * multiplier
-                    self.players[username]['loyalty_bonus_count'] += 1
-            else:
-                perfect_prediction = False
-            
-            # Top scorer points
-            if prediction['top_scorer'] == result['top_scorer']:
-                points += 5 * multiplier
-            else:
-                perfect_prediction = False
-            
-            # Top wicket taker points
-            if prediction['top_wicket_taker'] == result['top_wicket_taker']:
-                points += 5 * multiplier
-            else:
-                perfect_prediction = False
-            
-            # Perfect prediction bonus
-            if perfect_prediction:
-                points += 10 * multiplier
-                self.players[username]['perfect_predictions'] += 1
+    def score_results(self, results: dict) -> list:
+        """Score several matches' results in one batch followed by a single save.
+        
+        Matches that don't exist or are already scored are skipped. Returns the
+        IDs of the matches scored, in schedule order.
+        """
+        with self.writing():
+            order = self.season_data.get_schedule_order()
+            match_ids = [match_id for match_id in order
+                         if match_id in results and match_id not in self.scored_matches]
+            # Matches added since the order was last built go last
+            match_ids += [match_id for match_id in results
+                          if match_id in self.matches and match_id not in match_ids and match_id not in self.scored_matches]
+            if not match_ids:
+                return []
             
-            self.players[username]['points'] += points
+            runs = []
+            for number, match_id in enumerate(match_ids, start=1):
+                runs.append(self._apply_result(match_id, results[match_id]))
+                if number < len(match_ids):
+                    # Ranks between the matches of a batch, the last ones come from the saved leaderboard
+                    self.rank_history.record(match_id, self._rank_players(), save=False)
+            self.save_data()
+            self.rank_history.record(match_ids[-1], self._local_leaderboard()[0])
+            self.publish_leaderboard()
         
-        # Update match status and result
-        self.matches[match_id]['status'] = 'completed'
-        self.matches[match_id]['result'] = result
-        self.save_data()
-        return True
+        # Points changed, so the next process start would otherwise rebuild every index
+        self.save_index_snapshot()
+        
+        labels = {'league': self.league}
+        for run in runs:
+            metrics.observe('ipl_scoring_seconds', run['seconds'], labels, "Duration of calculate_points")
+            metrics.observe('ipl_scoring_users', run['users'], labels, "Predictions scored per match",
+                            buckets=metrics.COUNT_BUCKETS)
+            metrics.increment('ipl_scoring_runs_total', 1, labels, "Matches scored")
+            metrics.log_event('match_scored', league=self.league, match_id=run['match_id'], users=run['users'],
+                              duration_ms=round(run['seconds'] * 1000, 3), frozen=run['frozen'])
+        return match_ids
+
+    def check_bulk(self, matches: dict = None, results: dict = None) -> list:
+        """Problems with a bulk update of match records and results, empty when it can be applied"""
+        matches, results = matches or {}, results or {}
+        problems = []
+        for match_id, record in matches.items():
+            problem = check_match(match_id, record)
+            if problem:
+                problems.append(problem)
+            elif record['team1'] not in IPL_TEAMS or record['team2'] not in IPL_TEAMS:
+                problems.append(f"match {match_id!r} has an unknown team")
+            elif record['team1'] == record['team2']:
+                problems.append(f"match {match_id!r} has the same team twice")
+            elif match_id in self.scored_matches:
+                problems.append(f"match {match_id!r} is already scored and can't be edited")
+            elif match_id in self.matches and (record['team1'], record['team2']) != \
+                    (self.matches[match_id]['team1'], self.matches[match_id]['team2']):
+                # Predictions name a winner from the teams they were made for
+                if self.is_match_locked(match_id):
+                    problems.append(f"match {match_id!r} is locked, its teams can't be changed")
+                elif self.predictions.count(match_id):
+                    problems.append(f"match {match_id!r} already has predictions, its teams can't be changed")
+        for match_id, result in results.items():
+            match = matches.get(match_id) or self.matches.get(match_id)
+            if not match:
+                problems.append(f"result for unknown match {match_id!r}")
+            elif match_id in self.scored_matches:
+                problems.append(f"match {match_id!r} is already scored")
+            elif not all(isinstance(result.get(field), str) and result[field] for field in PREDICTION_CATEGORIES):
+                problems.append(f"result for {match_id!r} needs a winner, top scorer and top wicket taker")
+            elif result['winner'] not in (match['team1'], match['team2']):
+                problems.append(f"winner of {match_id!r} must be {match['team1']} or {match['team2']}")
+        return problems
+
+    def preview_bulk(self, matches: dict = None, results: dict = None) -> list:
+        """Point and rank changes a bulk update would make, for players whose points change"""
+        matches, results = matches or {}, results or {}
+        with self.lock:
+            entries, positions = self._local_leaderboard()
+            gained = {}
+            for match_id, result in results.items():
+                match = matches.get(match_id) or self.matches[match_id]
+                usernames, points, _ = self._prediction_points(match_id, result, match.get('is_playoff', False))
+                for username, prediction_points in zip(usernames, points.tolist()):
+                    if prediction_points:
+                        gained[username] = gained.get(username, 0) + prediction_points
+        
+        if not gained:
+            return []
+        # Rank everyone on the new totals, ties share the best position as on the leaderboard
+        totals = np.fromiter((entry['points'] + gained.get(entry['username'], 0) for entry in entries),
+                             dtype=np.int64, count=len(entries))
+        ordered = np.sort(totals)[::-1]
+        new_ranks = np.searchsorted(-ordered, -totals, side='left') + 1
+        changes = []
+        for username, points in gained.items():
+            position = positions[username]
+            entry = entries[position]
+            changes.append({
+                'username': username,
+                'team': entry['team'],
+                'points': entry['points'],
+                'gained': points,
+                'new_points': entry['points'] + points,
+                'rank': entry['rank'],
+                'new_rank': int(new_ranks[position])
+            })
+        return sorted(changes, key=lambda change: (change['new_rank'], change['username']))
+
+    def apply_bulk(self, matches: dict = None, results: dict = None) -> tuple:
+        """Add or edit many matches and score many results as one transaction with a single save.
+        
+        ``matches`` maps match IDs to complete match records (see make_match) and
+        ``results`` maps match IDs to results. Nothing is changed unless every
+        record and result is valid. Returns (success, message).
+        """
+        matches, results = matches or {}, results or {}
+        with self.writing():
+            problems = self.check_bulk(matches, results)
+            if problems:
+                return False, "; ".join(problems)
+            changed = 0
+            with self.season_data.lock:
+                for match_id, record in matches.items():
+                    existing = self.matches.get(match_id, {'status': 'scheduled', 'result': None})
+                    # Edits keep scoring fields such as status and accuracy
+                    updated = {**existing, **record}
+                    if updated != existing:
+                        self.matches[match_id] = updated
+                        changed += 1
+            scored = self.score_results(results)
+            if changed and not scored:
+                self.save_data()
+        metrics.log_event('bulk_update', league=self.league, matches_changed=changed, matches_scored=len(scored))
+        return True, f"{changed} matches added or updated, {len(scored)} results scored"
+
+    def get_rank_changes(self) -> dict:
+        """Places each player gained (positive) or lost at the last scored match"""
+        return self.rank_history.get_rank_changes()
+
+    def get_rank_history(self, username: str) -> list:
+        """(match_id, rank) after each scored match for a player"""
+        return self.rank_history.get_user_history(username)
+
+    def export_archive(self) -> str:
+        """Export scored matches to a memory-mappable columnar archive, returns its directory"""
+        with self.lock:
+            usernames = sorted(self.players)
+            teams = [self.players[username]['team'] for username in usernames]
+            match_ids = sorted(
+                self.scored_matches,
+                key=lambda match_id: (self.matches[match_id]['date'], self.matches[match_id].get('time', ''))
+            )
+        rows = {username: row for row, username in enumerate(usernames)}
+        points = np.zeros((len(usernames), len(match_ids)), dtype=np.int16)
+        hits = np.zeros((len(usernames), len(match_ids)), dtype=np.uint8)
+        
+        # One shard at a time, so the export never holds the whole season's predictions
+        for column, match_id in enumerate(match_ids):
+            match = self.matches[match_id]
+            for username, prediction in self.predictions.copy_shard(match_id).items():
+                row = rows.get(username)
+                if row is None:
+                    continue
+                if 'points' in prediction:
+                    match_points, hit_flags = prediction['points'], prediction['hits']
+                else:
+                    # Scored before points were kept per prediction, replay with the current team
+                    match_points, hit_flags = score_prediction(
+                        prediction, match['result'], teams[row], match['is_playoff'])
+                points[row, column] = match_points
+                hits[row, column] = hit_flags | PREDICTED
+        
+        write_season_archive(
+            self.archive_dir, usernames, teams, match_ids,
+            [self.matches[match_id]['is_playoff'] for match_id in match_ids],
+            points, hits, {'league': self.league, 'season': self.season}
+        )
+        return self.archive_dir
+
+    @staticmethod
+    def open_archive(league: str = DEFAULT_LEAGUE, season: str = DEFAULT_SEASON) -> SeasonArchive:
+        """Open an archived season read-only, memory-mapped instead of parsing its JSON"""
+        return SeasonArchive(os.path.join(get_partition_dir(league, season), "archive"))
 
     def get_leaderboard(self) -> pd.DataFrame:
         """Get current leaderboard as a pandas DataFrame"""
+        shared = self._read_shared_leaderboard()
+        if shared is not None:
+            # Columns straight from the published arrays, already in rank order
+            arrays = shared[3]
+            team_names = np.array(arrays['team_names'] + [''], dtype=object)
+            return pd.DataFrame({
+                'Username': arrays['usernames'],
+                'Team': team_names[arrays['team']],
+                'Points': arrays['points'],
+                'Perfect Predictions': arrays['perfect'],
+                'Loyalty Bonuses': arrays['loyalty']
+            })
+        
         if not self.players:  # If no players, return empty DataFrame with correct columns
             return pd.DataFrame(columns=['Username', 'Team', 'Points', 'Perfect Predictions', 'Loyalty Bonuses'])
         
@@ -299,6 +1383,232 @@ class GameData:
         df = pd.DataFrame(data)
         return df.sort_values('Points', ascending=False).reset_index(drop=True)
 
+    def _local_leaderboard(self) -> tuple:
+        """(entries, positions) ordered by this process's points, rebuilt only when the data version changes"""
+        with self.lock:
+            if self._leaderboard_cache is None or self._leaderboard_cache[0] != self.version:
+                entries = self._rank_players()
+                positions = {entry['username']: position for position, entry in enumerate(entries)}
+                self._leaderboard_cache = (self.version, entries, positions)
+            return self._leaderboard_cache[1:]
+
+    def _rank_players(self) -> list:
+        """Leaderboard entries of the players' current points, in rank order"""
+        ordered = sorted(self.players.items(), key=lambda item: item[1].get('points', 0), reverse=True)
+        entries = []
+        rank, previous_points = 0, None
+        for position, (username, player_data) in enumerate(ordered, start=1):
+            points = player_data.get('points', 0)
+            if points != previous_points:  # Tied players share a rank
+                rank, previous_points = position, points
+            entries.append({
+                'rank': rank,
+                'username': username,
+                'team': player_data['team'],
+                'points': points,
+                'perfect_predictions': player_data.get('perfect_predictions', 0),
+                'loyalty_bonus_count': player_data.get('loyalty_bonus_count', 0)
+            })
+        return entries
+
+    def _read_shared_leaderboard(self) -> tuple:
+        """(sequence, entries, positions, arrays) published in shared memory, None to compute locally"""
+        if self.shared_leaderboard is None:
+            return None
+        with self.lock:
+            sequence = self.shared_leaderboard.sequence()
+            if sequence is None:
+                return None
+            if self._shared_cache is None or self._shared_cache[0] != sequence:
+                arrays = self.shared_leaderboard.read()
+                if arrays is None:
+                    return None
+                team_names = arrays['team_names']
+                entries = [{
+                    'rank': rank,
+                    'username': username,
+                    'team': team_names[team] if team >= 0 else '',
+                    'points': points,
+                    'perfect_predictions': perfect,
+                    'loyalty_bonus_count': loyalty
+                } for username, rank, team, points, perfect, loyalty in zip(
+                    arrays['usernames'], arrays['ranks'].tolist(), arrays['team'].tolist(),
+                    arrays['points'].tolist(), arrays['perfect'].tolist(), arrays['loyalty'].tolist())]
+                positions = {entry['username']: position for position, entry in enumerate(entries)}
+                self._shared_cache = (arrays['sequence'], entries, positions, arrays)
+            return self._shared_cache
+
+    def _leaderboard(self) -> tuple:
+        """(cache key, entries, positions), from shared memory when another worker published it"""
+        shared = self._read_shared_leaderboard()
+        if shared is not None:
+            return ('shared', shared[0]), shared[1], shared[2]
+        with self.lock:
+            entries, positions = self._local_leaderboard()
+            return self.version, entries, positions
+
+    def publish_leaderboard(self):
+        """Share the saved leaderboard and team totals with the other workers on the host.
+        
+        Called by the process that saved, under the write locks, so publishes
+        follow the order of the saves and match the game_data.json they are tagged with.
+        """
+        if self.shared_leaderboard is None or self.read_only:
+            return
+        with self.writing():
+            entries, _ = self._local_leaderboard()
+            _, supporters, team_points = self._get_team_index()
+            teams = list(team_points)
+            try:
+                self.shared_leaderboard.publish(entries, teams, [len(supporters.get(team, [])) for team in teams],
+                                                [team_points[team] for team in teams],
+                                                self.players_token)
+            except (OSError, ValueError) as e:
+                # Other workers keep their last copy or compute their own
+                metrics.report_failure('shared_leaderboard', e, league=self.league)
+
+    def get_leaderboard_index(self) -> list:
+        """Get leaderboard entries ordered by points, rebuilt only when the data changes"""
+        return self._leaderboard()[1]
+
+    def search_leaderboard(self, search: str = "", team: str = None) -> list:
+        """Filter leaderboard entries by username substring and/or team, keeping rank order"""
+        key, entries, _ = self._leaderboard()
+        search = search.strip().lower()
+        if not search and not team:
+            return entries
+        
+        # Paging through one search reuses the filtered list until the data changes
+        cached = self._search_cache
+        if cached and cached[:3] == (key, search, team):
+            return cached[3]
+        matching = [
+            entry for entry in entries
+            if (not team or entry['team'] == team) and (not search or search in entry['username'].lower())
+        ]
+        self._search_cache = (key, search, team, matching)
+        return matching
+
+    def leaderboard_cache_key(self, *parts) -> str:
+        """Cache key of a view derived from the current leaderboard"""
+        # Keyed on the file the leaderboard was computed from rather than this process's
+        # version, so a node that hasn't reloaded another's save yet never fills the new
+        # key with its stale view; another worker's publish changes the shared source
+        shared = self._read_shared_leaderboard()
+        source = shared[3]['source'] if shared is not None else self.players_token
+        return self.cache.key(self.cache_namespace, 'leaderboard', source, *parts)
+
+    def get_leaderboard_page(self, page: int = 1, page_size: int = 50, search: str = "", team: str = None) -> dict:
+        """Get one page of the leaderboard, optionally filtered by username and team"""
+        page = max(page, 1)
+        key = self.leaderboard_cache_key('page', page, page_size, search.strip().lower(), team)
+        return self.cache.get_or_set(key, lambda: self._build_leaderboard_page(page, page_size, search, team))
+
+    def _build_leaderboard_page(self, page: int, page_size: int, search: str, team: str) -> dict:
+        entries = self.search_leaderboard(search, team)
+        start = (page - 1) * page_size
+        return {
+            'page': page,
+            'page_size': page_size,
+            'total': len(entries),
+            'entries': entries[start:start + page_size]
+        }
+
+    def get_user_rank(self, username: str) -> dict:
+        """Get a user's leaderboard entry including rank"""
+        _, entries, positions = self._leaderboard()
+        position = positions.get(username)
+        if position is None:
+            return {}
+        return {**entries[position], 'total_players': len(entries)}
+
+    def _title_odds_inputs(self) -> dict:
+        """Points, prediction history and remaining schedule in the arrays title_odds simulates"""
+        team_numbers = {team: number for number, team in enumerate(IPL_TEAMS)}
+        
+        def team_number(team):
+            return team_numbers.setdefault(team, len(team_numbers))
+        
+        with self.lock:
+            usernames = list(self.players)
+            rows = {username: row for row, username in enumerate(usernames)}
+            points = [self.players[username].get('points', 0) for username in usernames]
+            teams = [team_number(self.players[username]['team']) for username in usernames]
+            scored = [match_id for match_id in sorted(self.scored_matches) if self.matches.get(match_id, {}).get('result')]
+            remaining = [match_id for match_id, match in list(self.matches.items())
+                         if match_id not in self.scored_matches and not match.get('result')]
+        
+        # Hit counts per player over the scored matches, one shard at a time
+        predicted = np.zeros(len(usernames))
+        hits = np.zeros((len(usernames), len(PREDICTION_CATEGORIES)))
+        for match_id in scored:
+            match = self.matches[match_id]
+            for username, prediction in self.predictions.copy_shard(match_id).items():
+                row = rows.get(username)
+                if row is None:
+                    continue
+                if 'hits' in prediction:
+                    flags = prediction['hits']
+                else:
+                    # Scored before hits were kept per prediction, replay with the current team
+                    flags = score_prediction(prediction, match['result'], self.players[username]['team'],
+                                             match['is_playoff'])[1]
+                predicted[row] += 1
+                hits[row] += [bool(flags & HIT_FLAGS[category]) for category in PREDICTION_CATEGORIES]
+        
+        matches = []
+        for match_id in remaining:
+            match = self.matches[match_id]
+            picks = np.full(len(usernames), -1, dtype=np.int32)
+            for username, prediction in self.predictions.copy_shard(match_id).items():
+                if username in rows and prediction.get('winner'):
+                    picks[rows[username]] = team_number(prediction['winner'])
+            matches.append({
+                'team1': team_number(match['team1']),
+                'team2': team_number(match['team2']),
+                'is_playoff': match.get('is_playoff', False),
+                'open': self.is_prediction_open(match_id),
+                'picks': picks
+            })
+        
+        return {
+            'usernames': usernames,
+            'points': np.array(points, dtype=np.int32),
+            'teams': np.array(teams, dtype=np.int32),
+            'rates': hit_rates(predicted, hits),
+            # How often each player predicted a scored match, smoothed so newcomers aren't written off
+            'participation': (predicted + 1) / (len(scored) + 2),
+            'matches': matches
+        }
+
+    def get_title_odds(self, simulations: int = DEFAULT_SIMULATIONS, top_n: int = 3, workers: int = 1,
+                       seed: int = 0, max_age_seconds: float = 0) -> dict:
+        """Simulated chances of each player finishing first or in the top N, cached per data version.
+        
+        With max_age_seconds, odds computed that recently are reused while the schedule
+        and results are unchanged, so a busy prediction window doesn't rerun the
+        simulation after every saved prediction.
+        """
+        versions = (self.version, self.season_data.version)
+        cached = self._title_odds_cache
+        if cached and cached[0][1:] == (simulations, top_n, seed) and (
+                cached[0][0] == versions
+                or (cached[0][0][1] == versions[1] and time.monotonic() - cached[1] < max_age_seconds)):
+            return cached[2]
+        
+        inputs = self._title_odds_inputs()
+        odds = simulate_title_odds(inputs, simulations, top_n, seed, workers)
+        odds.sort(key=lambda entry: (-entry['win'], -entry['top_n'], -entry['points'], entry['username']))
+        result = {
+            'simulations': simulations,
+            'top_n': top_n,
+            'remaining_matches': len(inputs['matches']),
+            'odds': odds,
+            'ranks': {entry['username']: position for position, entry in enumerate(odds)}
+        }
+        self._title_odds_cache = ((versions, simulations, top_n, seed), time.monotonic(), result)
+        return result
+
     def get_available_teams(self) -> list:
         """Get list of teams that haven't been chosen yet"""
         chosen_teams = [player_data['team'] for player_data in self.players.values()]
@@ -306,20 +1616,22 @@ class GameData:
 
     def switch_team(self, username: str, new_team: str) -> bool:
         """Switch a player's team (allowed only once)"""
-        if username not in self.players:
-            return False, "Player not found"
-        
-        player = self.players[username]
-        if player['has_switched_team']:
-            return False, "You have already used your one-time team switch"
-        
-        if player['team'] == new_team:
-            return False, "You are already supporting this team"
-        
-        # Update player's team
-        player['has_switched_team'] = True
-        player['team'] = new_team
-        self.save_data()
+        with self.writing():
+            if username not in self.players:
+                return False, "Player not found"
+            
+            player = self.players[username]
+            if player['has_switched_team']:
+                return False, "You have already used your one-time team switch"
+            
+            if player['team'] == new_team:
+                return False, "You are already supporting this team"
+            
+            # Update player's team
+            player['has_switched_team'] = True
+            player['team'] = new_team
+            self.save_data()
+            self.publish_leaderboard()
         return True, "Team switched successfully"
 
     def get_player_info(self, username: str) -> dict:
@@ -336,6 +1648,10 @@ class GameData:
             }
         return {}
 
+    def search_players(self, query: str, teams: list = None, limit: int = 10) -> list:
+        """Ranked players matching a name, initials or alias, optionally limited to some teams"""
+        return self.season_data.get_player_index().search(query, teams, limit)
+
     def get_team_players(self, team_name):
         """Get players list for a team"""
         if team_name in self.team_players:
@@ -0,0 +1,206 @@
+"""Streaming exports of a league's predictions, per-match scores and leaderboard to CSV or Parquet.
+
+Rows come from generators over ``GameData`` that read one prediction shard at a
+time, straight from disk unless it is already loaded, and are encoded in chunks
+of ``chunk_size`` rows. Memory stays bounded by one chunk however many
+predictions a league has, and the first bytes are ready as soon as the first
+chunk is. Parquet needs the optional pyarrow package.
+
+Usage:
+    python exports.py predictions --league default --format csv --output predictions.csv
+    python exports.py leaderboard --format parquet --output leaderboard.parquet
+"""
+import argparse
+import csv
+import io
+import sys
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Only needed for Parquet exports
+    pa = None
+
+DEFAULT_CHUNK_SIZE = 10000
+FORMATS = {'csv': "text/csv", 'parquet': "application/vnd.apache.parquet"}
+
+# Hit flags stored on scored predictions, see data.HIT_FLAGS
+_HIT_COLUMNS = (('winner_correct', 1), ('top_scorer_correct', 2), ('top_wicket_taker_correct', 4),
+                ('loyalty_bonus', 8), ('perfect', 16))
+
+
+def iter_predictions(game_data):
+    """Every prediction, match by match in schedule order"""
+    order = game_data.season_data.get_schedule_order()
+    # Matches with predictions but no longer on the schedule go last
+    match_ids = [match_id for match_id in order if match_id in game_data.predictions]
+    match_ids += sorted(set(game_data.predictions.match_ids()) - set(match_ids))
+    for match_id in match_ids:
+        for username, prediction in game_data.predictions.iter_predictions(match_id):
+            yield {
+                'match_id': match_id,
+                'username': username,
+                'winner': prediction.get('winner'),
+                'top_scorer': prediction.get('top_scorer'),
+                'top_wicket_taker': prediction.get('top_wicket_taker'),
+                'points': prediction.get('points')
+            }
+
+
+def iter_scores(game_data):
+    """What each prediction of a scored match earned, with the parts it got right"""
+    for match_id in game_data.season_data.get_schedule_order():
+        if match_id not in game_data.scored_matches:
+            continue
+        match = game_data.get_match(match_id)
+        for username, prediction in game_data.predictions.iter_predictions(match_id):
+            hits = prediction.get('hits', 0)
+            yield {
+                'match_id': match_id,
+                'date': match.get('date'),
+                'is_playoff': bool(match.get('is_playoff', False)),
+                'username': username,
+                'points': prediction.get('points', 0),
+                **{column: bool(hits & flag) for column, flag in _HIT_COLUMNS}
+            }
+
+
+def iter_leaderboard(game_data):
+    """Leaderboard entries in rank order"""
+    for entry in game_data.get_leaderboard_index():
+        yield {
+            'rank': entry['rank'],
+            'username': entry['username'],
+            'team': entry['team'],
+            'points': entry['points'],
+            'perfect_predictions': entry['perfect_predictions'],
+            'loyalty_bonus_count': entry['loyalty_bonus_count']
+        }
+
+
+# Dataset name -> (row generator, {column: type}); types fix the Parquet schema up front,
+# so a first chunk of unscored predictions doesn't decide the type of 'points'
+DATASETS = {
+    'predictions': (iter_predictions, {'match_id': 'string', 'username': 'string', 'winner': 'string',
+                                       'top_scorer': 'string', 'top_wicket_taker': 'string', 'points': 'int'}),
+    'scores': (iter_scores, {'match_id': 'string', 'date': 'string', 'is_playoff': 'bool', 'username': 'string',
+                             'points': 'int', **{column: 'bool' for column, _ in _HIT_COLUMNS}}),
+    'leaderboard': (iter_leaderboard, {'rank': 'int', 'username': 'string', 'team': 'string', 'points': 'int',
+                                       'perfect_predictions': 'int', 'loyalty_bonus_count': 'int'})
+}
+
+
+def iter_chunks(rows, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Group rows into lists of at most chunk_size"""
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_csv(rows, columns: dict, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield UTF-8 CSV, a header and then one block of bytes per chunk of rows"""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=list(columns), lineterminator="\n")
+    writer.writeheader()
+    for chunk in iter_chunks(rows, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode('utf-8')
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode('utf-8')  # Header of an empty export
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file collecting what the Parquet writer produces until it is taken"""
+
+    def __init__(self):
+        super().__init__()
+        self.chunks = []
+        self.position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def stream_parquet(rows, columns: dict, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Yield a Parquet file, one row group per chunk of rows"""
+    if pa is None:
+        raise RuntimeError("Parquet exports need the pyarrow package (pip install pyarrow)")
+    types = {'string': pa.string(), 'int': pa.int64(), 'bool': pa.bool_()}
+    schema = pa.schema([(column, types[kind]) for column, kind in columns.items()])
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    for chunk in iter_chunks(rows, chunk_size):
+        writer.write_table(pa.Table.from_pylist(chunk, schema=schema))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+
+def export_stream(game_data, dataset: str, file_format: str = 'csv', chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Bytes of a dataset export, produced a chunk at a time"""
+    if dataset not in DATASETS:
+        raise ValueError(f"Unknown dataset {dataset!r}, expected one of {', '.join(DATASETS)}")
+    if file_format not in FORMATS:
+        raise ValueError(f"Unknown format {file_format!r}, expected one of {', '.join(FORMATS)}")
+    if file_format == 'parquet' and pa is None:
+        raise RuntimeError("Parquet exports need the pyarrow package (pip install pyarrow)")
+    rows_of, columns = DATASETS[dataset]
+    encode = stream_parquet if file_format == 'parquet' else stream_csv
+    return encode(rows_of(game_data), columns, chunk_size)
+
+
+def export_filename(game_data, dataset: str, file_format: str) -> str:
+    """Download name of an export"""
+    return f"{game_data.league}_{game_data.season}_{dataset}.{file_format}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export league data to CSV or Parquet")
+    parser.add_argument("dataset", choices=sorted(DATASETS))
+    parser.add_argument("--league", default="default")
+    parser.add_argument("--season", default="2025")
+    parser.add_argument("--format", dest="file_format", choices=sorted(FORMATS), default="csv")
+    parser.add_argument("--output", help="file to write, standard output when omitted")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args()
+
+    from data import GameData
+
+    game_data = GameData(args.league, args.season)
+    try:
+        chunks = export_stream(game_data, args.dataset, args.file_format, args.chunk_size)
+    except RuntimeError as e:
+        print(e)
+        sys.exit(1)
+    written = 0
+    with open(args.output, 'wb') if args.output else sys.stdout.buffer as out:
+        for chunk in chunks:
+            out.write(chunk)
+            written += len(chunk)
+    if args.output:
+        print(f"Wrote {written} bytes to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
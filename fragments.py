@@ -0,0 +1,204 @@
+"""Pre-rendered HTML for page sections that only change with their inputs.
+
+Streamlit reruns the whole script on every widget change, so anything built
+from logos, the stylesheet or the schedule is rendered once here and reused
+until its inputs (team, match ID, schedule file) change. Rendered fragments
+live in the app cache, so with a shared backend each is rendered once per
+cluster; logos are only read from disk once per process.
+"""
+import base64
+from functools import lru_cache
+
+from cache import cached
+from data import IPL_TEAMS, IPL_TEAMS_INFO, get_season_data
+
+PAGE_CSS = """
+    <style>
+    .main {
+        padding: 2rem;
+    }
+    .stButton>button {
+        width: 100%;
+    }
+    .st-emotion-cache-1y4p8pa {
+        max-width: 1200px;
+    }
+    .team-logo {
+        width: 100px;
+        height: 100px;
+        object-fit: contain;
+        margin: 10px;
+    }
+    .team-logo-small {
+        width: 30px;
+        height: 30px;
+        object-fit: contain;
+        vertical-align: middle;
+        margin-right: 5px;
+    }
+    .team-logo-icon {
+        display: inline-block;
+        width: 30px;
+        height: 30px;
+        background-size: contain;
+        background-repeat: no-repeat;
+        background-position: center;
+        vertical-align: middle;
+        margin-right: 5px;
+    }
+    .team-grid {
+        display: grid;
+        grid-template-columns: repeat(5, 1fr);
+        gap: 10px;
+    }
+    .team-card {
+        border: 2px solid #ddd;
+        border-radius: 10px;
+        padding: 10px;
+        margin: 5px;
+        text-align: center;
+        transition: transform 0.2s;
+        background-color: black;
+        color: white;
+    }
+    .team-card:hover {
+        transform: scale(1.05);
+        cursor: pointer;
+        box-shadow: 0 0 15px rgba(255, 255, 255, 0.2);
+    }
+    .team-card h4 {
+        color: white;
+        margin: 10px 0;
+    }
+    .prediction-card {
+        background-color: #f8f9fa;
+        border-radius: 10px;
+        padding: 15px;
+        margin: 10px 0;
+    }
+    .match-card {
+        border: 2px solid #ddd;
+        border-radius: 10px;
+        padding: 15px;
+        margin: 10px 0;
+        text-align: center;
+        background-color: black;
+        color: white;
+    }
+    .match-card img {
+        max-width: 80px;
+        margin: 10px;
+    }
+    .vs-text {
+        font-size: 24px;
+        margin: 0 20px;
+        font-weight: bold;
+        color: white;
+    }
+    .dialog-backdrop {
+        display: none;
+        position: fixed;
+        top: 0;
+        left: 0;
+        width: 100%;
+        height: 100%;
+        background: rgba(0,0,0,0.5);
+        z-index: 1000;
+    }
+    .dialog-content {
+        background: white;
+        padding: 20px;
+        border-radius: 10px;
+        position: fixed;
+        top: 50%;
+        left: 50%;
+        transform: translate(-50%, -50%);
+        z-index: 1001;
+    }
+    </style>
+"""
+
+RULES_MARKDOWN = """
+### Game Rules:
+1. **Team Selection**: Pick one IPL team at the start (first-come, first-served)
+2. **Predictions**: Before each match, predict:
+    - Match winner
+    - Highest run-scorer
+    - Highest wicket-taker
+3. **Scoring System**:
+    - Correct match winner: 10 points
+    - Correct highest run-scorer: 5 points
+    - Correct highest wicket-taker: 5 points
+    - Team loyalty bonus: 5 extra points
+    - Perfect prediction bonus: 10 points
+4. **Special Events**:
+    - Playoff matches: All points are doubled
+    - Trade window: One team switch allowed mid-season
+"""
+
+
+@lru_cache(maxsize=None)
+def logo_base64(team_name: str) -> str:
+    """Base64 encoded logo of a team, read from disk once per process"""
+    with open(IPL_TEAMS_INFO[team_name]["logo"], "rb") as img_file:
+        return base64.b64encode(img_file.read()).decode()
+
+
+@cached("fragments")
+def logo_css() -> str:
+    """Stylesheet embedding each team logo once so table rows can reference it by class"""
+    rules = []
+    for team, info in IPL_TEAMS_INFO.items():
+        try:
+            encoded = logo_base64(team)
+        except OSError:
+            continue  # Rows fall back to just the team name
+        rules.append(f".logo-{info['abbreviation'].lower()} {{ background-image: url(data:image/png;base64,{encoded}); }}")
+    return "<style>\n" + "\n".join(rules) + "\n</style>"
+
+
+@cached("fragments")
+def team_card_html(team_name: str, heading: str = "") -> str:
+    """Card with a team's logo, name and abbreviation"""
+    info = IPL_TEAMS_INFO[team_name]
+    heading_html = f"<h3>{heading}</h3>" if heading else ""
+    return f"""
+    <div class="team-card" style="border-color: {info['primary_color']}">
+        {heading_html}
+        <img src="data:image/png;base64,{logo_base64(team_name)}" class="team-logo" />
+        <h4>{team_name}</h4>
+        <p style="color: {info['primary_color']}">{info['abbreviation']}</p>
+    </div>
+    """
+
+
+@cached("fragments")
+def team_grid_html() -> str:
+    """All team cards in one five-column grid"""
+    cards = "".join(team_card_html(team) for team in IPL_TEAMS)
+    return f'<div class="team-grid">{cards}</div>'
+
+
+@cached("fragments")
+def match_card_html(season: str, match_id: str, matches_token: str) -> str:
+    """Match card with both team logos, keyed by the schedule file it was rendered from"""
+    match = get_season_data(season).matches.get(match_id)
+    if not match:
+        return ""
+    return f"""
+    <div class="match-card">
+        <div style="display: flex; align-items: center; justify-content: center;">
+            <div style="text-align: center;">
+                <img src="data:image/png;base64,{logo_base64(match['team1'])}" class="team-logo" />
+                <h4>{match['team1']}</h4>
+            </div>
+            <span class="vs-text">VS</span>
+            <div style="text-align: center;">
+                <img src="data:image/png;base64,{logo_base64(match['team2'])}" class="team-logo" />
+                <h4>{match['team2']}</h4>
+            </div>
+        </div>
+        <p style="text-align: center;">Match Date: {match['date']} {match.get('time', '')} IST</p>
+        <p style="text-align: center; color: red;">Predictions close at: {match['prediction_cutoff']} IST</p>
+    </div>
+    """
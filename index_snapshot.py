@@ -0,0 +1,62 @@
+"""Warm-start snapshots of the indexes GameData derives from its JSON files.
+
+A snapshot is one binary file: a fixed header (magic bytes, format version and
+the length of a JSON block), the JSON block with the signature (modification
+time and size) of every source file the indexes were built from, then the
+pickled indexes. It is read with a single read and used only if its format
+version and every signature match the files the caller loaded; otherwise the
+caller rebuilds the indexes and writes a new one.
+
+Snapshots are only ever read from the app's own data directory, written by the
+app itself, which is what makes unpickling them acceptable.
+"""
+import json
+import os
+import pickle
+import struct
+import threading
+
+MAGIC = b"IPLIDX\n"
+FORMAT_VERSION = 2  # Bump when the shape of the pickled indexes or the source block changes
+HEADER = struct.Struct("<7sHI")  # Magic, format version, source block length
+
+
+def write_index_snapshot(path: str, sources: dict, indexes: dict) -> int:
+    """Atomically write a snapshot tagged with the signatures of its source files, returns the bytes written"""
+    block = json.dumps(sources, sort_keys=True).encode('utf-8')
+    payload = pickle.dumps(indexes, protocol=pickle.HIGHEST_PROTOCOL)
+    # Processes starting together may all write the snapshot, each through its own temporary file
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(block)))
+        f.write(block)
+        f.write(payload)
+    os.replace(tmp_path, path)
+    return HEADER.size + len(block) + len(payload)
+
+
+def read_index_snapshot(path: str, sources: dict) -> dict:
+    """Indexes stored in a snapshot, or None if it is missing, stale or from another format"""
+    try:
+        with open(path, 'rb') as f:
+            content = f.read()
+    except FileNotFoundError:
+        return None
+    if len(content) < HEADER.size:
+        return None
+    magic, version, block_length = HEADER.unpack_from(content)
+    if magic != MAGIC or version != FORMAT_VERSION:
+        return None
+    block_end = HEADER.size + block_length
+    try:
+        stored = json.loads(content[HEADER.size:block_end])
+    except ValueError:
+        return None
+    # Signature tuples come back from JSON as lists
+    if stored != json.loads(json.dumps(sources)):
+        return None
+    try:
+        return pickle.loads(memoryview(content)[block_end:])
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # Truncated file or a class that has since moved, rebuild instead
+        return None
@@ -0,0 +1,99 @@
+"""Local load generator for the HTTP prediction API.
+
+Example:
+    uvicorn api:app --port 8000
+    python load_test_api.py --username alice --password secret --concurrency 50 --duration 30
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+import httpx
+
+
+class Stats:
+    """Collects per-endpoint latencies and errors"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+
+    def record(self, name: str, seconds: float, ok: bool):
+        self.latencies.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float):
+        total = sum(len(samples) for samples in self.latencies.values())
+        print(f"\n{total} requests in {elapsed:.1f}s -> {total / elapsed:.1f} requests/sec")
+        print(f"{'endpoint':<20}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for name, samples in sorted(self.latencies.items()):
+            if len(samples) > 1:
+                cuts = statistics.quantiles(samples, n=100)
+                p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+            else:
+                p50 = p95 = p99 = samples[0]
+            print(f"{name:<20}{len(samples):>8}{self.errors.get(name, 0):>8}"
+                  f"{p50 * 1000:>10.1f}{p95 * 1000:>10.1f}{p99 * 1000:>10.1f}")
+
+
+async def timed(stats: Stats, name: str, request):
+    """Run a request coroutine and record how long it took"""
+    start = time.perf_counter()
+    try:
+        response = await request
+        ok = response.status_code < 500
+    except httpx.HTTPError:
+        response, ok = None, False
+    stats.record(name, time.perf_counter() - start, ok)
+    return response
+
+
+async def worker(client: httpx.AsyncClient, args, stats: Stats, deadline: float):
+    """Log in once, then loop over the read-heavy endpoints with occasional submissions"""
+    response = await timed(stats, "POST /login", client.post(
+        "/login", json={"username": args.username, "password": args.password}))
+    if response is None or response.status_code != 200:
+        return
+    headers = {"Authorization": f"Bearer {response.json()['access_token']}"}
+
+    while time.monotonic() < deadline:
+        response = await timed(stats, "GET /matches/open", client.get("/matches/open"))
+        await timed(stats, "GET /leaderboard", client.get(
+            "/leaderboard", params={"page": random.randint(1, args.pages), "page_size": 50}))
+        await timed(stats, "GET /me/rank", client.get("/me/rank", headers=headers))
+
+        if response is not None and response.status_code == 200 and response.json() \
+                and random.random() < args.submit_ratio:
+            match = random.choice(response.json())
+            await timed(stats, "POST /predictions", client.post("/predictions", headers=headers, json={
+                "match_id": match["match_id"],
+                "winner": random.choice([match["team1"], match["team2"]]),
+                "top_scorer": "Load Test Batter",
+                "top_wicket_taker": "Load Test Bowler"
+            }))
+
+
+async def main(args):
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=30) as client:
+        start = time.monotonic()
+        deadline = start + args.duration
+        await asyncio.gather(*(worker(client, args, stats, deadline) for _ in range(args.concurrency)))
+        stats.report(time.monotonic() - start)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate load against the prediction API")
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--concurrency", type=int, default=20, help="number of simulated clients")
+    parser.add_argument("--duration", type=float, default=10, help="seconds to run")
+    parser.add_argument("--pages", type=int, default=5, help="leaderboard pages to spread reads over")
+    parser.add_argument("--submit-ratio", type=float, default=0.05,
+                        help="fraction of loops that also submit a prediction")
+    asyncio.run(main(parser.parse_args()))
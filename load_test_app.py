@@ -0,0 +1,317 @@
+"""Load harness that drives simulated users through the Streamlit app with AppTest.
+
+Every simulated user gets its own AppTest session and walks through
+login -> Join Game -> Make Prediction -> Leaderboard against a throwaway copy
+of synthetic data, all inside this one process, just like sessions share a
+real Streamlit server. Runs with the same --seed build identical data and make
+identical choices, so results can be compared before and after a storage or
+caching change.
+
+Example:
+    python load_test_app.py --users 50 --concurrency 10 --players 2000 --output before.json
+"""
+import argparse
+import bcrypt
+import gc
+import json
+import os
+import random
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from collections import deque
+from datetime import datetime, timedelta
+
+REPO_DIR = os.path.dirname(os.path.abspath(__file__))
+PASSWORD = "load-test"
+
+
+def current_rss_mb() -> float:
+    """Resident memory of this process in MB"""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except OSError:
+        # No procfs (macOS), fall back to the peak which is in bytes there
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 2 ** 20
+
+
+class Stats:
+    """Collects per-page latencies and errors"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.first_error = {}  # Example message per page, to tell failures apart
+
+    def record(self, name: str, seconds: float, ok: bool, detail: str = None):
+        self.latencies.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+            self.first_error.setdefault(name, detail)
+
+    def summary(self) -> dict:
+        pages = {}
+        for name, samples in sorted(self.latencies.items()):
+            if len(samples) > 1:
+                cuts = statistics.quantiles(samples, n=100)
+                p50, p95, p99 = cuts[49], cuts[94], cuts[98]
+            else:
+                p50 = p95 = p99 = samples[0]
+            pages[name] = {
+                'count': len(samples),
+                'errors': self.errors.get(name, 0),
+                'error_rate': self.errors.get(name, 0) / len(samples),
+                'p50_ms': p50 * 1000,
+                'p95_ms': p95 * 1000,
+                'p99_ms': p99 * 1000,
+                'first_error': self.first_error.get(name)
+            }
+        return pages
+
+
+def build_synthetic_data(workdir: str, args):
+    """Create users, players, a schedule and past predictions in workdir/data"""
+    os.makedirs(os.path.join(workdir, "data"), exist_ok=True)
+    shutil.copy(os.path.join(REPO_DIR, "data", "team_players.json"), os.path.join(workdir, "data", "team_players.json"))
+    os.symlink(os.path.join(REPO_DIR, "static"), os.path.join(workdir, "static"))
+
+    from data import IPL_TEAMS, get_game_data
+
+    rng = random.Random(args.seed)
+    # One hash for everyone keeps setup fast while logins still pay the full bcrypt cost
+    password_hash = bcrypt.hashpw(PASSWORD.encode('utf-8'), bcrypt.gensalt()).decode('utf-8')
+    usernames = [f"loaduser{i:05d}" for i in range(args.users)]
+    background = [f"player{i:06d}" for i in range(args.players)]
+    users = {username: {"password_hash": password_hash, "role": "user"} for username in usernames + background}
+    with open(os.path.join(workdir, "data", "users.json"), 'w') as f:
+        json.dump(users, f)
+
+    game_data = get_game_data()
+    game_data.players = {
+        username: {
+            'team': team, 'points': 0, 'perfect_predictions': 0, 'loyalty_bonus_count': 0,
+            'has_switched_team': False, 'original_team': team
+        }
+        for username, team in ((username, rng.choice(IPL_TEAMS)) for username in background)
+    }
+
+    today = datetime.now().date()
+    for number in range(1, args.scored_matches + args.open_matches + 1):
+        team1, team2 = rng.sample(IPL_TEAMS, 2)
+        # Scored matches lie in the past, open ones far enough ahead to stay open during the run
+        offset = number - args.scored_matches if number > args.scored_matches else number - 400
+        day = (today + timedelta(days=offset)).strftime("%Y-%m-%d")
+        game_data.matches[f"M{number}"] = {
+            'team1': team1,
+            'team2': team2,
+            'date': day,
+            'time': "19:30",
+            'prediction_cutoff': f"{day} 19:25",
+            'venue': "Load Test Ground",
+            'is_playoff': False,
+            'result': None
+        }
+    game_data.save_data()
+
+    def roster(team):
+        players = game_data.get_team_players(team)
+        return players['batsmen'] + players['bowlers'] + players['all_rounders'] or [f"{team} XI"]
+
+    for number in range(1, args.scored_matches + args.open_matches + 1):
+        match_id = f"M{number}"
+        match = game_data.matches[match_id]
+        squad = roster(match['team1']) + roster(match['team2'])
+        entries = [(match_id, username, {
+            'winner': rng.choice([match['team1'], match['team2']]),
+            'top_scorer': rng.choice(squad),
+            'top_wicket_taker': rng.choice(squad),
+            'timestamp': datetime.now().isoformat()
+        }) for username in background if rng.random() < args.prediction_ratio]
+        game_data.add_predictions_batch(entries)
+        if number <= args.scored_matches:
+            game_data.calculate_points(match_id, {
+                'winner': rng.choice([match['team1'], match['team2']]),
+                'top_scorer': rng.choice(squad),
+                'top_wicket_taker': rng.choice(squad)
+            })
+    return usernames
+
+
+def user_session(at, username: str, seed: int, args, stats: Stats):
+    """Walk one user through the app, yielding after every rerun so sessions can interleave"""
+    from data import IPL_TEAMS
+
+    rng = random.Random(seed)
+
+    def step(name: str, action):
+        start = time.perf_counter()
+        try:
+            action()
+            problems = [element.value for element in list(at.exception) + list(at.error)]
+        except Exception as e:
+            problems = [f"{type(e).__name__}: {e}"]
+        stats.record(name, time.perf_counter() - start, not problems, problems[0] if problems else None)
+        return not problems
+
+    def open_page(page):
+        at.sidebar.radio[0].set_value(page).run()
+
+    if not step("Home", at.run):
+        return
+    yield
+
+    def login():
+        next(field for field in at.text_input if field.label == "Username").input(username)
+        next(field for field in at.text_input if field.label == "Password").input(PASSWORD)
+        next(button for button in at.button if button.label == "Login").click().run()
+        # AppTest keeps the login form from before st.rerun in its tree; give those stale
+        # fields a value so the next run doesn't look them up in session state
+        for field in at.text_input:
+            field.set_value("")
+    if not step("Login", login):
+        return
+    yield
+
+    step("Join Game", lambda: open_page("Join Game"))
+    yield
+
+    def join():
+        at.selectbox[0].set_value(rng.choice(IPL_TEAMS))
+        next(button for button in at.button if button.label == "Join Game").click().run()
+    step("Join Game (submit)", join)
+    yield
+
+    if not step("Make Prediction", lambda: open_page("Make Prediction")):
+        return
+    yield
+
+    def predict():
+        match_select = at.selectbox[0]
+        match_select.set_value(rng.choice(match_select.options)).run()
+        winner = at.selectbox(key="winner_select")
+        winner.set_value(rng.choice(winner.options[1:])).run()
+        # Type a surname like a fan would, then pick from the ranked matches
+        scorer_query = at.text_input(key="scorer_select_query")
+        player_label = rng.choice(at.selectbox(key="scorer_select").options[1:])  # "Name (Role) - Team"
+        scorer_query.input(player_label.split(" (")[0].split()[-1]).run()
+        for key in ("scorer_select", "wicket_select"):
+            player = at.selectbox(key=key)
+            player.set_value(rng.choice(player.options[1:]))
+        next(button for button in at.button if button.label == "Submit Prediction").click().run()
+    step("Make Prediction (submit)", predict)
+    yield
+
+    step("Leaderboard", lambda: open_page("Leaderboard"))
+    yield
+
+    def next_page():
+        at.number_input(key="leaderboard_page").increment().run()
+    step("Leaderboard (next page)", next_page)
+
+
+def run_sessions(usernames: list, args, stats: Stats) -> list:
+    """Interleave the reruns of many sessions, keeping at most args.concurrency in flight.
+
+    AppTest drives a single global runtime, so sessions take turns rerun by rerun
+    rather than running in threads. Finished sessions are kept alive, like idle
+    browser tabs on a real server, so their memory shows up in the report.
+    """
+    from streamlit.testing.v1 import AppTest
+
+    waiting = deque(enumerate(usernames))
+    active = deque()
+    sessions = []
+    while waiting or active:
+        while waiting and len(active) < args.concurrency:
+            number, username = waiting.popleft()
+            at = AppTest.from_file(os.path.join(REPO_DIR, "app.py"), default_timeout=args.timeout)
+            sessions.append(at)
+            active.append(user_session(at, username, args.seed + number, args, stats))
+        session = active.popleft()
+        try:
+            next(session)
+            active.append(session)
+        except StopIteration:
+            pass
+    return sessions
+
+
+def main(args):
+    workdir = args.workdir or tempfile.mkdtemp(prefix="ipl-load-")
+    if os.path.exists(os.path.join(workdir, "data")):
+        sys.exit(f"{workdir} already has a data directory, pick an empty work directory")
+
+    # data.py and auth.py resolve their files at import time, relative to the working directory
+    os.makedirs(workdir, exist_ok=True)
+    os.environ["IPL_DATA_DIR"] = os.path.join(workdir, "data")
+    os.chdir(workdir)
+    sys.path.insert(0, REPO_DIR)
+
+    setup_start = time.perf_counter()
+    usernames = build_synthetic_data(workdir, args)
+    print(f"Synthetic data in {workdir}: {args.players} players, {args.scored_matches} scored "
+          f"and {args.open_matches} open matches ({time.perf_counter() - setup_start:.1f}s)")
+
+    # Warm imports and process-wide caches so the first session isn't billed for them
+    run_sessions(usernames[:1], args, Stats())
+    gc.collect()
+    rss_before = current_rss_mb()
+
+    stats = Stats()
+    start = time.perf_counter()
+    sessions = run_sessions(usernames[1:], args, stats)
+    elapsed = time.perf_counter() - start
+    gc.collect()
+    rss_after = current_rss_mb()
+
+    pages = stats.summary()
+    results = {
+        'config': {key: value for key, value in vars(args).items() if key not in ('output', 'workdir', 'keep')},
+        'sessions': len(sessions),
+        'elapsed_s': elapsed,
+        'rss_before_mb': rss_before,
+        'rss_after_mb': rss_after,
+        'rss_per_session_mb': (rss_after - rss_before) / max(len(sessions), 1),
+        'pages': pages
+    }
+
+    print(f"\n{len(sessions)} sessions in {elapsed:.1f}s, concurrency {args.concurrency}")
+    print(f"Memory: {rss_before:.1f} MB -> {rss_after:.1f} MB "
+          f"({results['rss_per_session_mb']:.2f} MB per live session)")
+    print(f"{'page':<28}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for name, page in pages.items():
+        print(f"{name:<28}{page['count']:>8}{page['errors']:>8}"
+              f"{page['p50_ms']:>10.1f}{page['p95_ms']:>10.1f}{page['p99_ms']:>10.1f}")
+    for name, page in pages.items():
+        if page['first_error']:
+            print(f"First error on {name}: {page['first_error']}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=4)
+        print(f"\nResults written to {args.output}")
+    if not args.keep and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Simulate concurrent Streamlit sessions with AppTest")
+    parser.add_argument("--users", type=int, default=20, help="number of simulated sessions")
+    parser.add_argument("--concurrency", type=int, default=4, help="sessions taking turns at the same time")
+    parser.add_argument("--players", type=int, default=500, help="synthetic players already in the league")
+    parser.add_argument("--scored-matches", type=int, default=10)
+    parser.add_argument("--open-matches", type=int, default=3)
+    parser.add_argument("--prediction-ratio", type=float, default=0.8,
+                        help="fraction of synthetic players predicting each match")
+    parser.add_argument("--seed", type=int, default=2025)
+    parser.add_argument("--timeout", type=float, default=60, help="seconds allowed per rerun")
+    parser.add_argument("--workdir", help="directory for the synthetic data, kept afterwards")
+    parser.add_argument("--keep", action="store_true", help="keep the temporary data directory")
+    parser.add_argument("--output", help="write results as JSON for comparing runs")
+    args = parser.parse_args()
+    args.output = os.path.abspath(args.output) if args.output else None
+    main(args)
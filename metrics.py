@@ -0,0 +1,171 @@
+"""Process-wide counters, histograms and a JSON-lines event log for game operations.
+
+Events are appended to ``IPL_EVENT_LOG`` (default ``<IPL_DATA_DIR>/events.log``),
+one JSON object per line, through one handle kept open per process. Once the
+file reaches ``IPL_EVENT_LOG_MAX_BYTES`` it is renamed to ``events.log.1``
+(older ones shift up to ``EVENT_LOG_BACKUPS``) and a new one is started.
+
+Metrics are rendered in the Prometheus text format by the API's
+``GET /metrics`` or, for the Streamlit app, by a small HTTP server started
+when ``IPL_METRICS_PORT`` is set.
+"""
+import json
+import os
+import threading
+import time
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+EVENT_LOG = os.getenv("IPL_EVENT_LOG", os.path.join(os.getenv("IPL_DATA_DIR", "data"), "events.log"))
+EVENT_LOG_MAX_BYTES = int(os.getenv("IPL_EVENT_LOG_MAX_BYTES", str(50 * 2 ** 20)))
+EVENT_LOG_BACKUPS = 3
+
+# Seconds, from a fast dict update up to a slow bcrypt or a large save
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+COUNT_BUCKETS = (1, 10, 100, 1000, 10000, 100000, 1000000)
+
+_lock = threading.Lock()
+_log_lock = threading.Lock()
+_log_file = None  # Open handle on EVENT_LOG, opened on the first event
+_counters = {}  # name -> {labels tuple: value}
+_histograms = {}  # name -> {labels tuple: [bucket counts, sum, count]}
+_buckets = {}  # histogram name -> bucket bounds
+_help = {}
+
+
+def _label_key(labels: dict) -> tuple:
+    return tuple(sorted((labels or {}).items()))
+
+
+def increment(name: str, value: float = 1, labels: dict = None, help_text: str = ""):
+    """Add to a counter"""
+    with _lock:
+        series = _counters.setdefault(name, {})
+        key = _label_key(labels)
+        series[key] = series.get(key, 0) + value
+        _help.setdefault(name, help_text)
+
+
+def observe(name: str, value: float, labels: dict = None, help_text: str = "", buckets: tuple = DEFAULT_BUCKETS):
+    """Record one sample in a histogram"""
+    with _lock:
+        bounds = _buckets.setdefault(name, buckets)
+        series = _histograms.setdefault(name, {})
+        key = _label_key(labels)
+        if key not in series:
+            series[key] = [[0] * len(bounds), 0.0, 0]
+        counts, _, _ = series[key]
+        for i, bound in enumerate(bounds):
+            if value <= bound:
+                counts[i] += 1
+        series[key][1] += value
+        series[key][2] += 1
+        _help.setdefault(name, help_text)
+
+
+def log_event(event: str, **fields):
+    """Append a structured event to the JSON-lines log"""
+    record = {'ts': datetime.now().isoformat(timespec='milliseconds'), 'event': event, **fields}
+    line = json.dumps(record, default=str) + "\n"
+    global _log_file
+    try:
+        with _log_lock:
+            if _log_file is None:
+                _log_file = open(EVENT_LOG, 'a')
+            _log_file.write(line)
+            _log_file.flush()
+            if _log_file.tell() >= EVENT_LOG_MAX_BYTES:
+                _rotate_log()
+    except OSError:
+        pass  # Losing an event must never break the operation it describes
+
+
+def _rotate_log():
+    """Start a new event log, keeping EVENT_LOG_BACKUPS old ones; called with _log_lock held"""
+    global _log_file
+    _log_file.close()
+    _log_file = None
+    try:
+        rotated = os.stat(EVENT_LOG).st_size < EVENT_LOG_MAX_BYTES
+    except FileNotFoundError:
+        rotated = True
+    # Another process sharing the file may have rotated it already, then only reopen
+    if not rotated:
+        for number in range(EVENT_LOG_BACKUPS - 1, 0, -1):
+            if os.path.exists(f"{EVENT_LOG}.{number}"):
+                os.replace(f"{EVENT_LOG}.{number}", f"{EVENT_LOG}.{number + 1}")
+        os.replace(EVENT_LOG, f"{EVENT_LOG}.1")
+    _log_file = open(EVENT_LOG, 'a')
+
+
+def report_failure(component: str, error: Exception, **fields):
+    """Count and log a failure in a background thread, which has no caller to raise to"""
+    increment('ipl_background_failures_total', 1, {'component': component},
+              "Failures of background threads by component")
+    log_event('background_failure', component=component, error=f"{type(error).__name__}: {error}", **fields)
+
+
+class Timer:
+    """Context manager measuring elapsed seconds"""
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        self.seconds = 0.0
+        return self
+
+    def __exit__(self, *exc_info):
+        self.seconds = time.perf_counter() - self.start
+        return False
+
+
+def _format_labels(key: tuple, extra: dict = None) -> str:
+    pairs = list(key) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    escaped = (f'{name}="{str(value).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+               for name, value in pairs)
+    return "{" + ",".join(escaped) + "}"
+
+
+def render_prometheus() -> str:
+    """All metrics in the Prometheus text exposition format"""
+    lines = []
+    with _lock:
+        for name, series in sorted(_counters.items()):
+            lines.append(f"# HELP {name} {_help.get(name, '')}")
+            lines.append(f"# TYPE {name} counter")
+            for key, value in sorted(series.items()):
+                lines.append(f"{name}{_format_labels(key)} {value}")
+        for name, series in sorted(_histograms.items()):
+            lines.append(f"# HELP {name} {_help.get(name, '')}")
+            lines.append(f"# TYPE {name} histogram")
+            for key, (counts, total, count) in sorted(series.items()):
+                for bound, bucket_count in zip(_buckets[name], counts):
+                    lines.append(f"{name}_bucket{_format_labels(key, {'le': bound})} {bucket_count}")
+                lines.append(f"{name}_bucket{_format_labels(key, {'le': '+Inf'})} {count}")
+                lines.append(f"{name}_sum{_format_labels(key)} {total}")
+                lines.append(f"{name}_count{_format_labels(key)} {count}")
+    return "\n".join(lines) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the console
+
+
+def start_metrics_server(port: int, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+    """Serve GET /metrics from a background thread"""
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    threading.Thread(target=server.serve_forever, name="metrics-server", daemon=True).start()
+    return server
@@ -0,0 +1,134 @@
+import re
+import unicodedata
+from collections import defaultdict
+from difflib import SequenceMatcher
+
+ROLES = {'batsmen': 'Batsman', 'bowlers': 'Bowler', 'all_rounders': 'All-rounder'}
+# Edit similarity (0-1) a typo needs to a name, alias or one of their words, "dhoine" scores 0.73 to "dhoni"
+MIN_SIMILARITY = 0.7
+
+
+def normalize(text: str) -> str:
+    """Lowercase, strip accents and punctuation so 'M.S. Dhoni' and 'ms dhoni' compare equal"""
+    text = unicodedata.normalize('NFKD', text).encode('ascii', 'ignore').decode()
+    return " ".join(re.sub(r"[^a-z0-9 ]", "", text.lower().replace(".", " ")).split())
+
+
+def trigrams(text: str) -> set:
+    """Character trigrams of each word, padded so word starts and ends count too"""
+    grams = set()
+    for word in text.split():
+        padded = f"  {word} "
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class PlayerSearchIndex:
+    """Prefix and trigram index over the season rosters.
+
+    Every player is indexed under their full name, each word of it, their
+    initials ("rs" for Rohit Sharma), first initial plus surname ("r sharma")
+    and any aliases from player_aliases.json ("hitman"). A query matches a
+    player when each of its words is a prefix of one of those keys; if that
+    finds nobody, every player sharing trigrams with the query is
+    ranked by edit similarity to catch typos ("kholi", "dhoine").
+    """
+
+    def __init__(self, team_players: dict, aliases: dict = None, max_prefix: int = 12):
+        self.max_prefix = max_prefix
+        self.players = []  # {'name', 'team', 'role'} in roster order
+        self.keys = []  # Normalised search keys per player
+        self.by_team = defaultdict(list)  # team -> player ids
+        self.prefixes = defaultdict(set)  # word prefix -> player ids
+        self.grams = defaultdict(set)  # trigram -> player ids
+        aliases = aliases or {}
+
+        for team, roster in team_players.items():
+            seen = set()
+            for role_key, role in ROLES.items():
+                for name in roster.get(role_key, []):
+                    if name not in seen:
+                        seen.add(name)
+                        self._add(name, team, role, aliases.get(name, []))
+
+    def _add(self, name: str, team: str, role: str, aliases: list):
+        player_id = len(self.players)
+        self.players.append({'name': name, 'team': team, 'role': role})
+        self.by_team[team].append(player_id)
+
+        words = normalize(name).split()
+        keys = {" ".join(words), "".join(word[0] for word in words)}
+        if len(words) > 1:
+            keys.add(f"{words[0][0]} {' '.join(words[1:])}")
+        keys.update(normalize(alias) for alias in aliases)
+        keys.discard("")
+        self.keys.append(keys)
+
+        for key in keys:
+            for word in set(key.split()) | {key}:
+                for length in range(1, min(len(word), self.max_prefix) + 1):
+                    self.prefixes[word[:length]].add(player_id)
+            for gram in trigrams(key):
+                self.grams[gram].add(player_id)
+
+    def _prefix_matches(self, words: list) -> set:
+        """Players for whom every query word starts one of their key words"""
+        matches = None
+        for word in words:
+            ids = self.prefixes.get(word[:self.max_prefix], set())
+            if len(word) > self.max_prefix:
+                # The index stops at max_prefix characters, check the rest directly
+                ids = {player_id for player_id in ids
+                       if any(part.startswith(word) for key in self.keys[player_id] for part in key.split())}
+            matches = ids if matches is None else matches & ids
+            if not matches:
+                return set()
+        return matches
+
+    def search(self, query: str, teams: list = None, limit: int = 10) -> list:
+        """Ranked players matching a query, optionally limited to some teams.
+
+        An empty query lists the rosters of the given teams.
+        """
+        query = normalize(query)
+        allowed = None
+        if teams:
+            allowed = {player_id for team in teams for player_id in self.by_team.get(team, [])}
+        if not query:
+            ids = [player_id for team in teams or self.by_team for player_id in self.by_team.get(team, [])]
+            return [{**self.players[player_id], 'score': 0.0} for player_id in ids]
+
+        scores = {}
+        for player_id in self._prefix_matches(query.split()):
+            if allowed is not None and player_id not in allowed:
+                continue
+            keys = self.keys[player_id]
+            if query in keys:
+                scores[player_id] = 4.0
+            elif any(key.startswith(query) for key in keys):
+                scores[player_id] = 3.0
+            elif any(set(query.split()) <= set(key.split()) for key in keys):
+                scores[player_id] = 2.0  # Whole words, e.g. a surname
+            else:
+                scores[player_id] = 1.0
+
+        if not scores:
+            shared = defaultdict(int)
+            for gram in trigrams(query):
+                for player_id in self.grams.get(gram, ()):
+                    if allowed is None or player_id in allowed:
+                        shared[player_id] += 1
+            # Every player sharing a couple of trigrams is compared, a common first letter
+            # shouldn't push the right player out before the edit similarity decides
+            for player_id, count in shared.items():
+                if count < 2:
+                    continue
+                similarity = max(
+                    SequenceMatcher(None, query, part).ratio()
+                    for key in self.keys[player_id] for part in set(key.split()) | {key}
+                )
+                if similarity >= MIN_SIMILARITY:
+                    scores[player_id] = similarity
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.players[item[0]]['name']))
+        return [{**self.players[player_id], 'score': score} for player_id, score in ranked[:limit]]
@@ -0,0 +1,229 @@
+import atexit
+import json
+import os
+import threading
+import time
+
+import metrics
+from data import record_prediction
+
+
+class PredictionQueue:
+    """In-process submission queue that group-commits predictions to GameData.
+
+    Every submission is validated against the match cutoff and earlier
+    predictions, appended to a write-ahead log and fsynced before it is
+    acknowledged. Submitters arriving while an fsync is running wait for the
+    next one, which then covers all of their entries. A background thread
+    then applies pending entries to GameData and saves once per batch, either
+    every ``flush_interval_ms`` or as soon as ``max_batch`` entries are waiting.
+    Entries still in the log after a crash are replayed on the next start, so an
+    acknowledged prediction is never lost even if its match has since locked.
+    """
+
+    def __init__(self, game_data, log_file: str = None,
+                 flush_interval_ms: int = 200, max_batch: int = 500, max_pending: int = 5000):
+        self.game_data = game_data
+        self.log_file = log_file or os.path.join(game_data.partition_dir, "prediction_queue.log")
+        self.flush_interval = flush_interval_ms / 1000
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+
+        self.pending = []  # Acknowledged entries not yet committed to GameData
+        self.pending_index = {}  # (match_id, username) -> prediction of the pending entries
+        self.condition = threading.Condition()
+        self.log_lock = threading.Lock()  # Serialises appends and log compaction
+        self.appended = 0  # Sequence number of the last entry written to the log
+        self.synced = 0  # Entries up to this sequence number are on disk
+        self.syncing = False  # An fsync is running, later entries wait for the next one
+        self.sync_condition = threading.Condition()
+        self.flush_lock = threading.Lock()  # Only one group commit at a time
+        self.stopped = False
+
+        os.makedirs(os.path.dirname(self.log_file) or '.', exist_ok=True)
+        self.recover()
+        self.log = open(self.log_file, 'a')
+
+        self.thread = threading.Thread(target=self._run, name="prediction-queue", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def recover(self) -> int:
+        """Replay entries left in the log by a previous process"""
+        if not os.path.exists(self.log_file):
+            return 0
+
+        entries = []
+        with open(self.log_file, 'r') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    break  # Torn final write, that entry was never acknowledged
+                entries.append((record['match_id'], record['username'], record['prediction']))
+
+        self.game_data.add_predictions_batch(entries)
+        with open(self.log_file, 'w') as f:
+            os.fsync(f.fileno())
+        return len(entries)
+
+    def submit(self, match_id: str, username: str, prediction: dict, timeout: float = 5.0):
+        """Validate and durably enqueue a prediction, returns (success, message)"""
+        if not self.game_data.is_prediction_open(match_id):
+            record_prediction(self.game_data.league, match_id, username, False, "closed")
+            return False, "Predictions for this match are closed."
+
+        # Backpressure: wait for the flusher to drain the queue before accepting more
+        deadline = time.monotonic() + timeout
+        with self.condition:
+            while len(self.pending) >= self.max_pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    record_prediction(self.game_data.league, match_id, username, False, "busy")
+                    return False, "Server is busy, please try again."
+                self.condition.notify_all()
+                self.condition.wait(remaining)
+
+            # The cutoff may have passed while waiting for room
+            if not self.game_data.is_prediction_open(match_id):
+                record_prediction(self.game_data.league, match_id, username, False, "closed")
+                return False, "Predictions for this match are closed."
+
+            # Checked under the condition, so two submissions of one user can't both pass
+            if self._get_prediction(match_id, username):
+                record_prediction(self.game_data.league, match_id, username, False, "duplicate")
+                return False, "Only one prediction is allowed per match."
+
+            record = {'match_id': match_id, 'username': username, 'prediction': prediction}
+            with self.log_lock:
+                self.log.write(json.dumps(record) + "\n")
+                self.appended += 1
+                sequence = self.appended
+            self.pending.append((match_id, username, prediction))
+            self.pending_index[(match_id, username)] = prediction
+
+            if len(self.pending) >= self.max_batch:
+                self.condition.notify_all()
+
+        self._sync(sequence)
+        record_prediction(self.game_data.league, match_id, username, True)
+        return True, "Prediction submitted successfully!"
+
+    def _sync(self, sequence: int):
+        """Return once the log is on disk up to an entry, sharing one fsync with concurrent submitters"""
+        with self.sync_condition:
+            while self.syncing and self.synced < sequence:
+                self.sync_condition.wait()
+            if self.synced >= sequence:
+                return
+            self.syncing = True
+
+        synced = self.synced
+        try:
+            with self.log_lock:
+                target = self.appended
+                self.log.flush()
+                # A duplicate descriptor stays valid if compaction swaps the log file meanwhile
+                fileno = os.dup(self.log.fileno())
+            try:
+                os.fsync(fileno)
+            finally:
+                os.close(fileno)
+            synced = target
+        finally:
+            with self.sync_condition:
+                self.synced = max(self.synced, synced)
+                self.syncing = False
+                self.sync_condition.notify_all()
+
+    def _get_prediction(self, match_id: str, username: str) -> dict:
+        prediction = self.pending_index.get((match_id, username))
+        if prediction is not None:
+            return prediction
+        return self.game_data.get_user_prediction(match_id, username)
+
+    def get_prediction(self, match_id: str, username: str) -> dict:
+        """Get a user's prediction, including ones not yet committed"""
+        with self.condition:
+            return self._get_prediction(match_id, username)
+
+    def pending_count(self) -> int:
+        """Number of acknowledged predictions waiting for the next group commit"""
+        with self.condition:
+            return len(self.pending)
+
+    def flush(self) -> int:
+        """Commit all pending predictions to GameData with a single save"""
+        with self.flush_lock:
+            with self.condition:
+                batch = self.pending
+                self.pending = []
+                with self.log_lock:
+                    self.log.flush()
+                    committed_offset = self.log.tell()
+                self.condition.notify_all()
+
+            if not batch:
+                return 0
+
+            try:
+                with metrics.Timer() as timer:
+                    self.game_data.add_predictions_batch(batch)
+            except Exception:
+                # Put the batch back in front so nothing acknowledged is dropped
+                with self.condition:
+                    self.pending = batch + self.pending
+                raise
+            with self.condition:
+                # Indexed until now, so a duplicate arriving mid-commit is still caught
+                for match_id, username, _ in batch:
+                    self.pending_index.pop((match_id, username), None)
+
+            self._compact_log(committed_offset)
+            labels = {'league': self.game_data.league}
+            metrics.observe('ipl_queue_commit_seconds', timer.seconds, labels, "Duration of one group commit")
+            metrics.observe('ipl_queue_commit_size', len(batch), labels, "Predictions per group commit",
+                            buckets=metrics.COUNT_BUCKETS)
+            return len(batch)
+
+    def _compact_log(self, committed_offset: int):
+        """Drop committed entries from the log, keeping anything appended since"""
+        with self.log_lock:
+            self.log.close()
+            with open(self.log_file, 'r') as f:
+                f.seek(committed_offset)
+                remainder = f.read()
+
+            tmp_file = self.log_file + ".tmp"
+            with open(tmp_file, 'w') as f:
+                f.write(remainder)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_file, self.log_file)
+            self.log = open(self.log_file, 'a')
+
+    def _run(self):
+        """Background loop that group-commits every interval or full batch"""
+        while True:
+            with self.condition:
+                if self.stopped:
+                    return
+                if len(self.pending) < self.max_batch:
+                    self.condition.wait(self.flush_interval)
+            try:
+                self.flush()
+            except Exception as e:
+                metrics.report_failure('prediction_queue', e, league=self.game_data.league)
+                time.sleep(self.flush_interval)
+
+    def close(self):
+        """Flush remaining predictions and stop the background thread"""
+        with self.condition:
+            if self.stopped:
+                return
+            self.stopped = True
+            self.condition.notify_all()
+        self.thread.join(timeout=5)
+        self.flush()
+        with self.log_lock:
+            self.log.close()
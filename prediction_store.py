@@ -0,0 +1,247 @@
+import json
+import os
+import threading
+from collections import OrderedDict
+from urllib.parse import quote, unquote
+
+from compression import replace_durably
+from stream_loader import iter_jsonl, iter_object_file, write_jsonl
+
+
+class PredictionStore:
+    """Predictions of one league partition, stored as one JSON Lines shard per match.
+
+    Shards are loaded on first access. Shards of matches that are still open stay
+    in memory; once a match is scored its shard only changes through a restore,
+    so at most ``max_scored_cached`` scored shards are kept, least recently used
+    first out. A small index file keeps per-match prediction counts so totals
+    never need to open every shard. Each shard line holds one user's prediction,
+    so a shard is read line by line straight into its dict.
+
+    Shards of matches past their cutoff are locked: set_prediction refuses them
+    unless the write is an acknowledged prediction replayed late, and scoring
+    only adds points to the predictions already there.
+    """
+
+    def __init__(self, shard_dir: str, scored_matches=(), locked_matches=(), max_scored_cached: int = 4):
+        self.shard_dir = shard_dir
+        self.index_file = os.path.join(shard_dir, "index.json")
+        self.max_scored_cached = max_scored_cached
+        self.lock = threading.RLock()
+        self.shards = OrderedDict()  # match_id -> {username: prediction}, most recently used last
+        self.dirty = set()  # Loaded shards with unsaved changes
+        self.scored = set(scored_matches)  # Shards that may be evicted
+        self.locked = set(locked_matches)  # Shards closed to new predictions
+        self.index_changed = False  # Counts changed without any shard being dirty, e.g. after a restore
+        os.makedirs(self.shard_dir, exist_ok=True)
+        self.counts = self._load_index()  # match_id -> number of predictions, for every shard
+
+    def _shard_path(self, match_id: str) -> str:
+        # Match IDs are admin-entered, so keep them filesystem safe
+        return os.path.join(self.shard_dir, quote(match_id, safe='') + ".jsonl")
+
+    def _legacy_shard_path(self, match_id: str) -> str:
+        # Shards written as a single JSON object before the line-delimited layout
+        return os.path.join(self.shard_dir, quote(match_id, safe='') + ".json")
+
+    def _read_shard(self, match_id: str) -> dict:
+        """Read a shard from disk one prediction at a time"""
+        path = self._shard_path(match_id)
+        if os.path.exists(path):
+            return {record['username']: record['prediction'] for _, record in iter_jsonl(path)}
+        legacy_path = self._legacy_shard_path(match_id)
+        if os.path.exists(legacy_path):
+            return dict(iter_object_file(legacy_path))
+        return {}
+
+    def _load_index(self) -> dict:
+        """Read shard counts, rebuilding them from the shards if the index is missing"""
+        if os.path.exists(self.index_file):
+            with open(self.index_file, 'r') as f:
+                return json.load(f)
+
+        counts = {}
+        for name in os.listdir(self.shard_dir):
+            if name.endswith(".jsonl"):
+                counts[unquote(name[:-len(".jsonl")])] = sum(1 for _ in iter_jsonl(os.path.join(self.shard_dir, name)))
+            elif name.endswith(".json") and name != "index.json":
+                match_id = unquote(name[:-len(".json")])
+                counts.setdefault(match_id, sum(1 for _ in iter_object_file(os.path.join(self.shard_dir, name))))
+        return counts
+
+    def _load_shard(self, match_id: str) -> dict:
+        """Get a shard, loading it from disk on first access"""
+        if match_id in self.shards:
+            self.shards.move_to_end(match_id)
+            return self.shards[match_id]
+
+        shard = self._read_shard(match_id) if match_id in self.counts else {}
+        self.shards[match_id] = shard
+        self._evict()
+        return shard
+
+    def _evict(self):
+        """Drop least recently used scored shards beyond the cache limit"""
+        loaded_scored = [match_id for match_id in self.shards
+                         if match_id in self.scored and match_id not in self.dirty]
+        for match_id in loaded_scored[:max(len(loaded_scored) - self.max_scored_cached, 0)]:
+            del self.shards[match_id]
+
+    def get(self, match_id: str, default=None):
+        """Get a match's predictions"""
+        with self.lock:
+            if match_id not in self.counts and match_id not in self.shards:
+                return default
+            return self._load_shard(match_id)
+
+    def __contains__(self, match_id: str) -> bool:
+        return match_id in self.counts
+
+    def __getitem__(self, match_id: str) -> dict:
+        shard = self.get(match_id)
+        if shard is None:
+            raise KeyError(match_id)
+        return shard
+
+    def match_ids(self) -> list:
+        """Get the IDs of all matches that have predictions"""
+        with self.lock:
+            return list(self.counts)
+
+    def items(self):
+        """Iterate over (match_id, predictions) loading one shard at a time"""
+        for match_id in self.match_ids():
+            yield match_id, self.get(match_id, {})
+
+    def iter_predictions(self, match_id: str):
+        """Yield (username, prediction) of a match, streaming from disk unless the shard is loaded"""
+        with self.lock:
+            shard = self.shards.get(match_id)
+            # Snapshot of the loaded shard, so writers don't change it under the caller
+            records = list(shard.items()) if shard is not None else None
+        if records is not None:
+            yield from records
+            return
+        path = self._shard_path(match_id)
+        if os.path.exists(path):
+            for _, record in iter_jsonl(path):
+                yield record['username'], record['prediction']
+        elif os.path.exists(self._legacy_shard_path(match_id)):
+            yield from iter_object_file(self._legacy_shard_path(match_id))
+
+    def values(self):
+        for _, shard in self.items():
+            yield shard
+
+    def count(self, match_id: str) -> int:
+        """Number of predictions for a match, without loading its shard"""
+        return self.counts.get(match_id, 0)
+
+    def total_count(self) -> int:
+        """Number of predictions across all matches, without loading any shard"""
+        return sum(self.counts.values())
+
+    def set_prediction(self, match_id: str, username: str, prediction: dict, late: bool = False):
+        """Store a user's prediction in the match shard, late=True for a replay into a locked shard"""
+        with self.lock:
+            if match_id in self.locked and not late:
+                raise ValueError(f"Predictions for match {match_id!r} are locked")
+            shard = self._load_shard(match_id)
+            shard[username] = prediction
+            self.counts[match_id] = len(shard)
+            self.dirty.add(match_id)
+
+    def set_score(self, match_id: str, username: str, points: int, hits: int):
+        """Record what a stored prediction earned, the one change a locked shard takes"""
+        with self.lock:
+            shard = self._load_shard(match_id)
+            shard[username] = {**shard[username], 'points': points, 'hits': hits}
+            self.dirty.add(match_id)
+
+    def lock_match(self, match_id: str):
+        """Close a match's shard to new predictions"""
+        with self.lock:
+            self.locked.add(match_id)
+
+    def mark_scored(self, match_id: str):
+        """Allow a match's shard to be evicted once saved"""
+        with self.lock:
+            self.scored.add(match_id)
+            self._evict()
+
+    def _shard_signature(self, match_id: str) -> tuple:
+        """(path, modification time, size) of a shard's file, None if it has none"""
+        for path in (self._shard_path(match_id), self._legacy_shard_path(match_id)):
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            return path, stat.st_mtime_ns, stat.st_size
+        return None
+
+    def capture(self) -> tuple:
+        """(copies of the loaded shards, {match_id: file signature} of the shards only on disk).
+        
+        Cheap enough to take under a caller's lock; the shards on disk are read
+        afterwards with read_if_unchanged.
+        """
+        with self.lock:
+            loaded = {match_id: dict(shard) for match_id, shard in self.shards.items()}
+            on_disk = {match_id: self._shard_signature(match_id) for match_id in self.counts
+                       if match_id not in self.shards}
+        return loaded, on_disk
+
+    def read_if_unchanged(self, match_id: str, signature: tuple) -> dict:
+        """A shard read from disk, None if its file changed since capture() took the signature"""
+        if signature is None:
+            return {}
+        try:
+            shard = self._read_shard(match_id)
+        except (OSError, ValueError):
+            return None  # Replaced or removed while being read
+        return shard if self._shard_signature(match_id) == signature else None
+
+    def copy_shard(self, match_id: str) -> dict:
+        """Shallow copy of a shard, served from memory if loaded or else read from disk"""
+        with self.lock:
+            if match_id in self.shards:
+                return dict(self.shards[match_id])
+        return dict(self.get(match_id, {}))
+
+    def replace_all(self, predictions: dict, scored_matches=()):
+        """Replace every shard, used when restoring a snapshot"""
+        with self.lock:
+            self.scored = set(scored_matches)
+            for match_id in list(self.counts):
+                if match_id not in predictions:
+                    for path in (self._shard_path(match_id), self._legacy_shard_path(match_id)):
+                        if os.path.exists(path):
+                            os.remove(path)
+            self.shards = OrderedDict((match_id, dict(shard)) for match_id, shard in predictions.items())
+            self.counts = {match_id: len(shard) for match_id, shard in predictions.items()}
+            self.dirty = set(predictions)
+            self.index_changed = True
+
+    def save(self) -> int:
+        """Write changed shards and the index, returns the number of bytes written"""
+        written = 0
+        with self.lock:
+            for match_id in self.dirty:
+                written += write_jsonl(self._shard_path(match_id), (
+                    {'username': username, 'prediction': prediction}
+                    for username, prediction in self.shards[match_id].items()
+                ))
+                # The shard now lives in the line-delimited file
+                legacy_path = self._legacy_shard_path(match_id)
+                if os.path.exists(legacy_path):
+                    os.remove(legacy_path)
+            if self.dirty or self.index_changed:
+                serialised = json.dumps(self.counts, indent=4)
+                with open(self.index_file + ".tmp", 'w') as f:
+                    f.write(serialised)
+                replace_durably(self.index_file + ".tmp", self.index_file)
+                written += len(serialised)
+            self.dirty = set()
+            self.index_changed = False
+            self._evict()
+        return written
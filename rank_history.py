@@ -0,0 +1,89 @@
+import os
+import threading
+
+import numpy as np
+
+
+class RankHistory:
+    """Leaderboard rank of every player after each scored match.
+
+    Stored as one compressed ``.npz`` file holding the usernames (in the order
+    they were first ranked), the scored match IDs and an int32 matrix with one
+    row of ranks per match. A rank of 0 means the player hadn't joined yet.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.lock = threading.Lock()
+        if os.path.exists(path):
+            with np.load(path, allow_pickle=False) as stored:
+                self.users = [str(username) for username in stored['users']]
+                self.match_ids = [str(match_id) for match_id in stored['matches']]
+                self.ranks = stored['ranks']
+        else:
+            self.users = []
+            self.match_ids = []
+            self.ranks = np.zeros((0, 0), dtype=np.int32)
+        self.columns = {username: column for column, username in enumerate(self.users)}
+
+    def record(self, match_id: str, leaderboard_entries: list, save: bool = True):
+        """Store everyone's rank after a match was scored, save=False leaves writing to a later record"""
+        with self.lock:
+            for entry in leaderboard_entries:
+                if entry['username'] not in self.columns:
+                    self.columns[entry['username']] = len(self.users)
+                    self.users.append(entry['username'])
+            if self.ranks.shape[1] < len(self.users):
+                self.ranks = np.pad(self.ranks, ((0, 0), (0, len(self.users) - self.ranks.shape[1])))
+
+            row = np.zeros(len(self.users), dtype=np.int32)
+            columns = np.fromiter((self.columns[entry['username']] for entry in leaderboard_entries),
+                                  dtype=np.int64, count=len(leaderboard_entries))
+            row[columns] = [entry['rank'] for entry in leaderboard_entries]
+
+            if match_id in self.match_ids:
+                # Re-scored after a restore, replace the earlier snapshot
+                self.ranks[self.match_ids.index(match_id)] = row
+            else:
+                self.match_ids.append(match_id)
+                self.ranks = np.vstack([self.ranks, row[np.newaxis, :]]).astype(np.int32)
+            if save:
+                self._save()
+
+    def truncate(self, scored_matches, save: bool = True) -> int:
+        """Drop the ranks recorded after matches that are no longer scored, returns how many"""
+        with self.lock:
+            keep = [row for row, match_id in enumerate(self.match_ids) if match_id in scored_matches]
+            removed = len(self.match_ids) - len(keep)
+            if removed:
+                self.match_ids = [self.match_ids[row] for row in keep]
+                self.ranks = self.ranks[keep]
+                if save:
+                    self._save()
+            return removed
+
+    def _save(self):
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez_compressed(f, users=np.array(self.users, dtype=str),
+                                matches=np.array(self.match_ids, dtype=str), ranks=self.ranks)
+        os.replace(tmp_path, self.path)
+
+    def get_rank_changes(self) -> dict:
+        """Places gained (positive) or lost since the previous scored match, per player"""
+        with self.lock:
+            if len(self.match_ids) < 2:
+                return {}
+            previous, latest = self.ranks[-2], self.ranks[-1]
+            ranked_both = (previous > 0) & (latest > 0)
+            deltas = previous - latest
+            return {self.users[column]: int(deltas[column]) for column in np.flatnonzero(ranked_both)}
+
+    def get_user_history(self, username: str) -> list:
+        """(match_id, rank) after each scored match since the player joined"""
+        with self.lock:
+            column = self.columns.get(username)
+            if column is None:
+                return []
+            series = self.ranks[:, column]
+            return [(self.match_ids[row], int(series[row])) for row in np.flatnonzero(series > 0)]
@@ -0,0 +1,93 @@
+"""Read-only replicas that follow the primary's data files.
+
+A replica serves the Home and Leaderboard pages from the same data directory
+as the primary (a shared volume or a synced copy) without ever writing to it.
+``ReplicaFollower`` polls the modification time and size of each data file;
+when one changes, only that part (schedule, rosters, players, prediction shards
+or rank history) is read again and swapped in whole, so readers see either the
+old or the new version of a part, never a mix. Polling works on any filesystem,
+including network volumes where inotify sees no events.
+
+Replica mode is enabled by pointing ``IPL_REPLICA_OF`` at the primary's URL.
+"""
+import threading
+import time
+
+import metrics
+
+DEFAULT_POLL_SECONDS = 2
+
+
+class ReplicaFollower:
+    """Background reload of one league partition whenever the primary changes its files"""
+
+    def __init__(self, game_data, poll_seconds: float = DEFAULT_POLL_SECONDS):
+        self.game_data = game_data
+        self.poll_seconds = poll_seconds
+        self.stop_event = threading.Event()
+        self.thread = None
+        self.last_check = time.time()  # The partition was loaded from the files as they were then
+        self.last_reload = None
+        self.pending_since = None  # Oldest change seen but not applied yet, e.g. a file caught mid-write
+        self.reloads = 0
+
+    def run_once(self) -> list:
+        """Reload whatever changed since the last check, returns the parts reloaded"""
+        checked_at = time.time()
+        reloaded = self.game_data.reload_changed()
+        if reloaded:
+            self.last_reload = checked_at
+            self.reloads += 1
+            labels = {'league': self.game_data.league}
+            for part in reloaded:
+                metrics.increment('ipl_replica_reloads_total', 1, {**labels, 'part': part},
+                                  "Parts of the data reloaded by a replica")
+            metrics.log_event('replica_reload', league=self.game_data.league, parts=reloaded)
+        pending = self.game_data.changed_files()
+        if pending:
+            written = min((signature[0] / 1e9 for signature in pending.values() if signature), default=checked_at)
+            self.pending_since = min(self.pending_since or written, written)
+        else:
+            self.pending_since = None
+        self.last_check = checked_at
+        return reloaded
+
+    def lag_seconds(self) -> float:
+        """How far this replica may trail the primary's files.
+
+        Up to date at the last check, it trails by at most the time since then;
+        with a change still unapplied, by the age of that change.
+        """
+        now = time.time()
+        if self.pending_since is not None:
+            return max(now - self.pending_since, 0.0)
+        return now - self.last_check
+
+    def status(self) -> dict:
+        """Replication state for status pages and monitoring"""
+        return {
+            'lag_seconds': self.lag_seconds(),
+            'last_check': self.last_check,
+            'last_reload': self.last_reload,
+            'reloads': self.reloads,
+            'pending': self.pending_since is not None
+        }
+
+    def start(self):
+        """Poll in a background thread"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name="replica-follower", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.poll_seconds):
+            try:
+                self.run_once()
+            except Exception as e:
+                metrics.report_failure('replica', e, league=self.game_data.league)
+            metrics.observe('ipl_replica_lag_seconds', self.lag_seconds(), {'league': self.game_data.league},
+                            "Replica lag behind the primary's files, sampled every poll")
@@ -0,0 +1,112 @@
+"""Bookkeeping of live Streamlit sessions so one server's memory can be planned.
+
+Heavy objects (GameData, AuthManager) are process-wide and only referenced
+from each session, so they are sized once as shared objects. Every rerun
+records the size of its own session's state (through the public
+st.session_state) and when it was last seen; sessions not seen for longer
+than the TTL are forgotten, since Streamlit gives no notice when one closes.
+"""
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+
+def estimate_size(obj, seen: set = None) -> int:
+    """Approximate deep size of an object in bytes, counting shared references once"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return sys.getsizeof(obj) + (obj.nbytes if obj.base is None else 0)
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        return int(obj.memory_usage(deep=True).sum()) if isinstance(obj, pd.DataFrame) \
+            else int(obj.memory_usage(deep=True))
+
+    size = sys.getsizeof(obj)
+    if isinstance(obj, dict):
+        size += sum(estimate_size(key, seen) + estimate_size(value, seen) for key, value in obj.items())
+    elif isinstance(obj, (list, tuple, set, frozenset)):
+        size += sum(estimate_size(item, seen) for item in obj)
+    elif hasattr(obj, '__dict__') and not isinstance(obj, type):
+        size += estimate_size(vars(obj), seen)
+    return size
+
+
+class SessionRegistry:
+    """Tracks live sessions and reports the memory they and the shared objects hold"""
+
+    def __init__(self, ttl_seconds: float = 1800, idle_seconds: float = 300, sweep_interval_seconds: float = 60):
+        self.ttl = ttl_seconds  # Sessions unseen this long are assumed closed
+        self.idle = idle_seconds  # Sessions unseen this long count as idle
+        self.sweep_interval = sweep_interval_seconds
+        self.lock = threading.Lock()
+        self.sessions = {}  # session_id -> {'username', 'last_seen', 'bytes'}
+        self.shared = {}  # name -> object shared by every session, counted once
+        self.expired = 0
+        self.last_sweep = time.monotonic()
+        self._stats_cache = None  # (computed at, stats), sizing shared objects walks all their data
+
+    def register_shared(self, name: str, obj):
+        """Record a process-wide object that sessions only reference"""
+        with self.lock:
+            self.shared[name] = obj
+
+    def touch(self, username: str = None):
+        """Mark the current session as active and record its state size, forgetting expired sessions now and then"""
+        ctx = get_script_run_ctx()
+        if ctx is None:
+            return
+        with self.lock:
+            shared_ids = {id(obj) for obj in self.shared.values()}
+        # Shared objects are marked as seen so the session isn't charged for referencing them
+        size = estimate_size(st.session_state.to_dict(), shared_ids)
+        now = time.monotonic()
+        with self.lock:
+            self.sessions[ctx.session_id] = {'username': username, 'last_seen': now, 'bytes': size}
+            sweep_due = now - self.last_sweep >= self.sweep_interval
+            if sweep_due:
+                self.last_sweep = now
+        if sweep_due:
+            self.expire()
+
+    def expire(self) -> int:
+        """Forget sessions unseen for longer than the TTL, returns how many"""
+        cutoff = time.monotonic() - self.ttl
+        with self.lock:
+            expired = [session_id for session_id, session in self.sessions.items() if session['last_seen'] < cutoff]
+            for session_id in expired:
+                del self.sessions[session_id]
+            self.expired += len(expired)
+        return len(expired)
+
+    def stats(self, max_age_seconds: float = 30) -> dict:
+        """Live and idle session counts with the memory held per session and by shared objects"""
+        if self._stats_cache and time.monotonic() - self._stats_cache[0] < max_age_seconds:
+            return self._stats_cache[1]
+
+        with self.lock:
+            sessions = list(self.sessions.values())
+            shared = dict(self.shared)
+            expired = self.expired
+
+        seen = set()
+        shared_bytes = {name: estimate_size(obj, seen) for name, obj in shared.items()}
+        session_bytes = [session['bytes'] for session in sessions]
+        idle_cutoff = time.monotonic() - self.idle
+        stats = {
+            'live_sessions': len(sessions),
+            'idle_sessions': sum(1 for session in sessions if session['last_seen'] < idle_cutoff),
+            'expired_sessions': expired,
+            'session_bytes_total': sum(session_bytes),
+            'session_bytes_max': max(session_bytes, default=0),
+            'shared_bytes': shared_bytes
+        }
+        self._stats_cache = (time.monotonic(), stats)
+        return stats
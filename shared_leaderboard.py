@@ -0,0 +1,270 @@
+"""Leaderboard and team totals published in shared memory for every worker process on a host.
+
+The process that changes points (scoring, joins, team switches) writes the
+leaderboard in rank order into a ``multiprocessing.shared_memory`` segment,
+tagged with a token of the saved file it was computed from; every other worker
+reads the same arrays instead of sorting its own copy of the players. Writes are guarded by a seqlock: the writer makes the sequence
+number odd, writes, then makes it even again, and readers retry whenever the
+number was odd or changed while they were copying. When the segment needs to
+grow the writer marks the old one retired and creates a bigger one, which
+readers then reattach to.
+
+Segment layout, all little-endian:
+    header          magic, layout version, retired flag, sequence, counts and capacities, source token
+    points          int32[player capacity], in rank order
+    ranks           int32[player capacity]
+    perfect         int32[player capacity]
+    loyalty         int32[player capacity]
+    team            int32[player capacity], index into the team names
+    team_supporters int32[team capacity]
+    team_points     int64[team capacity]
+    offsets         int32[player capacity + team capacity + 1], into the strings
+    strings         UTF-8 usernames followed by team names
+"""
+import hashlib
+import struct
+import time
+from contextlib import nullcontext
+from multiprocessing import resource_tracker, shared_memory
+
+try:
+    import fcntl
+except ImportError:  # Windows, where a single writer process is assumed
+    fcntl = None
+
+import numpy as np
+
+MAGIC = 0x49504C42  # "IPLB"
+LAYOUT_VERSION = 2
+# magic, layout, retired, sequence, players, teams, capacities x3, strings used, source token
+HEADER = struct.Struct("<IHHQIIIIII24s")
+HEADER_SIZE = 64
+SEQUENCE_OFFSET = 8
+SOURCE_OFFSET = 40
+SOURCE_SIZE = 24
+MAX_READ_ATTEMPTS = 20
+
+
+def segment_name(key: str) -> str:
+    """Short, filesystem-safe segment name for a league partition (macOS allows 31 characters)"""
+    return "ipl_lb_" + hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]
+
+
+def _layout(player_capacity: int, team_capacity: int, string_capacity: int) -> dict:
+    """Byte offset of every array for the given capacities"""
+    offsets = {}
+    position = HEADER_SIZE
+    for name, dtype, count in (
+        ('points', np.int32, player_capacity),
+        ('ranks', np.int32, player_capacity),
+        ('perfect', np.int32, player_capacity),
+        ('loyalty', np.int32, player_capacity),
+        ('team', np.int32, player_capacity),
+        ('team_supporters', np.int32, team_capacity),
+        ('team_points', np.int64, team_capacity),
+        ('offsets', np.int32, player_capacity + team_capacity + 1),
+        ('strings', np.uint8, string_capacity)
+    ):
+        position = (position + 7) // 8 * 8
+        offsets[name] = (position, dtype, count)
+        position += np.dtype(dtype).itemsize * count
+    offsets['size'] = position
+    return offsets
+
+
+def _unlink(segment: shared_memory.SharedMemory):
+    # unlink() also unregisters from the resource tracker, which complains about names it doesn't know
+    resource_tracker.register(segment._name, "shared_memory")
+    segment.unlink()
+
+
+def _attach(name: str) -> shared_memory.SharedMemory:
+    segment = shared_memory.SharedMemory(name=name)
+    # The resource tracker would unlink the segment when this process exits, even in readers
+    resource_tracker.unregister(segment._name, "shared_memory")
+    return segment
+
+
+class SharedLeaderboard:
+    """Writer and reader of one partition's shared leaderboard segment"""
+
+    def __init__(self, name: str, lock_file: str = None):
+        self.name = name
+        self.lock_file = lock_file  # Serialises writers in different processes
+        self.segment = None
+        self.layout = None
+
+    def _open(self) -> bool:
+        """Attach to the current segment if not attached yet, returns whether one is available"""
+        if self.segment is not None:
+            if not HEADER.unpack_from(self.segment.buf)[2]:
+                return True
+            self.close()  # The writer moved to a bigger segment
+        try:
+            segment = _attach(self.name)
+        except (FileNotFoundError, OSError):
+            return False
+        if len(segment.buf) < HEADER_SIZE:
+            segment.close()
+            return False
+        fields = HEADER.unpack_from(segment.buf)
+        if fields[0] != MAGIC or fields[1] != LAYOUT_VERSION:
+            segment.close()
+            return False
+        self.segment = segment
+        self.layout = _layout(fields[6], fields[7], fields[8])
+        return True
+
+    def _array(self, name: str) -> np.ndarray:
+        offset, dtype, count = self.layout[name]
+        return np.ndarray((count,), dtype=dtype, buffer=self.segment.buf, offset=offset)
+
+    def _sequence(self) -> int:
+        return struct.unpack_from("<Q", self.segment.buf, SEQUENCE_OFFSET)[0]
+
+    def _set_sequence(self, sequence: int):
+        struct.pack_into("<Q", self.segment.buf, SEQUENCE_OFFSET, sequence)
+
+    def sequence(self):
+        """Current publish sequence number, None if there is no segment to read"""
+        if not self._open():
+            return None
+        return self._sequence()
+
+    def source(self):
+        """Token the last publish was tagged with, None if there is no settled segment to read"""
+        if not self._open():
+            return None
+        for attempt in range(MAX_READ_ATTEMPTS):
+            before = self._sequence()
+            if before % 2 == 0 and before > 0:
+                source = struct.unpack_from(f"{SOURCE_SIZE}s", self.segment.buf, SOURCE_OFFSET)[0]
+                if self._sequence() == before:
+                    return source.rstrip(b"\0").decode('ascii')
+            time.sleep(0.001 * attempt)
+        return None
+
+    def publish(self, entries: list, team_names: list, team_supporters: list, team_points: list, source: str = ""):
+        """Write leaderboard entries (in rank order) and team totals for every reader.
+
+        ``source`` is a short ASCII token of the data they were computed from.
+        """
+        encoded = source.encode('ascii')
+        if len(encoded) > SOURCE_SIZE:
+            raise ValueError(f"Source token longer than {SOURCE_SIZE} bytes")
+        with open(self.lock_file, 'a') if self.lock_file else nullcontext() as lock:
+            if lock is not None and fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            self._write(entries, team_names, team_supporters, team_points, encoded)
+
+    def _write(self, entries: list, team_names: list, team_supporters: list, team_points: list, source: bytes):
+        names = [entry['username'].encode('utf-8') for entry in entries] + \
+                [team.encode('utf-8') for team in team_names]
+        team_numbers = {team: number for number, team in enumerate(team_names)}
+        string_bytes = sum(len(name) for name in names)
+
+        self._open()
+        if self.segment is None or len(entries) > self.layout['points'][2] \
+                or len(team_names) > self.layout['team_supporters'][2] \
+                or string_bytes > self.layout['strings'][2]:
+            self._create(max(1024, 2 * len(entries)), max(32, 2 * len(team_names)), max(1 << 16, 2 * string_bytes))
+
+        # Odd sequence: readers ignore what they copy until it is even again
+        sequence = self._sequence() + 1
+        self._set_sequence(sequence)
+        count = len(entries)
+        self._array('points')[:count] = [entry['points'] for entry in entries]
+        self._array('ranks')[:count] = [entry['rank'] for entry in entries]
+        self._array('perfect')[:count] = [entry['perfect_predictions'] for entry in entries]
+        self._array('loyalty')[:count] = [entry['loyalty_bonus_count'] for entry in entries]
+        self._array('team')[:count] = [team_numbers.get(entry['team'], -1) for entry in entries]
+        self._array('team_supporters')[:len(team_names)] = team_supporters
+        self._array('team_points')[:len(team_names)] = team_points
+        blob = b"".join(names)
+        self._array('offsets')[:len(names) + 1] = np.concatenate(
+            [[0], np.cumsum([len(name) for name in names], dtype=np.int64)])
+        self._array('strings')[:len(blob)] = np.frombuffer(blob, dtype=np.uint8)
+        struct.pack_into("<II", self.segment.buf, 16, count, len(team_names))
+        struct.pack_into("<I", self.segment.buf, 36, len(blob))
+        struct.pack_into(f"{SOURCE_SIZE}s", self.segment.buf, SOURCE_OFFSET, source)
+        self._set_sequence(sequence + 1)
+
+    def _create(self, player_capacity: int, team_capacity: int, string_capacity: int):
+        """Replace the segment with a bigger one, retiring the old one for its readers"""
+        # Readers key their caches on the sequence, so it keeps growing across segments
+        sequence = time.time_ns() // 2 * 2
+        if self.segment is not None:
+            sequence = max(sequence, self._sequence() + 2)
+            self.unlink()
+        else:
+            try:
+                # Left behind by an earlier writer; retire it so its readers let go
+                old = _attach(self.name)
+                struct.pack_into("<H", old.buf, 6, 1)
+                old.close()
+                _unlink(old)
+            except (FileNotFoundError, OSError):
+                pass
+
+        layout = _layout(player_capacity, team_capacity, string_capacity)
+        segment = shared_memory.SharedMemory(name=self.name, create=True, size=layout['size'])
+        # Outlive this process so readers keep the last published leaderboard across restarts
+        resource_tracker.unregister(segment._name, "shared_memory")
+        HEADER.pack_into(segment.buf, 0, MAGIC, LAYOUT_VERSION, 0, sequence, 0, 0,
+                         player_capacity, team_capacity, string_capacity, 0, b"")
+        self.segment = segment
+        self.layout = layout
+
+    def read(self) -> dict:
+        """Consistent copy of the published arrays, None if unavailable or never settled"""
+        if not self._open():
+            return None
+        for attempt in range(MAX_READ_ATTEMPTS):
+            before = self._sequence()
+            if before % 2 == 0 and before > 0:
+                players, teams = struct.unpack_from("<II", self.segment.buf, 16)
+                string_bytes = struct.unpack_from("<I", self.segment.buf, 36)[0]
+                source = struct.unpack_from(f"{SOURCE_SIZE}s", self.segment.buf, SOURCE_OFFSET)[0]
+                offsets = self._array('offsets')[:players + teams + 1].copy()
+                strings = bytes(self._array('strings')[:string_bytes])
+                copy = {
+                    'points': self._array('points')[:players].copy(),
+                    'ranks': self._array('ranks')[:players].copy(),
+                    'perfect': self._array('perfect')[:players].copy(),
+                    'loyalty': self._array('loyalty')[:players].copy(),
+                    'team': self._array('team')[:players].copy(),
+                    'team_supporters': self._array('team_supporters')[:teams].copy(),
+                    'team_points': self._array('team_points')[:teams].copy()
+                }
+                if self._sequence() == before:
+                    try:
+                        names = [strings[start:end].decode('utf-8')
+                                 for start, end in zip(offsets[:-1].tolist(), offsets[1:].tolist())]
+                    except UnicodeDecodeError:
+                        names = None  # Torn copy that still passed the check, try again
+                    if names is not None and len(names) == players + teams:
+                        copy['usernames'] = names[:players]
+                        copy['team_names'] = names[players:]
+                        copy['sequence'] = before
+                        copy['source'] = source.rstrip(b"\0").decode('ascii')
+                        return copy
+            time.sleep(0.001 * attempt)  # A write is in progress
+        return None
+
+    def close(self):
+        """Detach from the segment without removing it"""
+        if self.segment is not None:
+            self.segment.close()
+            self.segment = None
+            self.layout = None
+
+    def unlink(self):
+        """Retire and remove the segment, readers fall back to their own computation"""
+        if self.segment is not None:
+            struct.pack_into("<H", self.segment.buf, 6, 1)
+            segment = self.segment
+            self.close()
+            try:
+                _unlink(segment)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,279 @@
+"""Compressed, content-addressed snapshots of game state with point-in-time restore.
+
+Usage:
+    python snapshots.py snapshot
+    python snapshots.py list
+    python snapshots.py restore "2025-04-01 20:00"
+    python snapshots.py prune
+
+Restore rolls back a league's players, predictions and scoring. The schedule
+and results belong to the whole season and are left as they are: results
+entered after the snapshot are scored again on the restored predictions, so
+the league stays consistent with the schedule every other league sees. A
+wrongly entered result is fixed with GameData.correct_result instead, which
+takes back the points it gave in every league.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import threading
+from datetime import datetime
+
+import metrics
+from compression import COMPRESSION, open_binary_writer, read_bytes
+from data import DEFAULT_LEAGUE, DEFAULT_SEASON, GameData, IST
+
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S%f"
+CAPTURE_ATTEMPTS = 3  # Captures whose shards changed on disk mid-read, before copying them under the lock
+# Objects are gzipped, or written with IPL_STORAGE_COMPRESSION when it is set
+GZIP_SUFFIX = ".json.gz"
+COMPRESSED_SUFFIX = ".json.z"
+
+
+class SnapshotManager:
+    """Periodic snapshots of players, predictions and matches.
+
+    Each section is stored as a compressed JSON object named by the hash of
+    its contents, and predictions are split into one object per match. A
+    snapshot is a small manifest pointing at those objects, so consecutive
+    snapshots only write the objects that changed since the previous one.
+    """
+
+    def __init__(self, game_data, snapshot_dir: str = None, interval_minutes: float = 15,
+                 keep_last: int = 24, keep_daily: int = 14):
+        self.game_data = game_data
+        self.snapshot_dir = snapshot_dir or os.path.join(game_data.partition_dir, "snapshots")
+        self.objects_dir = os.path.join(self.snapshot_dir, "objects")
+        self.manifests_dir = os.path.join(self.snapshot_dir, "manifests")
+        self.interval = interval_minutes * 60
+        self.keep_last = keep_last  # Most recent snapshots always kept
+        self.keep_daily = keep_daily  # Days for which the last snapshot of the day is kept
+        self.last_version = None
+        self.snapshot_lock = threading.Lock()
+        self.stop_event = threading.Event()
+        self.thread = None
+        os.makedirs(self.objects_dir, exist_ok=True)
+        os.makedirs(self.manifests_dir, exist_ok=True)
+
+    def capture(self) -> tuple:
+        """Copy the live state without reading or serialising anything under the game lock.
+        
+        Players, scoring and the loaded shards are copied under the lock, which
+        prediction writes wait for; shards only on disk are read after releasing
+        it and kept if their files didn't change in between.
+        """
+        for attempt in range(CAPTURE_ATTEMPTS + 1):
+            with self.game_data.lock:
+                # Player and match dicts are updated in place, prediction dicts are replaced
+                players = {username: dict(player) for username, player in self.game_data.players.items()}
+                matches = {match_id: dict(match) for match_id, match in self.game_data.matches.items()}
+                scoring = {
+                    'scored_matches': sorted(self.game_data.scored_matches),
+                    'scored_results': dict(self.game_data.scored_results),
+                    'accuracy': dict(self.game_data.accuracy)
+                }
+                version = self.game_data.version
+                store = self.game_data.predictions
+                if attempt == CAPTURE_ATTEMPTS:
+                    # Shards keep changing under us, read them under the lock after all
+                    predictions = {match_id: store.copy_shard(match_id) for match_id in store.match_ids()}
+                    return version, players, matches, predictions, scoring
+                predictions, on_disk = store.capture()
+            for match_id, signature in on_disk.items():
+                shard = store.read_if_unchanged(match_id, signature)
+                if shard is None:
+                    break  # Saved since the capture, so it may not match the players above
+                predictions[match_id] = shard
+            else:
+                return version, players, matches, predictions, scoring
+
+    def _write_object(self, content) -> str:
+        """Store a JSON-serialisable value by content hash, returns the hash"""
+        payload = json.dumps(content, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        digest = hashlib.sha256(payload).hexdigest()
+        if self._find_object(digest) is None:
+            path = self._object_path(digest, COMPRESSED_SUFFIX if COMPRESSION else GZIP_SUFFIX)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            tmp_path = path + ".tmp"
+            if COMPRESSION:
+                with open_binary_writer(tmp_path) as f:
+                    f.write(payload)
+            else:
+                with open(tmp_path, 'wb') as f:
+                    with gzip.GzipFile(fileobj=f, mode='wb', mtime=0) as gz:
+                        gz.write(payload)
+            os.replace(tmp_path, path)
+        return digest
+
+    def _read_object(self, digest: str):
+        """Load a stored object by its hash"""
+        path = self._find_object(digest)
+        if path is None:
+            raise FileNotFoundError(f"Snapshot object {digest} is missing")
+        return json.loads(read_bytes(path).decode('utf-8'))
+
+    def _object_path(self, digest: str, suffix: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + suffix)
+
+    def _find_object(self, digest: str) -> str:
+        """Path of a stored object whichever way it was compressed, None if it isn't stored"""
+        for suffix in (COMPRESSED_SUFFIX, GZIP_SUFFIX):
+            path = self._object_path(digest, suffix)
+            if os.path.exists(path):
+                return path
+        return None
+
+    def take_snapshot(self, force: bool = False) -> dict:
+        """Write a snapshot if the data changed since the last one, returns its manifest"""
+        with self.snapshot_lock:
+            version, players, matches, predictions, scoring = self.capture()
+            if not force and version == self.last_version:
+                return {}
+
+            now = datetime.now(IST)
+            manifest = {
+                'timestamp': now.isoformat(),
+                'version': version,
+                'players': self._write_object(players),
+                'matches': self._write_object(matches),
+                'scoring': self._write_object(scoring),
+                'predictions': {match_id: self._write_object(preds) for match_id, preds in predictions.items()}
+            }
+            manifest_path = os.path.join(self.manifests_dir, now.strftime(TIMESTAMP_FORMAT) + ".json")
+            with open(manifest_path + ".tmp", 'w') as f:
+                json.dump(manifest, f, indent=4)
+            os.replace(manifest_path + ".tmp", manifest_path)
+            self.last_version = version
+            return manifest
+
+    def list_snapshots(self) -> list:
+        """Get all snapshot manifests, oldest first"""
+        manifests = []
+        for name in sorted(os.listdir(self.manifests_dir)):
+            if name.endswith(".json"):
+                with open(os.path.join(self.manifests_dir, name), 'r') as f:
+                    manifest = json.load(f)
+                manifest['name'] = name
+                manifests.append(manifest)
+        return manifests
+
+    def find_snapshot(self, timestamp: datetime) -> dict:
+        """Get the latest snapshot taken at or before a timestamp"""
+        candidates = [m for m in self.list_snapshots() if datetime.fromisoformat(m['timestamp']) <= timestamp]
+        return candidates[-1] if candidates else {}
+
+    def restore(self, timestamp: datetime):
+        """Restore game state to the latest snapshot at or before a timestamp, returns (success, message)"""
+        manifest = self.find_snapshot(timestamp)
+        if not manifest:
+            return False, f"No snapshot found at or before {timestamp:%Y-%m-%d %H:%M}"
+
+        players = self._read_object(manifest['players'])
+        predictions = {match_id: self._read_object(digest) for match_id, digest in manifest['predictions'].items()}
+        if 'scoring' in manifest:
+            scoring = self._read_object(manifest['scoring'])
+        else:
+            # Snapshots taken before leagues tracked their own scoring
+            matches = self._read_object(manifest['matches'])
+            scoring = {
+                'scored_matches': [match_id for match_id, match in matches.items() if match.get('result')],
+                'accuracy': {}
+            }
+
+        # Keep the state being replaced so the restore itself can be undone
+        self.take_snapshot(force=True)
+        with self.game_data.writing():
+            # The season's matches are shared with every other league and stay as they are
+            self.game_data.players = players
+            self.game_data.scored_matches = set(scoring['scored_matches'])
+            self.game_data.scored_results = scoring.get(
+                'scored_results', self.game_data._season_results(self.game_data.scored_matches))
+            self.game_data.predictions.replace_all(predictions, self.game_data.scored_matches)
+            self.game_data.accuracy = scoring['accuracy']
+            self.game_data._rebuild_consensus()
+            self.game_data.rank_history.truncate(self.game_data.scored_matches)
+            self.game_data.save_data()
+            # Results entered since the snapshot are scored again on the restored predictions
+            rescored = self.game_data.sync_results()
+            self.game_data.publish_leaderboard()
+        message = f"Restored snapshot taken at {manifest['timestamp']}"
+        if rescored:
+            message += f", {rescored} later results scored again"
+        return True, message
+
+    def prune(self) -> int:
+        """Apply the retention policy and delete objects no snapshot refers to, returns snapshots removed"""
+        with self.snapshot_lock:
+            manifests = self.list_snapshots()
+            keep = {m['name'] for m in manifests[-self.keep_last:]} if self.keep_last else set()
+
+            # Last snapshot of each of the most recent keep_daily days
+            by_day = {}
+            for manifest in manifests:
+                by_day[manifest['timestamp'][:10]] = manifest['name']
+            for day in sorted(by_day)[-self.keep_daily:] if self.keep_daily else []:
+                keep.add(by_day[day])
+
+            removed = 0
+            referenced = set()
+            for manifest in manifests:
+                if manifest['name'] in keep:
+                    referenced.update([manifest['players'], manifest['matches'], manifest.get('scoring'),
+                                       *manifest['predictions'].values()])
+                else:
+                    os.remove(os.path.join(self.manifests_dir, manifest['name']))
+                    removed += 1
+
+            for prefix in os.listdir(self.objects_dir):
+                prefix_dir = os.path.join(self.objects_dir, prefix)
+                for name in os.listdir(prefix_dir):
+                    if name.split(".")[0] not in referenced:
+                        os.remove(os.path.join(prefix_dir, name))
+            return removed
+
+    def start(self):
+        """Take snapshots in a background thread every interval"""
+        if self.thread and self.thread.is_alive():
+            return
+        self.thread = threading.Thread(target=self._run, name="snapshots", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+
+    def _run(self):
+        while not self.stop_event.wait(self.interval):
+            try:
+                if self.take_snapshot():
+                    self.prune()
+            except Exception as e:
+                metrics.report_failure('snapshots', e, league=self.game_data.league)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage game state snapshots")
+    parser.add_argument("command", choices=["snapshot", "list", "restore", "prune"])
+    parser.add_argument("timestamp", nargs="?", help='restore point in IST, e.g. "2025-04-01 20:00"')
+    parser.add_argument("--league", default=DEFAULT_LEAGUE)
+    parser.add_argument("--season", default=DEFAULT_SEASON)
+    parser.add_argument("--snapshot-dir", help="defaults to a snapshots folder next to the league's data")
+    args = parser.parse_args()
+
+    manager = SnapshotManager(GameData(args.league, args.season), snapshot_dir=args.snapshot_dir)
+    if args.command == "snapshot":
+        manifest = manager.take_snapshot(force=True)
+        print(f"Snapshot taken at {manifest['timestamp']}")
+    elif args.command == "list":
+        for manifest in manager.list_snapshots():
+            print(f"{manifest['timestamp']}  version {manifest['version']}  "
+                  f"{len(manifest['predictions'])} matches with predictions")
+    elif args.command == "restore":
+        if not args.timestamp:
+            parser.error("restore needs a timestamp")
+        restore_point = IST.localize(datetime.strptime(args.timestamp, "%Y-%m-%d %H:%M"))
+        success, message = manager.restore(restore_point)
+        print(message)
+    elif args.command == "prune":
+        print(f"Removed {manager.prune()} snapshots")
@@ -0,0 +1,332 @@
+"""Streaming readers for the data files, and an integrity check built on them.
+
+``JSONStream`` walks a JSON document one object member at a time, so a large
+file is turned into in-memory structures without first holding the parsed
+document (or the whole text) alongside them. Prediction shards are stored one
+prediction per line (JSON Lines) and are read a line at a time. Files written
+compressed (see compression.py) are decompressed as they are read.
+
+Usage:
+    python stream_loader.py verify --league default --season 2025
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from datetime import datetime
+from urllib.parse import unquote
+
+from compression import open_text, open_text_writer, replace_durably
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class JSONStream:
+    """Incremental reader of one JSON document.
+
+    ``iter_object()`` yields the keys of the object at the current position; for
+    each key the caller reads the value with ``value()`` or descends into it
+    with another ``iter_object()``. Only the member being decoded is buffered.
+    """
+
+    def __init__(self, f, chunk_size: int = 1 << 16):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.decoder = json.JSONDecoder()
+        self.buf = ""
+        self.pos = 0
+        self.offset = 0  # Characters dropped from the front of the buffer, for error positions
+        self.eof = False
+
+    def _read(self, size: int) -> bool:
+        """Append more of the file to the buffer, returns False at end of file"""
+        if self.pos > self.chunk_size:
+            self.offset += self.pos
+            self.buf = self.buf[self.pos:]
+            self.pos = 0
+        chunk = self.f.read(size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf += chunk
+        return True
+
+    def _error(self, message: str) -> ValueError:
+        return ValueError(f"{message} (character {self.offset + self.pos})")
+
+    def _peek(self) -> str:
+        """Next non-whitespace character, without consuming it"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self._read(self.chunk_size):
+                raise self._error("Unexpected end of file")
+
+    def _expect(self, char: str):
+        if self._peek() != char:
+            raise self._error(f"Expected {char!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the complete value at the current position"""
+        self._peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buf, self.pos)
+                # A number cut by the end of the buffer ("12" of "12.5e3") continues in the next chunk
+                if self.eof or (end < len(self.buf) and self.buf[end] not in '.eE+-'):
+                    self.pos = end
+                    return value
+            except json.JSONDecodeError as e:
+                truncated = len(self.buf) - e.pos < 8 or e.msg.startswith("Unterminated string")
+                if self.eof or not truncated:
+                    raise self._error(e.msg)
+            # Grow the read geometrically so a large value is not re-decoded once per chunk
+            self._read(max(self.chunk_size, len(self.buf) - self.pos))
+
+    def iter_object(self):
+        """Yield the keys of the object at the current position, the caller consumes each value"""
+        self._expect('{')
+        if self._peek() == '}':
+            self.pos += 1
+            return
+        while True:
+            if self._peek() != '"':
+                raise self._error("Expected a string key")
+            key = self.value()
+            self._expect(':')
+            yield key
+            separator = self._peek()
+            if separator not in ',}':
+                raise self._error("Expected ',' or '}'")
+            self.pos += 1
+            if separator == '}':
+                return
+
+    def finish(self):
+        """Check that nothing but whitespace follows the document"""
+        while True:
+            self.pos = _WHITESPACE.match(self.buf, self.pos).end()
+            if self.pos < len(self.buf):
+                raise self._error("Extra data after the document")
+            if not self._read(self.chunk_size):
+                return
+
+
+def iter_jsonl(path: str):
+    """Yield (line number, record) from a JSON Lines file"""
+    with open_text(path) as f:
+        for number, line in enumerate(f, start=1):
+            if line.strip():
+                yield number, json.loads(line)
+
+
+def write_jsonl(path: str, records) -> int:
+    """Atomically write records one per line, compressed if configured; returns the number of bytes written"""
+    with open_text_writer(path + ".tmp") as f:
+        for record in records:
+            f.write(json.dumps(record, separators=(',', ':')) + "\n")
+    written = os.path.getsize(path + ".tmp")
+    replace_durably(path + ".tmp", path)
+    return written
+
+
+def iter_object_file(path: str):
+    """Yield (key, value) for each member of a file holding one JSON object"""
+    with open_text(path) as f:
+        stream = JSONStream(f)
+        for key in stream.iter_object():
+            yield key, stream.value()
+        stream.finish()
+
+
+def load_game_file(path: str, on_prediction=None) -> dict:
+    """Read game_data.json a member at a time.
+
+    Players are decoded one by one into the result. Predictions kept inline by
+    older files are handed to ``on_prediction(match_id, username, prediction)``
+    as they are parsed instead of being collected.
+    """
+    data = {'players': {}}
+    with open_text(path) as f:
+        stream = JSONStream(f)
+        for key in stream.iter_object():
+            if key == 'players':
+                for username in stream.iter_object():
+                    data['players'][username] = stream.value()
+            elif key == 'predictions':
+                for match_id in stream.iter_object():
+                    for username in stream.iter_object():
+                        prediction = stream.value()
+                        if on_prediction is not None:
+                            on_prediction(match_id, username, prediction)
+                data['predictions'] = True  # Only whether inline predictions were present
+            else:
+                data[key] = stream.value()
+        stream.finish()
+    return data
+
+
+# Checks for verify, each returns a problem description or None
+
+PLAYER_FIELDS = {'team': str, 'points': int, 'perfect_predictions': int, 'loyalty_bonus_count': int,
+                 'has_switched_team': bool, 'original_team': str}
+REQUIRED_PLAYER_FIELDS = ('team', 'points')  # Older files lack the rest
+PREDICTION_FIELDS = ('winner', 'top_scorer', 'top_wicket_taker')
+
+
+def check_player(username, player) -> str:
+    if not isinstance(player, dict):
+        return f"player {username!r} is not an object"
+    for field in REQUIRED_PLAYER_FIELDS:
+        if field not in player:
+            return f"player {username!r} has no {field!r}"
+    for field, kind in PLAYER_FIELDS.items():
+        if field in player and not isinstance(player[field], kind):
+            return f"player {username!r} has a non-{kind.__name__} {field!r}"
+    return None
+
+
+def check_prediction(match_id, username, prediction) -> str:
+    if not isinstance(username, str) or not username:
+        return f"match {match_id!r} has a prediction without a username"
+    if not isinstance(prediction, dict):
+        return f"prediction of {username!r} for {match_id!r} is not an object"
+    for field in PREDICTION_FIELDS:
+        if not isinstance(prediction.get(field), str):
+            return f"prediction of {username!r} for {match_id!r} has no {field!r}"
+    if 'points' in prediction and not isinstance(prediction['points'], int):
+        return f"prediction of {username!r} for {match_id!r} has non-integer points"
+    return None
+
+
+def check_match(match_id, match) -> str:
+    if not isinstance(match, dict):
+        return f"match {match_id!r} is not an object"
+    for field in ('team1', 'team2', 'date', 'prediction_cutoff'):
+        if not isinstance(match.get(field), str):
+            return f"match {match_id!r} has no {field!r}"
+    try:
+        datetime.strptime(match['prediction_cutoff'], "%Y-%m-%d %H:%M")
+    except ValueError:
+        return f"match {match_id!r} has an invalid prediction_cutoff"
+    return None
+
+
+def verify_partition(partition_dir: str, matches_file: str, max_problems: int = 50) -> dict:
+    """Check a league partition's files record by record, in constant memory.
+
+    Returns counts of what was read and a list of problems found (at most
+    max_problems are described, all are counted).
+    """
+    report = {'players': 0, 'matches': 0, 'shards': 0, 'predictions': 0, 'problem_count': 0, 'problems': []}
+
+    def problem(message):
+        if message:
+            report['problem_count'] += 1
+            if len(report['problems']) < max_problems:
+                report['problems'].append(message)
+
+    def check_file(path, check):
+        try:
+            check()
+        except (OSError, ValueError) as e:
+            problem(f"{path}: {e}")
+
+    def check_matches():
+        for match_id, match in iter_object_file(matches_file):
+            report['matches'] += 1
+            problem(check_match(match_id, match))
+
+    def check_game_file():
+        with open_text(game_file) as f:
+            stream = JSONStream(f)
+            for key in stream.iter_object():
+                if key == 'players':
+                    for username in stream.iter_object():
+                        report['players'] += 1
+                        problem(check_player(username, stream.value()))
+                elif key == 'predictions':
+                    for match_id in stream.iter_object():
+                        for username in stream.iter_object():
+                            report['predictions'] += 1
+                            problem(check_prediction(match_id, username, stream.value()))
+                elif key == 'scored_matches':
+                    scored = stream.value()
+                    if not isinstance(scored, list) or not all(isinstance(match_id, str) for match_id in scored):
+                        problem(f"{game_file}: scored_matches is not a list of match IDs")
+                else:
+                    stream.value()
+            stream.finish()
+
+    if os.path.exists(matches_file):
+        check_file(matches_file, check_matches)
+    game_file = os.path.join(partition_dir, "game_data.json")
+    if os.path.exists(game_file):
+        check_file(game_file, check_game_file)
+
+    shard_dir = os.path.join(partition_dir, "predictions")
+    index_file = os.path.join(shard_dir, "index.json")
+    counts = {}
+    if os.path.exists(index_file):
+        try:
+            counts = {match_id: count for match_id, count in iter_object_file(index_file)}
+        except (OSError, ValueError) as e:
+            problem(f"{index_file}: {e}")
+    if os.path.isdir(shard_dir):
+        for name in sorted(os.listdir(shard_dir)):
+            path = os.path.join(shard_dir, name)
+            if name.endswith(".jsonl"):
+                match_id = unquote(name[:-len(".jsonl")])
+                records = ((record.get('username'), record.get('prediction'))
+                           for _, record in iter_jsonl(path))
+            elif name.endswith(".json") and name != "index.json":
+                match_id = unquote(name[:-len(".json")])
+                records = iter_object_file(path)  # Shard from before the line-delimited layout
+            else:
+                continue
+            report['shards'] += 1
+            found = 0
+            try:
+                for username, prediction in records:
+                    found += 1
+                    problem(check_prediction(match_id, username, prediction))
+            except (OSError, ValueError, AttributeError) as e:
+                problem(f"{path}: {e}")
+            report['predictions'] += found
+            if match_id in counts and counts[match_id] != found:
+                problem(f"{path}: index counts {counts[match_id]} predictions, shard has {found}")
+            counts.pop(match_id, None)
+    for match_id, count in counts.items():
+        if count:
+            problem(f"{index_file}: lists {count} predictions for {match_id!r} but there is no shard")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Streaming checks of the game data files")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    verify_parser = subparsers.add_parser("verify", help="check file integrity record by record")
+    verify_parser.add_argument("--league", default="default")
+    verify_parser.add_argument("--season", default="2025")
+    args = parser.parse_args()
+
+    from data import get_partition_dir, get_season_dir
+
+    if args.command == "verify":
+        partition_dir = get_partition_dir(args.league, args.season)
+        report = verify_partition(partition_dir, os.path.join(get_season_dir(args.season), "matches.json"))
+        print(f"Checked {report['matches']} matches, {report['players']} players, "
+              f"{report['predictions']} predictions in {report['shards']} shards")
+        for message in report['problems']:
+            print(f"  {message}")
+        if report['problem_count']:
+            print(f"{report['problem_count']} problems found")
+            sys.exit(1)
+        print("No problems found")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+import os
+import sys
+from datetime import datetime, timedelta
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cache  # noqa: E402
+import data  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def data_dir(tmp_path, monkeypatch):
+    """Run every test against an empty data directory and a fresh process cache"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(data, 'DATA_DIR', "data")
+    monkeypatch.setattr(data, '_seasons', {})
+    monkeypatch.setattr(data, '_partitions', {})
+    cache.set_cache(cache.MemoryCache())
+    return tmp_path / "data"
+
+
+def future_match(team1: str = "Mumbai Indians", team2: str = "Chennai Super Kings", days: int = 7) -> dict:
+    """Match record starting some days from now"""
+    start = datetime.now(data.IST) + timedelta(days=days)
+    return data.make_match(team1, team2, start.strftime("%Y-%m-%d"), start.strftime("%H:%M"))
+
+
+def make_game(players: dict = None, matches: dict = None, league: str = data.DEFAULT_LEAGUE) -> 'data.GameData':
+    """Saved partition with players ({username: team}) and matches ({match_id: record})"""
+    game_data = data.get_game_data(league)
+    for match_id, record in (matches or {}).items():
+        game_data.matches[match_id] = {**record, 'status': 'scheduled', 'result': {}}
+    for username, team in (players or {}).items():
+        game_data.add_player(username, team)
+    game_data.save_data()
+    return game_data
+
+
+PREDICTION = {'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}
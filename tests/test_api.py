@@ -0,0 +1,110 @@
+import asyncio
+import os
+
+import pytest
+from starlette.testclient import TestClient
+
+import data
+from auth import AuthManager
+from conftest import future_match, make_game
+from data import GameData
+
+
+@pytest.fixture
+def api(data_dir, monkeypatch):
+    """The API module with fresh accounts and no league partitions started yet"""
+    import api
+    auth_manager = AuthManager()
+    auth_manager.create_user('alice', "secret")
+    monkeypatch.setattr(api, 'auth_manager', auth_manager)
+    monkeypatch.setattr(api, 'prediction_queues', {})
+    monkeypatch.setattr(api, 'cutoff_schedulers', {})
+    yield api
+    api.close_queues()
+
+
+def headers(api, username: str) -> dict:
+    return {'Authorization': f"Bearer {api.auth_manager.create_access_token(username)}"}
+
+
+def test_unknown_league_is_not_found(api, data_dir):
+    make_game()
+    client = TestClient(api.app)
+    for league in ("office", "../etc", "x" * 41):
+        response = client.get("/leaderboard", params={'league': league})
+        assert response.status_code == 404
+        assert response.json() == {'detail': "League not found"}
+    assert not os.path.exists(data_dir / "leagues")
+    assert api.prediction_queues == {}
+
+
+def test_admin_creates_league(api):
+    make_game()
+    client = TestClient(api.app)
+    assert client.post("/admin/leagues", json={'league': "office"}, headers=headers(api, 'alice')).status_code == 403
+    response = client.post("/admin/leagues", json={'league': "office"}, headers=headers(api, 'admin'))
+    assert response.status_code == 201
+    assert client.post("/admin/leagues", json={'league': "office"}, headers=headers(api, 'admin')).status_code == 409
+    assert client.post("/admin/leagues", json={'league': "a b"}, headers=headers(api, 'admin')).status_code == 400
+    assert client.get("/leaderboard", params={'league': "office"}).status_code == 200
+
+
+def test_second_prediction_is_rejected(api):
+    make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    client = TestClient(api.app)
+    body = {'match_id': "M1", 'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma",
+            'top_wicket_taker': "Jasprit Bumrah"}
+    assert client.post("/predictions", json=body, headers=headers(api, 'alice')).status_code == 201
+    response = client.post("/predictions", json=body, headers=headers(api, 'alice'))
+    assert response.status_code == 409
+    assert "one prediction" in response.json()['detail']
+
+
+def test_reads_see_what_another_process_saved(api):
+    make_game()
+    client = TestClient(api.app)
+    assert client.get("/matches/open").json() == []
+
+    # The Streamlit process adds a match and a player after the API loaded the league
+    data._seasons.clear()  # Nothing is shared with another process but the files
+    app_process = GameData()
+    with app_process.writing():
+        app_process.matches['M1'] = {**future_match(), 'status': 'scheduled', 'result': {}}
+        app_process.save_data()
+    app_process.add_player('alice', "Mumbai Indians")
+
+    assert [match['match_id'] for match in client.get("/matches/open").json()] == ['M1']
+    body = {'match_id': "M1", 'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma",
+            'top_wicket_taker': "Jasprit Bumrah"}
+    assert client.post("/predictions", json=body, headers=headers(api, 'alice')).status_code == 201
+
+
+def test_non_object_bodies_are_rejected(api):
+    make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    client = TestClient(api.app)
+    for body in ([], "alice", 3):
+        assert client.post("/login", json=body).status_code == 400
+        response = client.post("/predictions", json=body, headers=headers(api, 'alice'))
+        assert response.status_code == 400
+        assert response.json() == {'detail': "Body must be a JSON object"}
+
+
+def test_partitions_are_opened_off_the_event_loop(api, monkeypatch):
+    make_game()
+    open_partition = api.open_partition
+    on_event_loop = []
+
+    def tracking_open(league):
+        try:
+            asyncio.get_running_loop()
+            on_event_loop.append(True)
+        except RuntimeError:
+            on_event_loop.append(False)
+        return open_partition(league)
+
+    monkeypatch.setattr(api, 'open_partition', tracking_open)
+    client = TestClient(api.app)
+    assert client.get("/leaderboard").status_code == 200
+    assert client.get("/matches/open").status_code == 200
+    assert on_event_loop == [False, False]
+    assert set(api.prediction_queues) == {'default'}
@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import compression
+from archive import all_time_leaderboard, head_to_head
+from conftest import PREDICTION, future_match, make_game
+from data import GameData, list_archived_seasons
+
+RESULT = {'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}
+CSK_PREDICTION = {'winner': "Chennai Super Kings", 'top_scorer': "MS Dhoni", 'top_wicket_taker': "Deepak Chahar"}
+
+
+def scored_season() -> GameData:
+    """alice scores 35 on M1, bob 5 on M1 and 35 on M2, which alice didn't predict"""
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"},
+                          {'M1': future_match(), 'M2': future_match(days=8)})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.add_prediction('M1', 'bob', {**CSK_PREDICTION, 'top_scorer': "Rohit Sharma"})
+    game_data.add_prediction('M2', 'bob', CSK_PREDICTION)
+    game_data.score_results({'M1': RESULT, 'M2': CSK_PREDICTION})
+    return game_data
+
+
+@pytest.mark.parametrize("codec", ["", "zlib"])
+def test_archive_reads_back_the_scored_season(data_dir, monkeypatch, codec):
+    monkeypatch.setattr(compression, 'COMPRESSION', codec)
+    game_data = scored_season()
+    game_data.export_archive()
+    assert list_archived_seasons() == [game_data.season]
+
+    archive = GameData.open_archive()
+    assert archive.match_ids.tolist() == ['M1', 'M2']
+    assert isinstance(archive.points, np.memmap) == (not codec)  # Compressed arrays are read into memory
+    assert archive.get_leaderboard_page(1, 10) == game_data.get_leaderboard_page(1, 10)
+    assert archive.get_user_rank('bob') == {**game_data.get_user_rank('bob'), 'total_players': 2}
+
+
+def test_head_to_head_counts_only_matches_both_predicted(data_dir):
+    scored_season().export_archive()
+    archive = GameData.open_archive()
+    assert head_to_head([archive], 'alice', 'bob') == {
+        'matches': 1, 'wins_a': 1, 'wins_b': 0, 'ties': 0, 'points_a': 35, 'points_b': 5
+    }
+    assert head_to_head([archive], 'alice', 'carol')['matches'] == 0
+
+
+def test_all_time_leaderboard_adds_up_seasons(data_dir):
+    scored_season().export_archive()
+    archive = GameData.open_archive()
+    table = all_time_leaderboard([archive, archive])
+    assert table['Username'].tolist() == ['bob', 'alice']
+    assert table['Points'].tolist() == [80, 70]
+    assert table['Seasons'].tolist() == [2, 2]
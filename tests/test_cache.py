@@ -0,0 +1,129 @@
+import fnmatch
+import time
+
+import pytest
+
+import cache
+import data
+import fragments
+import metrics
+from conftest import make_game
+from data import GameData, SeasonData
+
+
+class StandInRedis:
+    """The part of the redis-py client RedisCache uses, kept in a dict"""
+
+    def __init__(self):
+        self.values = {}  # key -> (value, expires at or None)
+        self.down = False
+
+    def _check(self):
+        if self.down:
+            raise ConnectionRefusedError("Connection refused")
+
+    def get(self, key):
+        self._check()
+        value, expires = self.values.get(key, (None, None))
+        if expires is not None and expires <= time.monotonic():
+            del self.values[key]
+            return None
+        return value
+
+    def set(self, key, value, px=None):
+        self._check()
+        self.values[key] = (value if isinstance(value, bytes) else str(value).encode(),
+                            time.monotonic() + px / 1000 if px is not None else None)
+        return True
+
+    def incr(self, key):
+        self._check()
+        value = int(self.get(key) or 0) + 1
+        self.values[key] = (str(value).encode(), None)
+        return value
+
+    def delete(self, key):
+        self._check()
+        return int(self.values.pop(key, None) is not None)
+
+    def scan_iter(self, match="*", count=None):
+        self._check()
+        return [key for key in list(self.values) if fnmatch.fnmatchcase(key, match)]
+
+
+@pytest.fixture
+def redis_client():
+    client = StandInRedis()
+    cache.set_cache(cache.RedisCache(client))
+    return client
+
+
+def test_entries_expire_with_their_ttl(redis_client):
+    shared = cache.get_cache()
+    shared.set("ipl:a", {'value': 1}, ttl=0.05)
+    assert shared.get("ipl:a") == {'value': 1}
+    time.sleep(0.06)
+    assert shared.get("ipl:a", "missing") == "missing"
+
+
+def test_bump_retires_the_namespace_on_every_node(redis_client):
+    first, second = cache.RedisCache(redis_client), cache.RedisCache(redis_client)
+    key = first.key("league:default:2025", 'page', 1)
+    first.set(key, "old page")
+    assert second.get(second.key("league:default:2025", 'page', 1)) == "old page"
+
+    second.bump("league:default:2025")
+    assert first.get(first.key("league:default:2025", 'page', 1)) is None
+
+
+def test_clear_leaves_other_keys_alone(redis_client):
+    redis_client.set("other:key", b"kept")
+    shared = cache.get_cache()
+    shared.set(shared.key("season:2025", 'open'), [1, 2])
+    shared.clear()
+    assert list(redis_client.values) == ["other:key"]
+
+
+def test_a_server_that_is_down_makes_lookups_miss(redis_client):
+    shared = cache.get_cache()
+    redis_client.down = True
+    assert shared.key("season:2025", 'open') is None
+    assert shared.get_or_set(None, lambda: "computed") == "computed"
+
+    failures = metrics._counters.get('ipl_background_failures_total', {}).get((('component', 'cache'),), 0)
+    assert shared.bump("season:2025") is None
+    assert metrics._counters['ipl_background_failures_total'][(('component', 'cache'),)] == failures + 1
+
+
+def test_a_node_behind_on_reloads_never_serves_its_page_to_others(redis_client):
+    make_game({'alice': "Mumbai Indians", 'bob': "Punjab Kings"})
+    node_a, node_b = GameData(), GameData()
+
+    with node_a.writing():
+        node_a.players['bob']['points'] = 50
+        node_a.save_data()
+    # Node B hasn't reloaded the save yet and caches the page it still sees
+    stale = node_b.get_leaderboard_page()
+    assert stale['entries'][0]['points'] == 0
+
+    page = node_a.get_leaderboard_page()
+    assert [entry['username'] for entry in page['entries']] == ['bob', 'alice']
+    assert page['entries'][0]['points'] == 50
+
+
+def test_match_cards_follow_the_schedule_file_not_the_version(redis_client, monkeypatch):
+    monkeypatch.setattr(fragments, 'logo_base64', lambda team: "")
+    node_a, node_b = SeasonData(), SeasonData()
+    for node, teams in ((node_a, ("Mumbai Indians", "Punjab Kings")), (node_b, ("Delhi Capitals", "Gujarat Titans"))):
+        with node.writing(reload=False):
+            node.matches['M1'] = data.make_match(*teams, "2025-04-01", "19:30")
+            node.save_data()
+    # Both nodes wrote the schedule once, so their version counters agree
+    assert node_a.version == node_b.version
+
+    rendered = {}
+    for name, node in (('a', node_a), ('b', node_b)):
+        data._seasons[node.season] = node
+        rendered[name] = fragments.match_card_html(node.season, 'M1', node.matches_token)
+    assert "Mumbai Indians" in rendered['a']
+    assert "Delhi Capitals" in rendered['b']
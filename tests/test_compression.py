@@ -0,0 +1,143 @@
+import gzip
+import json
+import os
+
+import pytest
+
+import compression
+from compression import (MAGIC, NO_DICTIONARY, current_dictionary, is_compressed, open_binary_writer, open_text,
+                         read_bytes, save_dictionary, train_dictionary, training_samples, write_text)
+
+PLAYERS = {f"player{number}": {'team': "Mumbai Indians", 'points': number, 'perfect_predictions': 0,
+                               'loyalty_bonus_count': 0, 'has_switched_team': False, 'original_team': "Mumbai Indians"}
+           for number in range(40)}
+SHARD = "".join(json.dumps({'username': f"player{number}", 'prediction': {
+    'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}}) + "\n"
+                for number in range(40))
+
+
+@pytest.fixture(autouse=True)
+def dictionary_dir(tmp_path, monkeypatch):
+    """Dictionaries of the test only, as a freshly started process sees them"""
+    path = str(tmp_path / "dictionaries")
+    monkeypatch.setattr(compression, 'DICTIONARY_DIR', path)
+    monkeypatch.setattr(compression, '_dictionaries', {})
+    monkeypatch.setattr(compression, '_current', None)
+    return path
+
+
+def train(tmp_path, text: str, name: str = "sample.json") -> str:
+    path = str(tmp_path / name)
+    with open(path, 'w') as f:
+        f.write(text)
+    return save_dictionary('zlib', train_dictionary('zlib', training_samples([path], 512)))
+
+
+def test_zlib_round_trip_without_a_dictionary(tmp_path):
+    path = str(tmp_path / "game_data.json")
+    text = json.dumps({'players': PLAYERS}, indent=4)
+    written = write_text(path, text, 'zlib')
+
+    assert is_compressed(path) and written < len(text)
+    with open(path, 'rb') as f:
+        assert f.read(len(MAGIC) + 1 + len(NO_DICTIONARY)) == MAGIC + b"d" + NO_DICTIONARY
+    assert read_bytes(path).decode('utf-8') == text
+
+
+def test_zlib_round_trip_with_a_dictionary(tmp_path):
+    dictionary_id = train(tmp_path, json.dumps({'players': PLAYERS}))
+    path = str(tmp_path / "M1.jsonl")
+    written = write_text(path, SHARD, 'zlib')
+
+    with open(path, 'rb') as f:
+        assert f.read(len(MAGIC) + 1 + len(NO_DICTIONARY))[5:].hex() == dictionary_id
+    assert read_bytes(path).decode('utf-8') == SHARD
+    # The repeated keys come from the dictionary instead of the file
+    without = str(tmp_path / "without.jsonl")
+    with open_binary_writer(without, 'zlib', use_dictionary=False) as f:
+        f.write(SHARD.encode('utf-8'))
+    assert written < os.path.getsize(without)
+    with open_text(path) as f:
+        assert f.readline() == SHARD.splitlines(keepends=True)[0]
+
+
+def test_a_directory_can_mix_plain_gzip_and_compressed_files(tmp_path):
+    train(tmp_path, SHARD)
+    text = json.dumps({'players': PLAYERS})
+    paths = {name: str(tmp_path / name) for name in ("plain.json", "object.json.gz", "zlib.json")}
+    write_text(paths["plain.json"], text, '')
+    with gzip.open(paths["object.json.gz"], 'wb') as f:
+        f.write(text.encode('utf-8'))
+    write_text(paths["zlib.json"], text, 'zlib')
+
+    assert [is_compressed(path) for path in paths.values()] == [False, True, True]
+    for path in paths.values():
+        with open_text(path) as f:
+            assert json.load(f) == {'players': PLAYERS}
+
+
+def test_files_stay_readable_after_retraining(tmp_path, monkeypatch):
+    first = train(tmp_path, SHARD, "first.jsonl")
+    old_path = str(tmp_path / "old.jsonl")
+    write_text(old_path, SHARD, 'zlib')
+
+    second = train(tmp_path, json.dumps({'players': PLAYERS}, indent=2), "second.json")
+    assert second != first
+    assert current_dictionary('zlib')[0].hex() == second
+    new_path = str(tmp_path / "new.jsonl")
+    write_text(new_path, SHARD, 'zlib')
+
+    # A new process loads each file's own dictionary from disk
+    monkeypatch.setattr(compression, '_dictionaries', {})
+    monkeypatch.setattr(compression, '_current', None)
+    assert read_bytes(old_path).decode('utf-8') == SHARD
+    assert read_bytes(new_path).decode('utf-8') == SHARD
+
+
+def test_current_dictionary_is_read_once_per_change(tmp_path, dictionary_dir, monkeypatch):
+    dictionary_id = train(tmp_path, SHARD)
+    opened = []
+
+    def counting_open(path, *args, **kwargs):
+        opened.append(os.path.basename(path))
+        return open(path, *args, **kwargs)
+
+    monkeypatch.setattr(compression, 'open', counting_open, raising=False)
+    for _ in range(3):
+        assert current_dictionary('zlib')[0].hex() == dictionary_id
+    assert opened.count("current.json") == 1
+
+    # Changed by another process, e.g. compression.py train
+    with open(os.path.join(dictionary_dir, "current.json"), 'w') as f:
+        json.dump({}, f, indent=8)
+    assert current_dictionary('zlib') == (NO_DICTIONARY, None)
+    assert opened.count("current.json") == 2
+
+
+def test_zstd_round_trip_with_a_dictionary(tmp_path):
+    pytest.importorskip("zstandard")
+    samples = [SHARD.encode('utf-8')] * 20 + [json.dumps(PLAYERS).encode('utf-8')] * 20
+    save_dictionary('zstd', train_dictionary('zstd', samples, 4096))
+    path = str(tmp_path / "M1.jsonl")
+    write_text(path, SHARD, 'zstd')
+    assert read_bytes(path).decode('utf-8') == SHARD
+
+
+def test_write_text_syncs_the_file_before_and_the_directory_after_renaming(tmp_path, monkeypatch):
+    path = str(tmp_path / "game_data.json")
+    events = []
+    fsync, replace = os.fsync, os.replace
+
+    def recording_fsync(fd):
+        events.append(('fsync', os.path.basename(os.readlink(f"/proc/self/fd/{fd}"))))
+        fsync(fd)
+
+    def recording_replace(source, target):
+        events.append(('replace', os.path.basename(target)))
+        replace(source, target)
+
+    monkeypatch.setattr(compression.os, 'fsync', recording_fsync)
+    monkeypatch.setattr(compression.os, 'replace', recording_replace)
+    write_text(path, json.dumps(PLAYERS))
+    assert events == [('fsync', "game_data.json.tmp"), ('replace', "game_data.json"), ('fsync', tmp_path.name)]
+    assert json.loads(open_text(path).read()) == PLAYERS
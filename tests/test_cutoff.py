@@ -0,0 +1,87 @@
+import pytest
+
+import data
+import metrics
+from conftest import PREDICTION, future_match, make_game
+from cutoff_scheduler import CutoffScheduler
+from data import GameData
+from prediction_queue import PredictionQueue
+
+RESULT = {'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}
+
+
+def late_count(outcome: str) -> int:
+    return metrics._counters.get('ipl_late_predictions_total', {}).get((('outcome', outcome),), 0)
+
+
+def test_lock_is_persisted_and_enforced(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"}, {'M1': future_match()})
+    assert game_data.add_prediction('M1', 'alice', PREDICTION)
+    assert game_data.freeze_match('M1')
+
+    assert not game_data.add_prediction('M1', 'bob', PREDICTION)
+    with pytest.raises(ValueError):
+        game_data.predictions.set_prediction('M1', 'bob', PREDICTION)
+
+    # Another process, or this one after a restart, sees the lock without any scheduler
+    restarted = GameData()
+    assert restarted.is_match_locked('M1')
+    assert not restarted.is_prediction_open('M1')
+    assert not restarted.add_prediction('M1', 'bob', PREDICTION)
+
+
+def test_locked_match_can_still_be_scored(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.freeze_match('M1')
+    assert game_data.score_results({'M1': RESULT}) == ['M1']
+    assert game_data.get_user_prediction('M1', 'alice')['points'] > 0
+    assert game_data.players['alice']['points'] == game_data.get_user_prediction('M1', 'alice')['points']
+
+
+def test_acknowledged_prediction_is_replayed_late(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    queue = PredictionQueue(game_data, flush_interval_ms=60000)
+    try:
+        assert queue.submit('M1', 'alice', PREDICTION)[0]
+        stored = late_count('stored')
+        # The match locks before the queue commits, as when the cutoff passes mid-batch
+        assert game_data.freeze_match('M1')
+        assert queue.flush() == 1
+        assert game_data.get_user_prediction('M1', 'alice') == PREDICTION
+        assert late_count('stored') == stored + 1
+    finally:
+        queue.close()
+
+
+def test_late_prediction_for_scored_match_is_dropped(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"}, {'M1': future_match()})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.score_results({'M1': RESULT})
+    dropped = late_count('dropped')
+    game_data.add_predictions_batch([('M1', 'bob', PREDICTION)])
+    assert game_data.get_user_prediction('M1', 'bob') == {}
+    assert late_count('dropped') == dropped + 1
+
+
+def test_scheduler_locks_due_matches(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match(days=-1), 'M2': future_match()})
+    scheduler = CutoffScheduler(game_data)
+    assert scheduler.run_once() == ['M1']
+    assert scheduler.run_once() == []
+    assert game_data.is_match_locked('M1') and not game_data.is_match_locked('M2')
+
+
+def test_scheduler_locks_matches_another_process_added(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"})
+    scheduler = CutoffScheduler(game_data)
+    assert scheduler.run_once() == []
+
+    # Another process has its own season data, loaded from the files
+    data._seasons.clear()
+    other = GameData()
+    with other.writing():
+        other.matches['M1'] = {**future_match(days=-1), 'status': 'scheduled', 'result': {}}
+        other.save_data()
+    assert scheduler.run_once() == ['M1']
+    assert GameData().is_match_locked('M1')
@@ -0,0 +1,167 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import data
+import index_snapshot
+from conftest import PREDICTION, future_match, make_game
+from data import GameData
+from rank_history import RankHistory
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def run_writer(code: str) -> subprocess.Popen:
+    """Start another process working on the same data directory"""
+    script = f"import sys\nsys.path.insert(0, {ROOT!r})\nfrom data import GameData\n{code}"
+    return subprocess.Popen([sys.executable, "-c", script], env={**os.environ, 'IPL_DATA_DIR': "data"})
+
+
+def test_writes_from_another_process_are_kept(data_dir):
+    game_data = make_game(matches={'M1': future_match()})
+    other = run_writer("game_data = GameData()\n"
+                       "game_data.add_player('bob', 'Chennai Super Kings')\n"
+                       "game_data.add_prediction('M1', 'bob', {'winner': 'Chennai Super Kings', "
+                       "'top_scorer': 'MS Dhoni', 'top_wicket_taker': 'Matheesha Pathirana'})")
+    assert other.wait(timeout=60) == 0
+
+    # This process loaded the files before bob joined
+    assert game_data.add_player('alice', "Mumbai Indians")
+    assert game_data.add_prediction('M1', 'alice', PREDICTION)
+    assert set(game_data.players) == {'alice', 'bob'}
+
+    reloaded = GameData()
+    assert set(reloaded.players) == {'alice', 'bob'}
+    assert set(reloaded.predictions.get('M1')) == {'alice', 'bob'}
+
+
+def test_concurrent_processes_lose_no_writes(data_dir):
+    make_game(matches={'M1': future_match()})
+    writers = [
+        run_writer(f"game_data = GameData()\n"
+                   f"for number in range(25):\n"
+                   f"    game_data.add_player('{prefix}' + str(number), 'Mumbai Indians')")
+        for prefix in ('a', 'b', 'c')
+    ]
+    assert [writer.wait(timeout=120) for writer in writers] == [0, 0, 0]
+    assert len(GameData().players) == 75
+
+
+def test_own_saves_do_not_trigger_a_reload(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    game_data.add_player('bob', "Chennai Super Kings")
+    assert game_data.changed_files() == {}
+    version = game_data.version
+    game_data.add_player('carol', "Delhi Capitals")
+    assert game_data.version == version + 1  # Only the save itself
+
+
+def test_load_drops_ranks_of_unscored_matches(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    entries = [{'username': 'alice', 'rank': 1}]
+    game_data.rank_history.record('M1', entries)
+    game_data.rank_history.record('M2', entries)
+    with game_data.writing():
+        game_data.scored_matches = {'M1'}
+        game_data.save_data()
+
+    assert GameData().rank_history.match_ids == ['M1']
+    assert RankHistory(game_data.rank_history_file).match_ids == ['M1']
+
+
+def test_bulk_keeps_the_teams_of_predicted_and_locked_matches(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"},
+                          {'M1': future_match(), 'M2': future_match(days=8), 'M3': future_match(days=9)})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.predictions.lock_match('M2')
+
+    swapped = {match_id: {**game_data.matches[match_id], 'team2': "Delhi Capitals"} for match_id in ('M1', 'M2', 'M3')}
+    problems = game_data.check_bulk(swapped)
+    assert problems == ["match 'M1' already has predictions, its teams can't be changed",
+                        "match 'M2' is locked, its teams can't be changed"]
+
+    # Other fields of those matches can still be edited
+    moved = {match_id: {**game_data.matches[match_id], 'venue': "Wankhede"} for match_id in ('M1', 'M2')}
+    assert game_data.check_bulk(moved) == []
+
+
+WRONG_RESULT = {'winner': "Chennai Super Kings", 'top_scorer': "MS Dhoni", 'top_wicket_taker': "Deepak Chahar"}
+RESULT = {'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}
+
+
+def test_correcting_a_result_takes_back_its_points(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.score_results({'M1': WRONG_RESULT})
+    assert game_data.players['alice']['points'] == 0
+
+    success, message = game_data.correct_result('M1', RESULT)
+    assert success, message
+    alice = GameData().players['alice']
+    assert (alice['points'], alice['perfect_predictions'], alice['loyalty_bonus_count']) == (35, 1, 1)
+    assert game_data.matches['M1']['result'] == RESULT
+
+    assert game_data.correct_result('M1', WRONG_RESULT)[0]
+    alice = game_data.players['alice']
+    assert (alice['points'], alice['perfect_predictions'], alice['loyalty_bonus_count']) == (0, 0, 0)
+    assert game_data.get_user_prediction('M1', 'alice')['points'] == 0
+
+
+def test_other_leagues_rescore_a_corrected_result(data_dir):
+    friends = make_game({'bob': "Mumbai Indians"}, {'M1': future_match()}, league='friends')
+    friends.add_prediction('M1', 'bob', PREDICTION)
+    game_data = make_game({'alice': "Mumbai Indians"})
+    game_data.score_results({'M1': WRONG_RESULT})
+    friends.sync_results()
+    assert friends.players['bob']['points'] == 0
+
+    assert game_data.correct_result('M1', RESULT)[0]
+    assert friends.sync_results() == 1
+    assert friends.players['bob']['points'] == 35
+    assert friends.sync_results() == 0
+
+
+def test_a_correction_needs_a_valid_result(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match(), 'M2': future_match(days=8)})
+    game_data.score_results({'M1': WRONG_RESULT})
+    assert game_data.correct_result('M2', RESULT) == (False, "Match has no result to correct")
+    assert not game_data.correct_result('M1', {**RESULT, 'winner': "Delhi Capitals"})[0]
+    assert not game_data.correct_result('M1', {'winner': "Mumbai Indians"})[0]
+    assert game_data.matches['M1']['result'] == WRONG_RESULT
+
+
+def test_warm_start_uses_the_snapshot_until_a_source_file_changes(data_dir, monkeypatch):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    game_data.save_index_snapshot()
+    data._seasons.clear()
+    with monkeypatch.context() as patch:
+        # Validated against the signatures taken at load, no source file is read again
+        patch.setattr(index_snapshot, 'open', lambda *args: open(*args) if args[0].endswith("indexes.bin")
+                      else pytest.fail(f"read {args[0]}"), raising=False)
+        assert GameData().warm_start()
+
+    game_data.add_player('bob', "Chennai Super Kings")
+    data._seasons.clear()
+    restarted = GameData()
+    assert [entry['username'] for entry in restarted.get_leaderboard_page(1, 10)['entries']] == ['alice', 'bob']
+    assert restarted.warm_start()  # The rebuilt snapshot is current again
+
+
+def test_consensus_counts_a_changed_prediction_once(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings", 'carol': "Punjab Kings"},
+                          {'M1': future_match()})
+    assert game_data.get_match_consensus('M1') == {}
+    game_data.add_prediction('M1', 'alice', {**PREDICTION, 'winner': "Chennai Super Kings"})
+    game_data.add_prediction('M1', 'bob', {**PREDICTION, 'winner': "Chennai Super Kings"})
+    game_data.add_prediction('M1', 'carol', {**PREDICTION, 'top_scorer': "Suryakumar Yadav"})
+    # Replacing a prediction takes the old picks out of the counts
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+
+    consensus = game_data.get_match_consensus('M1', top_n=1)
+    assert consensus == {'total': 3, 'winner': {"Mumbai Indians": 2, "Chennai Super Kings": 1},
+                         'top_scorer': [("Rohit Sharma", 2)], 'top_wicket_taker': [("Jasprit Bumrah", 3)]}
+    # Kept up to date incrementally, the same as counted from the saved shard
+    data._seasons.clear()
+    assert GameData().get_match_consensus('M1', top_n=1) == consensus
@@ -0,0 +1,68 @@
+import csv
+import io
+
+import pytest
+
+import exports
+from conftest import PREDICTION, future_match, make_game
+from exports import export_stream
+
+RESULT = {'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}
+
+
+def league_with_predictions():
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings", 'carol': "Punjab Kings"},
+                          {'M1': future_match(), 'M2': future_match(days=8)})
+    for username in ('alice', 'bob', 'carol'):
+        game_data.add_prediction('M1', username, PREDICTION)
+    game_data.add_prediction('M2', 'bob', PREDICTION)
+    game_data.score_results({'M1': RESULT})
+    return game_data
+
+
+def read_csv(chunks) -> list:
+    return list(csv.DictReader(io.StringIO(b"".join(chunks).decode('utf-8'))))
+
+
+def test_csv_export_streams_every_prediction_in_chunks(data_dir):
+    game_data = league_with_predictions()
+    chunks = list(export_stream(game_data, 'predictions', 'csv', chunk_size=2))
+    assert len(chunks) == 2  # Two predictions per chunk, the header with the first
+    rows = read_csv(chunks)
+    assert [(row['match_id'], row['username']) for row in rows] == [
+        ('M1', 'alice'), ('M1', 'bob'), ('M1', 'carol'), ('M2', 'bob')]
+    assert [row['points'] for row in rows] == ["35", "30", "30", ""]  # Loyalty bonus for alice only
+
+
+def test_csv_scores_and_leaderboard(data_dir):
+    game_data = league_with_predictions()
+    scores = read_csv(export_stream(game_data, 'scores', 'csv'))
+    assert {row['match_id'] for row in scores} == {'M1'}
+    alice = next(row for row in scores if row['username'] == 'alice')
+    assert alice['loyalty_bonus'] == alice['perfect'] == "True"
+
+    leaderboard = read_csv(export_stream(game_data, 'leaderboard', 'csv'))
+    assert [(row['rank'], row['username'], row['points']) for row in leaderboard] == [
+        ("1", 'alice', "35"), ("2", 'bob', "30"), ("2", 'carol', "30")]
+
+
+def test_empty_export_still_has_a_header(data_dir):
+    game_data = make_game()
+    assert b"".join(export_stream(game_data, 'predictions', 'csv')) == \
+        b"match_id,username,winner,top_scorer,top_wicket_taker,points\n"
+
+
+def test_parquet_needs_pyarrow(data_dir, monkeypatch):
+    monkeypatch.setattr(exports, 'pa', None)
+    with pytest.raises(RuntimeError):
+        export_stream(make_game(), 'leaderboard', 'parquet')
+
+
+def test_parquet_export_reads_back(data_dir):
+    pq = pytest.importorskip("pyarrow.parquet")
+    game_data = league_with_predictions()
+    content = b"".join(export_stream(game_data, 'predictions', 'parquet', chunk_size=2))
+    table = pq.read_table(io.BytesIO(content))
+    assert table.num_rows == 4
+    assert table.schema.field('points').type == 'int64'
+    assert table.column('points').to_pylist() == [35, 30, 30, None]
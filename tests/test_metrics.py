@@ -0,0 +1,53 @@
+import json
+import os
+
+import pytest
+
+import metrics
+from conftest import PREDICTION, future_match, make_game
+
+
+@pytest.fixture
+def event_log(tmp_path, monkeypatch):
+    """Send events to a fresh log file"""
+    path = str(tmp_path / "events.log")
+    monkeypatch.setattr(metrics, 'EVENT_LOG', path)
+    monkeypatch.setattr(metrics, '_log_file', None)
+    yield path
+    if metrics._log_file is not None:
+        metrics._log_file.close()
+        metrics._log_file = None
+
+
+def read_events(path: str) -> list:
+    with open(path) as f:
+        return [json.loads(line) for line in f]
+
+
+def test_events_share_one_handle(event_log):
+    metrics.log_event('first')
+    handle = metrics._log_file
+    metrics.log_event('second', value=2)
+    assert metrics._log_file is handle
+    assert [event['event'] for event in read_events(event_log)] == ['first', 'second']
+
+
+def test_log_rotates_by_size(event_log, monkeypatch):
+    monkeypatch.setattr(metrics, 'EVENT_LOG_MAX_BYTES', 200)
+    monkeypatch.setattr(metrics, 'EVENT_LOG_BACKUPS', 2)
+    for number in range(30):
+        metrics.log_event('tick', number=number)
+
+    logged = read_events(event_log + ".2") + read_events(event_log + ".1") + read_events(event_log)
+    # Older rotations beyond the backups are dropped, the rest stay in order
+    numbers = [event['number'] for event in logged]
+    assert numbers == list(range(numbers[0], 30))
+    assert not os.path.exists(event_log + ".3")
+
+
+def test_prediction_events_leave_out_the_username(event_log):
+    game_data = make_game({"alice": "Mumbai Indians"}, {"M1": future_match()})
+    game_data.add_prediction("M1", "alice", PREDICTION)
+
+    events = [event for event in read_events(event_log) if event['event'].startswith('prediction_')]
+    assert events and all('username' not in event for event in events)
@@ -0,0 +1,55 @@
+from player_search import PlayerSearchIndex, normalize
+
+ROSTERS = {
+    "Chennai Super Kings": {'batsmen': ["Ruturaj Gaikwad"], 'bowlers': ["Matheesha Pathirana"],
+                            'all_rounders': ["MS Dhoni", "Ravindra Jadeja"]},
+    "Royal Challengers Bangalore": {'batsmen': ["Virat Kohli", "Rajat Patidar"], 'bowlers': ["Josh Hazlewood"],
+                                    'all_rounders': []},
+    "Mumbai Indians": {'batsmen': ["Rohit Sharma", "Suryakumar Yadav"], 'bowlers': ["Jasprit Bumrah"],
+                       'all_rounders': ["Hardik Pandya"]},
+}
+ALIASES = {"Rohit Sharma": ["Hitman"], "MS Dhoni": ["Thala", "MSD"], "Virat Kohli": ["King Kohli"]}
+
+
+def names(results: list) -> list:
+    return [player['name'] for player in results]
+
+
+def test_typos_are_found():
+    index = PlayerSearchIndex(ROSTERS, ALIASES)
+    assert names(index.search("kholi"))[:1] == ["Virat Kohli"]
+    assert names(index.search("dhoine"))[:1] == ["MS Dhoni"]
+    assert names(index.search("jaspirt bumrah"))[:1] == ["Jasprit Bumrah"]
+
+
+def test_typos_are_found_among_many_similar_names():
+    # Dozens of players sharing the query's first trigrams mustn't crowd out the right one
+    rosters = {**ROSTERS, "Delhi Capitals": {
+        'batsmen': [f"Khan Kholmatov{i}" for i in range(40)] + [f"Dhonsworth Dhoil{i}" for i in range(40)],
+        'bowlers': [], 'all_rounders': []}}
+    index = PlayerSearchIndex(rosters, ALIASES)
+    assert "Virat Kohli" in names(index.search("kholi", limit=10))
+    assert "MS Dhoni" in names(index.search("dhoine", limit=10))
+
+
+def test_initials_and_aliases():
+    index = PlayerSearchIndex(ROSTERS, ALIASES)
+    assert names(index.search("rs"))[:1] == ["Rohit Sharma"]
+    assert names(index.search("r sharma"))[:1] == ["Rohit Sharma"]
+    assert names(index.search("M.S. Dhoni"))[:1] == ["MS Dhoni"]
+    assert names(index.search("hitman")) == ["Rohit Sharma"]
+    assert names(index.search("thala")) == ["MS Dhoni"]
+    assert names(index.search("king")) == ["Virat Kohli"]
+
+
+def test_team_filter_and_empty_query():
+    index = PlayerSearchIndex(ROSTERS, ALIASES)
+    assert names(index.search("kohli", teams=["Mumbai Indians"])) == []
+    assert names(index.search("", teams=["Mumbai Indians"])) == ["Rohit Sharma", "Suryakumar Yadav", "Jasprit Bumrah",
+                                                                "Hardik Pandya"]
+    assert normalize("  Rohit  SHARMA ") == "rohit sharma"
+
+
+def test_unrelated_query_finds_nobody():
+    index = PlayerSearchIndex(ROSTERS, ALIASES)
+    assert index.search("zzqx") == []
@@ -0,0 +1,141 @@
+import json
+import os
+import threading
+
+from conftest import PREDICTION, future_match, make_game
+from data import GameData
+from prediction_queue import PredictionQueue
+
+
+def test_submit_rejects_second_prediction(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    queue = PredictionQueue(game_data)
+    try:
+        assert queue.submit('M1', 'alice', PREDICTION)[0]
+        success, message = queue.submit('M1', 'alice', {**PREDICTION, 'winner': "Chennai Super Kings"})
+        assert not success and "one prediction" in message
+        queue.flush()
+        assert not queue.submit('M1', 'alice', PREDICTION)[0]
+        assert game_data.get_user_prediction('M1', 'alice') == PREDICTION
+    finally:
+        queue.close()
+
+
+def test_concurrent_duplicates_accept_exactly_one(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    queue = PredictionQueue(game_data)
+    outcomes = []
+    barrier = threading.Barrier(8)
+
+    def submit():
+        barrier.wait()
+        outcomes.append(queue.submit('M1', 'alice', PREDICTION)[0])
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert sorted(outcomes) == [False] * 7 + [True]
+    finally:
+        queue.close()
+
+
+def test_match_locked_during_backpressure_wait_is_rejected(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"}, {'M1': future_match()})
+    queue = PredictionQueue(game_data, flush_interval_ms=60000, max_pending=1)
+    wait = queue.condition.wait
+
+    def locking_wait(timeout=None):
+        # The cutoff passes and the flusher drains the queue while bob waits for room
+        game_data.freeze_match('M1')
+        queue.flush()
+        return wait(0)
+
+    try:
+        assert queue.submit('M1', 'alice', PREDICTION)[0]
+        queue.condition.wait = locking_wait
+        success, message = queue.submit('M1', 'bob', PREDICTION)
+        assert not success and "closed" in message
+        assert queue.pending_count() == 0
+        assert game_data.get_user_prediction('M1', 'bob') == {}
+    finally:
+        queue.condition.wait = wait
+        queue.close()
+
+
+def test_concurrent_submitters_share_fsyncs(data_dir, monkeypatch):
+    players = {f"user{i}": "Mumbai Indians" for i in range(20)}
+    game_data = make_game(players, {'M1': future_match()})
+    queue = PredictionQueue(game_data, flush_interval_ms=60000)
+    fsyncs = []
+    real_fsync = os.fsync
+
+    def slow_fsync(fileno):
+        fsyncs.append(fileno)
+        threading.Event().wait(0.02)
+        real_fsync(fileno)
+
+    monkeypatch.setattr('prediction_queue.os.fsync', slow_fsync)
+    threads = [threading.Thread(target=queue.submit, args=('M1', username, PREDICTION)) for username in players]
+    try:
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert queue.pending_count() == len(players)
+        assert queue.synced == queue.appended == len(players)
+        assert len(fsyncs) < len(players)
+    finally:
+        queue.close()
+    assert len(game_data.predictions.get('M1')) == len(players)
+
+
+def test_recover_replays_log_and_truncates(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"}, {'M1': future_match()})
+    log_file = data_dir / "prediction_queue.log"
+    with open(log_file, 'w') as f:
+        for username in ('alice', 'bob'):
+            f.write(json.dumps({'match_id': 'M1', 'username': username, 'prediction': PREDICTION}) + "\n")
+
+    queue = PredictionQueue(game_data)
+    try:
+        assert set(game_data.predictions.get('M1')) == {'alice', 'bob'}
+        assert log_file.read_text() == ""
+    finally:
+        queue.close()
+
+
+def test_recover_stops_at_torn_final_write(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"}, {'M1': future_match()})
+    log_file = data_dir / "prediction_queue.log"
+    complete = json.dumps({'match_id': 'M1', 'username': 'alice', 'prediction': PREDICTION}) + "\n"
+    torn = json.dumps({'match_id': 'M1', 'username': 'bob', 'prediction': PREDICTION})[:30]
+    log_file.write_text(complete + torn)
+
+    queue = PredictionQueue(game_data)
+    try:
+        assert queue.recover() == 0  # Already replayed and truncated at start-up
+        assert set(game_data.predictions.get('M1')) == {'alice'}
+        assert log_file.read_text() == ""
+    finally:
+        queue.close()
+
+
+def test_unflushed_entries_survive_a_restart(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    queue = PredictionQueue(game_data, flush_interval_ms=60000)
+    assert queue.submit('M1', 'alice', PREDICTION)[0]
+
+    # A new process only sees the files: the prediction is in the log but not yet in a shard
+    restarted_data = GameData()
+    assert restarted_data.get_user_prediction('M1', 'alice') == {}
+    restarted = PredictionQueue(restarted_data)
+    try:
+        assert restarted_data.get_user_prediction('M1', 'alice') == PREDICTION
+    finally:
+        restarted.close()
+        with queue.condition:
+            queue.pending = []  # The crashed process never commits
+        queue.close()
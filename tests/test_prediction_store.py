@@ -0,0 +1,55 @@
+import json
+import os
+
+import pytest
+
+from conftest import PREDICTION
+from prediction_store import PredictionStore
+
+
+def test_shards_round_trip_one_file_per_match(tmp_path):
+    shard_dir = str(tmp_path / "predictions")
+    store = PredictionStore(shard_dir)
+    store.set_prediction("M1", "alice", PREDICTION)
+    store.set_prediction("M1", "bob", PREDICTION)
+    store.set_prediction("M 2/x", "alice", PREDICTION)
+    store.save()
+    assert sorted(os.listdir(shard_dir)) == ["M%202%2Fx.jsonl", "M1.jsonl", "index.json"]
+
+    reopened = PredictionStore(shard_dir)
+    assert reopened.shards == {}  # Nothing is read until a match is asked for
+    assert (reopened.count("M1"), reopened.total_count()) == (2, 3)
+    assert reopened.get("M1") == {'alice': PREDICTION, 'bob': PREDICTION}
+    assert dict(reopened.iter_predictions("M 2/x")) == {'alice': PREDICTION}
+
+
+def test_legacy_shards_are_read_and_rewritten_line_delimited(tmp_path):
+    shard_dir = tmp_path / "predictions"
+    shard_dir.mkdir()
+    (shard_dir / "M1.json").write_text(json.dumps({'alice': PREDICTION}))
+    store = PredictionStore(str(shard_dir))
+    assert store.count("M1") == 1  # Index rebuilt from the shards
+    store.set_prediction("M1", "bob", PREDICTION)
+    store.save()
+    assert not (shard_dir / "M1.json").exists()
+    assert PredictionStore(str(shard_dir)).get("M1") == {'alice': PREDICTION, 'bob': PREDICTION}
+
+
+def test_scored_shards_are_evicted_beyond_the_cache(tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions"), max_scored_cached=1)
+    for match_id in ("M1", "M2", "M3"):
+        store.set_prediction(match_id, "alice", PREDICTION)
+        store.mark_scored(match_id)
+    assert set(store.shards) == {"M1", "M2", "M3"}  # Unsaved changes are never dropped
+    store.save()
+    assert list(store.shards) == ["M3"]
+    assert store.get("M1") == {'alice': PREDICTION}
+
+
+def test_locked_shards_only_take_late_replays(tmp_path):
+    store = PredictionStore(str(tmp_path / "predictions"))
+    store.lock_match("M1")
+    with pytest.raises(ValueError):
+        store.set_prediction("M1", "alice", PREDICTION)
+    store.set_prediction("M1", "alice", PREDICTION, late=True)
+    assert store.count("M1") == 1
@@ -0,0 +1,38 @@
+from rank_history import RankHistory
+
+
+def entries(*ranked) -> list:
+    return [{'username': username, 'rank': rank} for username, rank in ranked]
+
+
+def test_rank_changes_compare_the_last_two_matches(data_dir, tmp_path):
+    history = RankHistory(str(tmp_path / "ranks.npz"))
+    assert history.get_rank_changes() == {}
+    history.record('M1', entries(('alice', 1), ('bob', 2)))
+    assert history.get_rank_changes() == {}
+    # carol joins after M1, so she has no change yet
+    history.record('M2', entries(('bob', 1), ('alice', 2), ('carol', 3)))
+    assert history.get_rank_changes() == {'alice': -1, 'bob': 1}
+    assert history.get_user_history('carol') == [('M2', 3)]
+
+
+def test_rescoring_a_match_replaces_its_row(data_dir, tmp_path):
+    history = RankHistory(str(tmp_path / "ranks.npz"))
+    history.record('M1', entries(('alice', 1), ('bob', 2)))
+    history.record('M1', entries(('alice', 2), ('bob', 1)))
+    assert history.match_ids == ['M1']
+    assert history.get_user_history('alice') == [('M1', 2)]
+
+
+def test_truncate_drops_unscored_matches_and_saves(data_dir, tmp_path):
+    path = str(tmp_path / "ranks.npz")
+    history = RankHistory(path)
+    for match_id, ranks in (('M1', (1, 2)), ('M2', (2, 1)), ('M3', (1, 2))):
+        history.record(match_id, entries(('alice', ranks[0]), ('bob', ranks[1])))
+
+    assert history.truncate({'M1', 'M2'}) == 1
+    assert history.truncate({'M1', 'M2'}) == 0
+    reloaded = RankHistory(path)
+    assert reloaded.match_ids == ['M1', 'M2']
+    assert reloaded.get_user_history('alice') == [('M1', 1), ('M2', 2)]
+    assert reloaded.get_rank_changes() == {'alice': -1, 'bob': 1}
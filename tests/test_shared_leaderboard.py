@@ -0,0 +1,161 @@
+import sys
+import threading
+
+import pytest
+
+import data
+import shared_leaderboard
+from conftest import make_game
+from shared_leaderboard import SharedLeaderboard, segment_name
+
+
+@pytest.fixture
+def segment(tmp_path):
+    """Writer on a segment unique to the test, removed afterwards"""
+    writer = SharedLeaderboard(segment_name(str(tmp_path)))
+    yield writer
+    writer.unlink()
+
+
+def entries_of(count: int, points: int, prefix: str = "player") -> list:
+    return [{'rank': 1, 'username': f"{prefix}{number}", 'team': "Mumbai Indians", 'points': points,
+             'perfect_predictions': 0, 'loyalty_bonus_count': 0} for number in range(count)]
+
+
+def publish(writer, count: int, points: int, prefix: str = "player", source: str = ""):
+    writer.publish(entries_of(count, points, prefix), ["Mumbai Indians"], [count], [count * points], source)
+
+
+def test_reader_sees_what_was_published(segment):
+    publish(segment, 3, 10, source="abc")
+    reader = SharedLeaderboard(segment.name)
+    arrays = reader.read()
+    assert arrays['usernames'] == ["player0", "player1", "player2"]
+    assert arrays['points'].tolist() == [10, 10, 10]
+    assert arrays['source'] == reader.source() == "abc"
+    reader.close()
+
+
+def test_reader_ignores_a_write_in_progress(segment, monkeypatch):
+    publish(segment, 3, 10)
+    # An odd sequence means the writer stopped halfway through
+    segment._set_sequence(segment._sequence() + 1)
+    monkeypatch.setattr(shared_leaderboard, 'MAX_READ_ATTEMPTS', 3)
+    reader = SharedLeaderboard(segment.name)
+    assert reader.read() is None
+    assert reader.source() is None
+    reader.close()
+
+
+def test_reads_racing_writes_are_never_torn(segment):
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # Switch threads as often as possible mid-copy
+    publish(segment, 50, 0, prefix="p0-")
+    stop = threading.Event()
+
+    def write():
+        round_number = 0
+        while not stop.is_set():
+            round_number += 1
+            publish(segment, 50 + round_number % 7, round_number, prefix=f"p{round_number}-")
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    reader = SharedLeaderboard(segment.name)
+    try:
+        reads = 0
+        for _ in range(2000):
+            arrays = reader.read()
+            if arrays is None:
+                continue
+            reads += 1
+            # Every value of a consistent copy comes from the same publish
+            round_number = arrays['points'][0]
+            assert set(arrays['points'].tolist()) == {round_number}
+            assert all(name.startswith(f"p{round_number}-") for name in arrays['usernames'])
+            assert arrays['team_points'].tolist() == [len(arrays['usernames']) * round_number]
+        assert reads
+    finally:
+        stop.set()
+        writer.join()
+        sys.setswitchinterval(interval)
+        reader.close()
+
+
+def test_growing_moves_readers_to_the_new_segment(segment):
+    publish(segment, 10, 1)
+    reader = SharedLeaderboard(segment.name)
+    first = reader.read()
+    old_capacity = reader.layout['points'][2]
+
+    # More players and longer names than the first segment holds
+    publish(segment, old_capacity + 500, 2, prefix="a-much-longer-username-")
+    arrays = reader.read()
+    assert len(arrays['usernames']) == old_capacity + 500
+    assert arrays['usernames'][-1] == f"a-much-longer-username-{old_capacity + 499}"
+    assert reader.layout['points'][2] > old_capacity
+    # Readers key their caches on the sequence, which keeps growing across segments
+    assert arrays['sequence'] > first['sequence']
+    reader.close()
+
+
+def test_segments_of_an_older_layout_are_not_read(segment, monkeypatch):
+    monkeypatch.setattr(shared_leaderboard, 'LAYOUT_VERSION', 1)
+    publish(segment, 3, 10)
+    monkeypatch.undo()
+    reader = SharedLeaderboard(segment.name)
+    assert reader.sequence() is None
+    reader.close()
+
+
+@pytest.fixture
+def shared(monkeypatch):
+    monkeypatch.setenv("IPL_SHARED_LEADERBOARD", "1")
+    created = []
+    original = data.GameData.__init__
+
+    def track(self, *args, **kwargs):
+        original(self, *args, **kwargs)
+        created.append(self)
+
+    monkeypatch.setattr(data.GameData, '__init__', track)
+    yield
+    for game_data in created:
+        game_data.shared_leaderboard.unlink()
+
+
+def restart(league: str = data.DEFAULT_LEAGUE) -> data.GameData:
+    """The partition as a newly started worker loads it"""
+    data._partitions.clear()
+    return data.get_game_data(league)
+
+
+def test_boot_publishes_over_a_stale_segment(shared):
+    game_data = make_game({"alice": "Mumbai Indians", "bob": "Punjab Kings"})
+    game_data.players["alice"]['points'] = 30
+    game_data.save_data()  # Saved without publishing, like a restore from the command line
+    assert game_data.shared_leaderboard.read()['points'].tolist() == [0, 0]
+
+    worker = restart()
+    arrays = worker.shared_leaderboard.read()
+    assert arrays['usernames'][0] == "alice" and arrays['points'].tolist() == [30, 0]
+    assert arrays['source'] == data.signature_token(data.file_signature(worker.data_file))
+
+
+def test_boot_keeps_a_current_segment(shared):
+    game_data = make_game({"alice": "Mumbai Indians"})
+    game_data.publish_leaderboard()  # make_game saves once more after the join published
+    sequence = game_data.shared_leaderboard.sequence()
+
+    restart()
+    assert game_data.shared_leaderboard.sequence() == sequence
+
+
+def test_read_only_workers_never_publish(shared):
+    game_data = make_game({"alice": "Mumbai Indians"})
+    game_data.players["alice"]['points'] = 30
+    game_data.save_data()
+    sequence = game_data.shared_leaderboard.sequence()
+
+    data.GameData(read_only=True)
+    assert game_data.shared_leaderboard.sequence() == sequence
@@ -0,0 +1,115 @@
+from datetime import datetime
+
+from conftest import PREDICTION, future_match, make_game
+from data import get_game_data
+from rank_history import RankHistory
+from snapshots import SnapshotManager
+
+RESULT = {'winner': "Mumbai Indians", 'top_scorer': "Rohit Sharma", 'top_wicket_taker': "Jasprit Bumrah"}
+
+
+def test_restore_keeps_season_results_and_rescores(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match(), 'M2': future_match(days=8)})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    manager = SnapshotManager(game_data)
+    snapshot = manager.take_snapshot()
+
+    game_data.add_player('bob', "Chennai Super Kings")
+    assert game_data.score_results({'M1': RESULT}) == ['M1']
+    points = game_data.players['alice']['points']
+    assert points > 0
+
+    success, message = manager.restore(datetime.fromisoformat(snapshot['timestamp']))
+    assert success, message
+    # bob joined after the snapshot, but the result entered since is the season's and stays
+    assert set(game_data.players) == {'alice'}
+    assert game_data.matches['M1']['result'] == RESULT
+    assert game_data.scored_matches == {'M1'}
+    assert game_data.players['alice']['points'] == points
+
+
+def test_restore_leaves_other_leagues_schedule(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    manager = SnapshotManager(game_data)
+    snapshot = manager.take_snapshot()
+
+    other = get_game_data('default')
+    other.apply_bulk(matches={'M2': future_match(days=9)})
+    assert manager.restore(datetime.fromisoformat(snapshot['timestamp']))[0]
+    assert set(game_data.matches) == {'M1', 'M2'}
+
+
+def test_restore_drops_rank_history_of_unscored_matches(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"},
+                          {'M1': future_match(), 'M2': future_match(days=8)})
+    manager = SnapshotManager(game_data)
+    snapshot = manager.take_snapshot()
+    game_data.score_results({'M1': RESULT})
+    assert game_data.rank_history.match_ids == ['M1']
+
+    # The result is taken back from the season, so the restored league doesn't score it again
+    with game_data.writing():
+        game_data.matches['M1']['result'] = {}
+        game_data.save_data()
+    assert manager.restore(datetime.fromisoformat(snapshot['timestamp']))[0]
+    assert game_data.scored_matches == set()
+    assert game_data.rank_history.match_ids == []
+    assert RankHistory(game_data.rank_history_file).match_ids == []
+
+
+def test_restore_rescores_a_result_corrected_since_the_snapshot(data_dir):
+    wrong = {'winner': "Chennai Super Kings", 'top_scorer': "MS Dhoni", 'top_wicket_taker': "Deepak Chahar"}
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match()})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.score_results({'M1': wrong})
+    manager = SnapshotManager(game_data)
+    snapshot = manager.take_snapshot()
+
+    assert game_data.correct_result('M1', RESULT)[0]
+    assert game_data.players['alice']['points'] == 35
+    # The snapshot's scoring was made with the wrong result, the season has the corrected one
+    assert manager.restore(datetime.fromisoformat(snapshot['timestamp']))[0]
+    assert game_data.scored_results['M1'] == RESULT
+    assert game_data.players['alice']['points'] == 35
+
+
+def test_capture_reads_shards_on_disk_outside_the_game_lock(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians"}, {'M1': future_match(), 'M2': future_match(days=8)})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    game_data.add_prediction('M2', 'alice', PREDICTION)
+    store = game_data.predictions
+    store.shards.pop('M1')  # Evicted after saving, so only on disk
+    read_under_lock = []
+    read_shard = store._read_shard
+
+    def tracking_read(match_id):
+        read_under_lock.append(game_data.lock._is_owned())
+        return read_shard(match_id)
+
+    store._read_shard = tracking_read
+    version, players, matches, predictions, scoring = SnapshotManager(game_data).capture()
+    assert read_under_lock == [False]
+    assert predictions == {'M1': {'alice': PREDICTION}, 'M2': {'alice': PREDICTION}}
+
+
+def test_capture_retries_when_a_shard_is_saved_mid_read(data_dir):
+    game_data = make_game({'alice': "Mumbai Indians", 'bob': "Chennai Super Kings"}, {'M1': future_match()})
+    game_data.add_prediction('M1', 'alice', PREDICTION)
+    store = game_data.predictions
+    store.shards.pop('M1')
+    read_shard = store._read_shard
+    reads = []
+
+    def racing_read(match_id):
+        shard = read_shard(match_id)
+        reads.append(match_id)
+        if len(reads) == 1:
+            # bob's prediction is saved between the capture and the read of the file
+            game_data.add_prediction('M1', 'bob', PREDICTION)
+            store.shards.pop('M1')
+        return shard
+
+    store._read_shard = racing_read
+    predictions = SnapshotManager(game_data).capture()[3]
+    assert len(reads) == 3  # The stale read, bob's prediction loading the shard, the retry
+    assert set(predictions['M1']) == {'alice', 'bob'}
@@ -0,0 +1,135 @@
+import io
+import json
+import os
+
+import pytest
+
+from conftest import PREDICTION
+from prediction_store import PredictionStore
+from stream_loader import JSONStream, verify_partition, write_jsonl
+
+DOCUMENT = {
+    "players": {"alice": {"team": "Mumbai Indians", "points": 12}, "bob": {"team": "Punjab Kings", "points": -3}},
+    "ratio": 12.5e3,
+    "big": 1234567890123,
+    "name": "café \"quoted\" \\ slash",
+    "empty": {},
+    "list": [1, 2.25, None, True],
+}
+
+
+def read_members(text: str, chunk_size: int) -> dict:
+    """Decode a top-level object member by member, descending into 'players'"""
+    stream = JSONStream(io.StringIO(text), chunk_size=chunk_size)
+    members = {}
+    for key in stream.iter_object():
+        if key == 'players':
+            members[key] = {username: stream.value() for username in stream.iter_object()}
+        else:
+            members[key] = stream.value()
+    stream.finish()
+    return members
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 7, 1 << 16])
+def test_stream_matches_json_at_any_chunk_size(chunk_size):
+    for text in (json.dumps(DOCUMENT), json.dumps(DOCUMENT, indent=4)):
+        assert read_members(text, chunk_size) == DOCUMENT
+
+
+@pytest.mark.parametrize("number", ["12.5e3", "-0.125", "1e-7", "98765432109876543210"])
+def test_number_split_across_chunks(number):
+    text = '{"value": ' + number + '}'
+    # Every split of the number falls on a chunk boundary at some chunk size
+    for chunk_size in range(1, len(text) + 1):
+        assert read_members(text, chunk_size) == {"value": json.loads(number)}
+
+
+@pytest.mark.parametrize("text", ['{"name": "unfinished', '{"name": "esc\\', '{"name": "ok", "other'])
+def test_truncated_string_is_an_error(text):
+    for chunk_size in (1, 4, 1 << 16):
+        with pytest.raises(ValueError, match="Unterminated string|Unexpected end of file"):
+            read_members(text, chunk_size)
+
+
+@pytest.mark.parametrize("text,message,position", [
+    ('{"a": 1 "b": 2}', "Expected ',' or '}'", 8),
+    ('{"a": 1, 2: 3}', "Expected a string key", 9),
+    ('{"a" 1}', "Expected ':'", 5),
+    ('{"a": 1} x', "Extra data after the document", 9),
+    ('{"a": nope}', "Expecting value", 6),
+])
+def test_error_reports_the_character_offset(text, message, position):
+    for chunk_size in (1, 3, 1 << 16):
+        with pytest.raises(ValueError) as error:
+            read_members(text, chunk_size)
+        assert message in str(error.value)
+        assert str(error.value).endswith(f"(character {position})")
+
+
+def test_error_offset_counts_dropped_characters():
+    padding = " " * 100
+    text = '{' + padding + '"a": 1' + padding + ' x}'
+    with pytest.raises(ValueError) as error:
+        read_members(text, chunk_size=8)
+    assert str(error.value).endswith(f"(character {text.index('x')})")
+
+
+def make_partition(tmp_path) -> str:
+    """Partition directory with two saved shards and their index"""
+    partition_dir = str(tmp_path / "partition")
+    store = PredictionStore(os.path.join(partition_dir, "predictions"))
+    store.set_prediction("M1", "alice", dict(PREDICTION))
+    store.set_prediction("M1", "bob", dict(PREDICTION))
+    store.set_prediction("M2", "alice", dict(PREDICTION))
+    store.save()
+    return partition_dir
+
+
+def rewrite_index(partition_dir: str, counts: dict):
+    with open(os.path.join(partition_dir, "predictions", "index.json"), 'w') as f:
+        json.dump(counts, f)
+
+
+def test_verify_accepts_a_consistent_partition(tmp_path):
+    report = verify_partition(make_partition(tmp_path), str(tmp_path / "missing.json"))
+    assert report['problem_count'] == 0
+    assert (report['shards'], report['predictions']) == (2, 3)
+
+
+def test_verify_reports_index_count_mismatch(tmp_path):
+    partition_dir = make_partition(tmp_path)
+    rewrite_index(partition_dir, {"M1": 5, "M2": 1})
+
+    report = verify_partition(partition_dir, str(tmp_path / "missing.json"))
+    assert report['problem_count'] == 1
+    assert "index counts 5 predictions, shard has 2" in report['problems'][0]
+
+
+def test_verify_reports_index_entry_without_shard(tmp_path):
+    partition_dir = make_partition(tmp_path)
+    rewrite_index(partition_dir, {"M1": 2, "M2": 1, "M3": 4})
+
+    report = verify_partition(partition_dir, str(tmp_path / "missing.json"))
+    assert report['problem_count'] == 1
+    assert "lists 4 predictions for 'M3' but there is no shard" in report['problems'][0]
+
+
+def test_verify_reports_bad_records_in_a_shard(tmp_path):
+    partition_dir = make_partition(tmp_path)
+    write_jsonl(os.path.join(partition_dir, "predictions", "M2.jsonl"),
+                [{'username': "alice", 'prediction': {'winner': "Mumbai Indians"}}])
+
+    report = verify_partition(partition_dir, str(tmp_path / "missing.json"))
+    assert report['problem_count'] == 1
+    assert "has no 'top_scorer'" in report['problems'][0]
+
+
+def test_verify_reports_a_corrupt_index(tmp_path):
+    partition_dir = make_partition(tmp_path)
+    with open(os.path.join(partition_dir, "predictions", "index.json"), 'w') as f:
+        f.write('{"M1": 2, "M2"')
+
+    report = verify_partition(partition_dir, str(tmp_path / "missing.json"))
+    assert report['problem_count'] == 1
+    assert "index.json: Unexpected end of file" in report['problems'][0]
@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import title_odds
+from title_odds import MAX_MATCH_POINTS, hit_rates, simulate_title_odds
+
+
+def season_inputs(points: list, remaining: int = 3) -> dict:
+    """Players on alternating teams 0 and 1, with remaining matches between those teams and nothing predicted"""
+    players = len(points)
+    return {
+        'usernames': [f"player{number}" for number in range(players)],
+        'points': points,
+        'teams': np.arange(players) % 2,
+        'rates': np.full((players, 3), 0.5),
+        'participation': np.full(players, 0.9),
+        'matches': [{'team1': 0, 'team2': 1, 'is_playoff': False, 'open': True, 'picks': np.full(players, -1)}
+                    for _ in range(remaining)]
+    }
+
+
+def test_hit_rates_lean_on_the_league_average_for_short_histories():
+    rates = hit_rates([0, 20], [[0, 0, 0], [20, 4, 4]])
+    assert rates[0].tolist() == pytest.approx([1.0, 0.2, 0.2])  # League rates, nothing of its own yet
+    assert rates[1, 0] == pytest.approx(1.0)
+
+
+def test_same_seed_gives_the_same_odds_however_the_batches_run(monkeypatch):
+    inputs = season_inputs([50, 45, 40, 40, 30])
+    monkeypatch.setattr(title_odds, 'MAX_BATCH_CELLS', 5 * 100)  # 100 simulations per batch
+    first = simulate_title_odds(inputs, simulations=400, seed=7)
+    assert simulate_title_odds(inputs, simulations=400, seed=7) == first
+    assert simulate_title_odds(inputs, simulations=400, seed=7, workers=2) == first
+    assert simulate_title_odds(inputs, simulations=400, seed=8) != first
+    assert sum(entry['win'] for entry in first) == pytest.approx(1.0)
+
+
+def test_players_out_of_reach_are_not_simulated():
+    remaining = 2
+    # player2 trails the third best by more than two matches' worth of points
+    inputs = season_inputs([100, 90, 80, 80 - remaining * MAX_MATCH_POINTS - 1], remaining)
+    odds = simulate_title_odds(inputs, simulations=200, top_n=3)
+    assert odds[3] == {'username': "player3", 'points': inputs['points'][3], 'win': 0.0, 'top_n': 0.0,
+                       'expected_points': float(inputs['points'][3])}
+    # Only three contenders are left for the top three
+    assert [entry['top_n'] for entry in odds[:3]] == [1.0, 1.0, 1.0]
+    assert odds[0]['win'] > odds[2]['win']
@@ -0,0 +1,179 @@
+"""Monte Carlo estimate of every player's chances of winning the season or finishing in the top N.
+
+The unplayed matches are replayed many times at once as NumPy arrays of
+players × simulations. Each simulated match draws a winner (a coin flip between
+the two teams), then scores every player with the game's rules: a player who
+already submitted a prediction keeps their winner pick, anyone else predicts
+with the hit rates of their own scored predictions, smoothed towards the league
+average. Loyalty, perfect prediction and playoff points follow score_prediction.
+
+Simulations run in fixed-size batches with their own random streams, so the
+same seed gives the same odds whether the batches run in this process or are
+spread over a process pool.
+
+Usage:
+    python title_odds.py --league default --simulations 5000 --top-n 3 --workers 4
+"""
+import argparse
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+DEFAULT_SIMULATIONS = 1000
+PRIOR_WEIGHT = 4  # Pseudo-predictions pulling short histories towards the league average
+DEFAULT_HIT_RATES = (0.5, 0.1, 0.1)  # Winner, top scorer, top wicket taker before any match is scored
+MAX_BATCH_CELLS = 2_000_000  # Players × simulations per batch, bounds memory per worker
+
+
+def hit_rates(predicted, hits, prior_weight: float = PRIOR_WEIGHT):
+    """Per-player hit probability of each category, smoothed towards the league rate.
+
+    ``predicted`` is the number of scored predictions per player and ``hits`` a
+    (players, 3) array of winner, top scorer and top wicket taker hits.
+    """
+    predicted = np.asarray(predicted, dtype=np.float64)
+    hits = np.asarray(hits, dtype=np.float64).reshape(len(predicted), 3)
+    if predicted.sum() > 0:
+        league_rates = hits.sum(axis=0) / predicted.sum()
+    else:
+        league_rates = np.array(DEFAULT_HIT_RATES)
+    return (hits + prior_weight * league_rates) / (predicted + prior_weight)[:, None]
+
+
+def _points_table() -> np.ndarray:
+    """Points of one prediction by hit code: bit 0 winner, 1 top scorer, 2 top wicket taker, 3 supports the winner"""
+    table = np.zeros(16, dtype=np.int16)
+    for code in range(16):
+        winner, scorer, wicket, supporter = (bool(code & bit) for bit in (1, 2, 4, 8))
+        table[code] = (10 * winner + 5 * (winner and supporter) + 5 * scorer + 5 * wicket
+                       + 10 * (winner and scorer and wicket))
+    return table
+
+
+POINTS_TABLE = _points_table()
+MAX_MATCH_POINTS = int(POINTS_TABLE.max())  # Before the playoff multiplier
+
+
+def simulate_batch(inputs: dict, simulations: int, seed) -> np.ndarray:
+    """Points each player gains over the remaining matches, shape (players, simulations)"""
+    rng = np.random.default_rng(seed)
+    teams = inputs['teams'][:, None]
+    shape = (len(teams), simulations)
+    # Probabilities as 16-bit thresholds: uniform uint16 draws are cheaper than floats
+    rates = (np.asarray(inputs['rates']) * 65536).clip(0, 65535).astype(np.uint16)
+    participation = (np.asarray(inputs['participation']) * 65536).clip(0, 65535).astype(np.uint16)[:, None]
+    gained = np.zeros(shape, dtype=np.int16)
+
+    for match in inputs['matches']:
+        multiplier = 2 if match['is_playoff'] else 1
+        winner = np.where(rng.random(simulations) < 0.5, match['team1'], match['team2'])[None, :]
+        picks = match['picks'][:, None]
+        known = picks >= 0
+        draws = rng.integers(0, 65536, (4,) + shape, dtype=np.uint16)
+
+        # Predictions already submitted count as they are; others only while the match is still open
+        predicts = known | (match['open'] & (draws[0] < participation))
+        correct_winner = np.where(known, picks == winner, draws[1] < rates[:, 0:1])
+        code = (correct_winner.view(np.uint8)
+                | (draws[2] < rates[:, 1:2]).view(np.uint8) << 1
+                | (draws[3] < rates[:, 2:3]).view(np.uint8) << 2
+                | (teams == winner).view(np.uint8) << 3)
+        code &= predicts.view(np.uint8) * np.uint8(15)
+        gained += POINTS_TABLE[code] * multiplier
+    return gained
+
+
+def _batch_odds(inputs: dict, simulations: int, seed, top_n: int) -> tuple:
+    """Title wins, top-N finishes and summed final points per player over one batch"""
+    totals = inputs['points'][:, None] + simulate_batch(inputs, simulations, seed)
+    best = totals.max(axis=0)
+    leaders = totals == best
+    # Players tied for first share the title between them
+    wins = (leaders / leaders.sum(axis=0)).sum(axis=1)
+    if len(totals) > top_n:
+        # A player is in the top N when fewer than N players finish strictly ahead
+        threshold = np.partition(totals, len(totals) - top_n, axis=0)[len(totals) - top_n]
+        top = (totals >= threshold).sum(axis=1)
+    else:
+        top = np.full(len(totals), simulations)
+    return wins, top, totals.sum(axis=1, dtype=np.float64)
+
+
+def simulate_title_odds(inputs: dict, simulations: int = DEFAULT_SIMULATIONS, top_n: int = 3,
+                        seed: int = 0, workers: int = 1) -> list:
+    """Probability of each player finishing first and in the top N.
+
+    ``inputs`` holds, per player, ``usernames``, current ``points``, supported
+    ``teams`` (as team numbers), smoothed hit ``rates`` (players, 3) and
+    ``participation`` (chance of predicting an open match), plus ``matches``:
+    one dict per remaining match with ``team1``, ``team2``, ``is_playoff``,
+    ``open`` and ``picks`` (each player's submitted winner, -1 if none).
+    Returns one dict per player, in input order.
+    """
+    usernames = inputs['usernames']
+    points = np.asarray(inputs['points'], dtype=np.int32)
+    odds = [{'username': username, 'points': int(player_points), 'win': 0.0, 'top_n': 0.0,
+             'expected_points': float(player_points)} for username, player_points in zip(usernames, points)]
+    if not usernames or simulations <= 0:
+        return odds
+
+    # Players who can't reach today's N-th best score even with perfect predictions are out;
+    # the N players above them keep at least their points, so dropping them changes no one else's odds
+    max_gain = sum(MAX_MATCH_POINTS * (2 if match['is_playoff'] else 1) for match in inputs['matches'])
+    nth_best = np.sort(points)[::-1][min(top_n, len(points)) - 1]
+    contenders = np.flatnonzero(points + max_gain >= nth_best)
+    subset = {
+        'points': points[contenders],
+        'teams': np.asarray(inputs['teams'])[contenders],
+        'rates': np.asarray(inputs['rates'])[contenders],
+        'participation': np.asarray(inputs['participation'])[contenders],
+        'matches': [{**match, 'picks': np.asarray(match['picks'])[contenders]} for match in inputs['matches']]
+    }
+
+    batch_size = max(MAX_BATCH_CELLS // len(contenders), 1)
+    sizes = [min(batch_size, simulations - start) for start in range(0, simulations, batch_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    args = ([subset] * len(sizes), sizes, seeds, [top_n] * len(sizes))
+    if workers > 1 and len(sizes) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(sizes))) as pool:
+            results = list(pool.map(_batch_odds, *args))
+    else:
+        results = list(map(_batch_odds, *args))
+
+    wins = sum(result[0] for result in results) / simulations
+    top = sum(result[1] for result in results) / simulations
+    expected = sum(result[2] for result in results) / simulations
+    for position, row in enumerate(contenders.tolist()):
+        odds[row].update(win=float(wins[position]), top_n=float(top[position]),
+                         expected_points=float(expected[position]))
+    return odds
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate the rest of the season")
+    parser.add_argument("--league", default="default")
+    parser.add_argument("--season", default="2025")
+    parser.add_argument("--simulations", type=int, default=DEFAULT_SIMULATIONS)
+    parser.add_argument("--top-n", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=1, help="processes to spread the batches over")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--show", type=int, default=20, help="number of players to print")
+    args = parser.parse_args()
+
+    from data import GameData
+
+    game_data = GameData(args.league, args.season)
+    start = time.perf_counter()
+    result = game_data.get_title_odds(args.simulations, args.top_n, args.workers, args.seed)
+    elapsed = time.perf_counter() - start
+    print(f"{args.simulations} simulations of {result['remaining_matches']} remaining matches "
+          f"for {len(result['odds'])} players in {elapsed:.2f}s")
+    print(f"{'player':<24}{'points':>8}{'win %':>8}{f'top {args.top_n} %':>10}{'expected':>10}")
+    for entry in result['odds'][:args.show]:
+        print(f"{entry['username']:<24}{entry['points']:>8}{entry['win'] * 100:>8.1f}"
+              f"{entry['top_n'] * 100:>10.1f}{entry['expected_points']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()